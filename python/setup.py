@@ -1,17 +1,26 @@
 
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
 import platform
+import sys
+
+# The native CRC module is optional: dynamixel_sdk.crc falls back to pure Python
+# when it could not be built (no compiler, Python 2, ...).
+ext_modules = []
+if sys.version_info >= (3, 0):
+    ext_modules.append(Extension('dynamixel_sdk._crc', sources=['src/dynamixel_sdk/_crc.c'], optional=True))
 
 setup(
     name='dynamixel_sdk',
     version='3.7.51',
     packages=['dynamixel_sdk'],
     package_dir={'': 'src'},
+    ext_modules=ext_modules,
     license='Apache 2.0',
     description='Dynamixel SDK 3. python package',
     long_description=open('README.txt').read(),
     url='https://github.com/ROBOTIS-GIT/DynamixelSDK',
     author='Leon Jung',
     author_email='rwjung@robotis.com',
-    install_requires=['pyserial']
+    install_requires=['pyserial'],
+    extras_require={'numpy': ['numpy']}
 )
@@ -25,3 +25,15 @@ from .group_sync_read import *
 from .group_sync_write import *
 from .group_bulk_read import *
 from .group_bulk_write import *
+from .group_field_sync_write import *
+from .group_field_sync_read import *
+from .bus_group import *
+from .bus_scheduler import *
+from .transaction_batch import *
+from .indirect_address import *
+from .discovery import *
+from .topology_cache import *
+from .control_table import *
+from .virtual_bus import *
+from .traffic_log import *
+from .transaction_monitor import *
@@ -0,0 +1,93 @@
+/*******************************************************************************
+* Copyright 2017 ROBOTIS CO., LTD.
+*
+* Licensed under the Apache License, Version 2.0 (the "License");
+* you may not use this file except in compliance with the License.
+* You may obtain a copy of the License at
+*
+*     http://www.apache.org/licenses/LICENSE-2.0
+*
+* Unless required by applicable law or agreed to in writing, software
+* distributed under the License is distributed on an "AS IS" BASIS,
+* WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+* See the License for the specific language governing permissions and
+* limitations under the License.
+*******************************************************************************/
+
+/*
+ * Optional native CRC-16 for dynamixel_sdk.crc.
+ * Built by setup.py when a compiler is available; crc.py falls back to the
+ * pure Python implementation otherwise.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+static unsigned short crc_table_0[256];
+static unsigned short crc_table_1[256];
+
+static void buildTables(void)
+{
+  int i, j;
+  unsigned short crc;
+
+  for (i = 0; i < 256; i++)
+  {
+    crc = (unsigned short)(i << 8);
+    for (j = 0; j < 8; j++)
+      crc = (crc & 0x8000) ? (unsigned short)((crc << 1) ^ 0x8005) : (unsigned short)(crc << 1);
+    crc_table_0[i] = crc;
+  }
+
+  for (i = 0; i < 256; i++)
+    crc_table_1[i] = (unsigned short)((crc_table_0[i] << 8) ^ crc_table_0[crc_table_0[i] >> 8]);
+}
+
+static PyObject *updateCRC(PyObject *self, PyObject *args)
+{
+  unsigned int crc_accum;
+  Py_buffer data;
+  Py_ssize_t data_blk_size;
+  const unsigned char *p;
+  Py_ssize_t i;
+  unsigned short crc, x;
+
+  if (!PyArg_ParseTuple(args, "Iy*n", &crc_accum, &data, &data_blk_size))
+    return NULL;
+
+  if (data_blk_size < 0 || data_blk_size > data.len)
+  {
+    PyBuffer_Release(&data);
+    PyErr_SetString(PyExc_ValueError, "data_blk_size out of range");
+    return NULL;
+  }
+
+  p = (const unsigned char *)data.buf;
+  crc = (unsigned short)(crc_accum & 0xFFFF);
+
+  for (i = 0; i + 1 < data_blk_size; i += 2)
+  {
+    x = (unsigned short)(crc ^ ((p[i] << 8) | p[i + 1]));
+    crc = (unsigned short)(crc_table_1[x >> 8] ^ crc_table_0[x & 0xFF]);
+  }
+  if (i < data_blk_size)
+    crc = (unsigned short)((crc << 8) ^ crc_table_0[((crc >> 8) ^ p[i]) & 0xFF]);
+
+  PyBuffer_Release(&data);
+  return PyLong_FromUnsignedLong(crc);
+}
+
+static PyMethodDef crc_methods[] = {
+  {"updateCRC", updateCRC, METH_VARARGS, "updateCRC(crc_accum, data, data_blk_size) -> int"},
+  {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef crc_module = {
+  PyModuleDef_HEAD_INIT, "_crc", NULL, -1, crc_methods
+};
+
+PyMODINIT_FUNC PyInit__crc(void)
+{
+  buildTables();
+  return PyModule_Create(&crc_module);
+}
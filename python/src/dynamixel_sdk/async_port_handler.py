@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# asyncio transport (Python 3.5+)
+#
+# AsyncPortHandler wraps an opened PortHandler and waits for the serial fd with
+# loop.add_reader() instead of polling. AsyncPacketHandler wraps a packet handler
+# and runs its transactions as coroutines: packets are built, sent and parsed by
+# the wrapped handler, timeouts come from its setPacketTimeout() arithmetic.
+# Waiting for a port used by another thread or coroutine does not block the loop.
+# While a coroutine holds the port, its reads are non-blocking; the read mode of
+# the port (see setBlockingRead()) is restored when it lets go, so a port can be
+# shared with threads, e.g. a BusGroup.
+#
+# The module is not imported by the package, so that it does not load asyncio:
+#
+#   from dynamixel_sdk.async_port_handler import AsyncPortHandler, AsyncPacketHandler
+#
+#   port = AsyncPortHandler(PortHandler('/dev/ttyUSB0'))
+#   ph = AsyncPacketHandler(PacketHandler(2.0))
+#   data, result, error = await ph.readTxRx(port, 1, 132, 4)
+
+import asyncio
+
+from .robotis_def import *
+from . import protocol1_packet_handler
+from . import protocol2_packet_handler
+
+# wait between two reads when the port has no pollable fd (e.g. Windows)
+POLL_INTERVAL = 0.001
+
+
+def getRunningLoop():
+    if hasattr(asyncio, 'get_running_loop'):
+        return asyncio.get_running_loop()
+    return asyncio.get_event_loop()
+
+
+class AsyncPortHandler(object):
+    def __init__(self, port):
+        self.port = port
+        self.blocking_read = False  # read mode of the port before lockPort()
+
+    def getPortHandler(self):
+        return self.port
+
+    def getFileno(self):
+        try:
+            return self.port.ser.fileno()
+        except (AttributeError, NotImplementedError, ValueError):
+            return None
+
+    async def waitReadable(self, timeout):
+        fd = self.getFileno()
+        if fd is None:
+            await asyncio.sleep(min(timeout, POLL_INTERVAL))
+            return
+
+        loop = getRunningLoop()
+        future = loop.create_future()
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
+
+        loop.add_reader(fd, wake)
+        timer = loop.call_later(timeout, wake)
+        try:
+            await future
+        finally:
+            timer.cancel()
+            loop.remove_reader(fd)
+
+    async def lockPort(self):
+        # PortHandler.lockPort() that polls instead of blocking the event loop, up to the lock
+        # timeout of the port. Coroutines share the loop thread: the port is also taken while
+        # another one is in a transaction.
+        port = self.port
+        loop = getRunningLoop()
+        deadline = loop.time() + port.getLockTimeout() / 1000.0
+        while True:
+            if not (port.port_lock.isOwner() and port.is_busy) and port.lockPort(timeout=0):
+                if port.port_lock.depth == 1:
+                    # reads must return at once, the event loop does the waiting
+                    self.blocking_read = port.getBlockingRead()
+                    port.setBlockingRead(False)
+                return True
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def unlockPort(self):
+        # the transaction of a cancelled coroutine ends here too
+        port = self.port
+        port.releasePort()
+        if port.port_lock.isOwner() and port.port_lock.depth == 1:
+            port.setBlockingRead(self.blocking_read)
+        port.unlockPort()
+
+    async def readPort(self, length):
+        # what is available, waits until data arrives or the packet deadline passes when nothing is
+        data = self.port.readPort(length)
+        if data or length == 0:
+            return data
+
+        remaining_ns = self.port.getRemainingTimeNs()
+        if remaining_ns <= 0:
+            return data
+
+        await self.waitReadable(remaining_ns / 1000000000.0)
+        return self.port.readPort(length)
+
+
+class AsyncPacketHandler(object):
+    def __init__(self, ph):
+        self.ph = ph
+
+        # packet field indexes differ between the protocols
+        if ph.getProtocolVersion() == 1.0:
+            protocol = protocol1_packet_handler
+        else:
+            protocol = protocol2_packet_handler
+        self.pkt_id = protocol.PKT_ID
+        self.pkt_error = protocol.PKT_ERROR
+        self.rxpacket_max_len = protocol.RXPACKET_MAX_LEN
+
+    def getPacketHandler(self):
+        return self.ph
+
+    def getProtocolVersion(self):
+        return self.ph.getProtocolVersion()
+
+    def getTxRxResult(self, result):
+        return self.ph.getTxRxResult(result)
+
+    def getRxPacketError(self, error):
+        return self.ph.getRxPacketError(error)
+
+    async def rxPacket(self, port):
+        parser = self.ph.getStatusParser(port.port)
+
+        while True:
+            data = await port.readPort(parser.getWaitLength())
+            rxpacket, result = self.ph.pollRxPacket(port.port, data)
+            if result != COMM_RX_WAITING:
+                return rxpacket, result
+
+    async def txRxPacket(self, port, txpacket):
+        rxpacket = None
+        error = 0
+
+        if not await port.lockPort():
+            return rxpacket, COMM_PORT_BUSY, error
+        try:
+            # tx packet
+            result = self.ph.txPacket(port.port, txpacket)
+            if result != COMM_SUCCESS:
+                return rxpacket, result, error
+
+            is_waiting, result = self.ph.startRxPacket(port.port, txpacket)
+            if not is_waiting:
+                return rxpacket, result, error
+
+            # rx packet
+            dxl_id = txpacket[self.pkt_id]
+            while True:
+                rxpacket, result = await self.rxPacket(port)
+                if result != COMM_SUCCESS or rxpacket[self.pkt_id] == dxl_id:
+                    break
+        finally:
+            port.unlockPort()
+
+        if result == COMM_SUCCESS and rxpacket[self.pkt_id] == dxl_id:
+            error = rxpacket[self.pkt_error]
+
+        return rxpacket, result, error
+
+    async def readTxRxBuffer(self, port, dxl_id, address, length):
+        data = bytearray()
+
+        if dxl_id >= BROADCAST_ID:
+            return data, COMM_NOT_AVAILABLE, 0
+
+        txpacket = self.ph.makeReadPacket(dxl_id, address, length)
+
+        rxpacket, result, error = await self.txRxPacket(port, txpacket)
+        if result == COMM_SUCCESS:
+            data = self.ph.getRxPacketData(rxpacket, length)
+
+        return data, result, error
+
+    async def readTxRx(self, port, dxl_id, address, length):
+        data, result, error = await self.readTxRxBuffer(port, dxl_id, address, length)
+        return list(data), result, error
+
+    async def read1ByteTxRx(self, port, dxl_id, address):
+        data, result, error = await self.readTxRxBuffer(port, dxl_id, address, 1)
+        data_read = data[0] if (result == COMM_SUCCESS) else 0
+        return data_read, result, error
+
+    async def read2ByteTxRx(self, port, dxl_id, address):
+        data, result, error = await self.readTxRxBuffer(port, dxl_id, address, 2)
+        data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
+        return data_read, result, error
+
+    async def read4ByteTxRx(self, port, dxl_id, address):
+        data, result, error = await self.readTxRxBuffer(port, dxl_id, address, 4)
+        data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
+                                  DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
+        return data_read, result, error
+
+    async def writeTxRx(self, port, dxl_id, address, length, data):
+        txpacket = self.ph.makeWritePacket(dxl_id, address, length, data)
+
+        _, result, error = await self.txRxPacket(port, txpacket)
+
+        return result, error
+
+    async def write1ByteTxRx(self, port, dxl_id, address, data):
+        return await self.writeTxRx(port, dxl_id, address, 1, [data & 0xFF])
+
+    async def write2ByteTxRx(self, port, dxl_id, address, data):
+        return await self.writeTxRx(port, dxl_id, address, 2, [DXL_LOBYTE(data), DXL_HIBYTE(data)])
+
+    async def write4ByteTxRx(self, port, dxl_id, address, data):
+        return await self.writeTxRx(port, dxl_id, address, 4, [DXL_LOBYTE(DXL_LOWORD(data)),
+                                                               DXL_HIBYTE(DXL_LOWORD(data)),
+                                                               DXL_LOBYTE(DXL_HIWORD(data)),
+                                                               DXL_HIBYTE(DXL_HIWORD(data))])
+
+    async def broadcastPing(self, port):
+        if self.ph.getProtocolVersion() == 1.0:
+            return None, COMM_NOT_AVAILABLE
+
+        if not await port.lockPort():
+            return {}, COMM_PORT_BUSY
+        try:
+            result = self.ph.broadcastPingTx(port.port)
+            if result != COMM_SUCCESS:
+                return {}, result
+
+            # collect every answer until the timeout
+            rxpacket = bytearray()
+            while not port.port.isPacketTimeout():
+                rxpacket += await port.readPort(self.rxpacket_max_len)
+        finally:
+            port.unlockPort()
+
+        return self.ph.getBroadcastPingResult(rxpacket)
+
+    async def syncReadTxRx(self, port, group):
+        # awaitable GroupSyncRead.txRxPacket(), group must be built on port.getPortHandler()
+        if self.ph.getProtocolVersion() == 1.0:
+            return COMM_NOT_AVAILABLE
+
+        if not await port.lockPort():
+            return COMM_PORT_BUSY
+        try:
+            result = group.txPacket()
+            if result != COMM_SUCCESS:
+                return result
+
+            group.last_result = False
+            group.result_dict.clear()
+
+            id_list = list(group.data_dict)
+            status_dict = {}
+            pending = {}
+            for dxl_id in id_list:
+                pending[dxl_id] = COMM_RX_TIMEOUT
+
+            data = bytearray()
+            while True:
+                status_dict, result = self.ph.pollSyncReadRx(port.port, group.data_length, id_list, pending,
+                                                             status_dict, data)
+                if result != COMM_RX_WAITING:
+                    break
+                data = await port.readPort(self.ph.getSyncReadWaitLength(port.port, group.data_length, pending))
+        finally:
+            port.unlockPort()
+
+        group.setStatus(status_dict, result)
+
+        return result
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import math
+import sys
+import threading
+
+from .robotis_def import *
+from .clock import MonotonicClock
+
+
+class BusWorker(threading.Thread):
+    # Runs the transactions of one port on its own thread.
+    # The port reads block in the kernel, where the GIL is released, so the buses overlap.
+    def __init__(self, name, port, ph, clock):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.bus_name = name
+        self.port = port
+        self.ph = ph
+        self.clock = clock
+
+        self.transactions = []
+        self.results = []
+        self.latency_ns = 0
+        self.exc_info = None
+
+        self.is_running = True
+        self.start_event = threading.Event()
+        self.done_event = threading.Event()
+
+    def addTransaction(self, transaction):
+        self.transactions.append(transaction)
+
+    def runTransactions(self):
+        start_ns = self.clock.getTimeNs()
+
+        results = []
+        for transaction in self.transactions:
+            results.append(transaction())
+
+        self.results = results
+        self.latency_ns = self.clock.getTimeNs() - start_ns
+
+    def run(self):
+        while True:
+            self.start_event.wait()
+            self.start_event.clear()
+            if not self.is_running:
+                break
+
+            try:
+                self.runTransactions()
+            except Exception:
+                self.exc_info = sys.exc_info()
+
+            self.done_event.set()
+
+
+class BusSnapshot(object):
+    # Results of one cycle, every bus finished before the snapshot was taken
+    def __init__(self, cycle, start_ns, cycle_ns, results, latency_ns):
+        self.cycle = cycle
+        self.start_ns = start_ns
+        self.cycle_ns = cycle_ns
+        self.results = results  # {bus name: [result of every transaction]}
+        self.latency_ns = latency_ns  # {bus name: time spent on the bus}
+
+    def isSuccess(self):
+        for name in self.results:
+            for result in self.results[name]:
+                if result != COMM_SUCCESS:
+                    return False
+        return True
+
+
+class BusGroup(object):
+    # Drives several independent ports concurrently.
+    #
+    # Every bus owns a PortHandler, its packet handler and a list of transactions:
+    # callables without arguments returning a COMM_* result, typically the
+    # txRxPacket / txPacket method of a sync or bulk group built on that port.
+    # runCycle() starts all buses together and returns once all of them are done.
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else MonotonicClock()
+
+        self.workers = []
+        self.worker_dict = {}
+        self.is_started = False
+
+        self.cycle_count = 0
+        self.last_start_ns = None
+
+        # cycle period statistics (Welford)
+        self.period_count = 0
+        self.period_mean_ns = 0.0
+        self.period_m2 = 0.0
+        self.period_min_ns = 0
+        self.period_max_ns = 0
+
+    def addBus(self, name, port, ph):
+        if name in self.worker_dict:  # name already exist
+            return False
+
+        # polling workers would spin against the GIL and slow the other buses down
+        port.setBlockingRead(True)
+
+        worker = BusWorker(name, port, ph, self.clock)
+        self.workers.append(worker)
+        self.worker_dict[name] = worker
+
+        if self.is_started:
+            worker.start()
+        return True
+
+    def addTransaction(self, name, transaction):
+        if name not in self.worker_dict:  # NOT exist
+            return False
+
+        self.worker_dict[name].addTransaction(transaction)
+        return True
+
+    def getPort(self, name):
+        return self.worker_dict[name].port
+
+    def getPacketHandler(self, name):
+        return self.worker_dict[name].ph
+
+    def start(self):
+        if self.is_started:
+            return
+
+        for worker in self.workers:
+            worker.start()
+        self.is_started = True
+
+    def stop(self):
+        if not self.is_started:
+            return
+
+        for worker in self.workers:
+            worker.is_running = False
+            worker.start_event.set()
+        for worker in self.workers:
+            worker.join()
+
+        self.is_started = False
+
+        # a thread can only be started once, prepare new workers for the next start()
+        workers = []
+        for old_worker in self.workers:
+            worker = BusWorker(old_worker.bus_name, old_worker.port, old_worker.ph, self.clock)
+            worker.transactions = old_worker.transactions
+            workers.append(worker)
+            self.worker_dict[worker.bus_name] = worker
+        self.workers = workers
+
+    def runCycle(self):
+        if not self.is_started:
+            self.start()
+
+        start_ns = self.clock.getTimeNs()
+        self.updatePeriod(start_ns)
+
+        for worker in self.workers:
+            worker.done_event.clear()
+            worker.start_event.set()
+
+        for worker in self.workers:
+            worker.done_event.wait()
+
+        cycle_ns = self.clock.getTimeNs() - start_ns
+        self.cycle_count += 1
+
+        for worker in self.workers:
+            if worker.exc_info is not None:
+                exc_info = worker.exc_info
+                worker.exc_info = None
+                raise exc_info[1]
+
+        results = {}
+        latency_ns = {}
+        for worker in self.workers:
+            results[worker.bus_name] = worker.results
+            latency_ns[worker.bus_name] = worker.latency_ns
+
+        return BusSnapshot(self.cycle_count, start_ns, cycle_ns, results, latency_ns)
+
+    def updatePeriod(self, start_ns):
+        if self.last_start_ns is not None:
+            period_ns = start_ns - self.last_start_ns
+
+            if self.period_count == 0:
+                self.period_min_ns = period_ns
+                self.period_max_ns = period_ns
+            else:
+                self.period_min_ns = min(self.period_min_ns, period_ns)
+                self.period_max_ns = max(self.period_max_ns, period_ns)
+
+            self.period_count += 1
+            delta = period_ns - self.period_mean_ns
+            self.period_mean_ns += delta / self.period_count
+            self.period_m2 += delta * (period_ns - self.period_mean_ns)
+
+        self.last_start_ns = start_ns
+
+    def getCycleJitterNs(self):
+        # standard deviation of the time between two runCycle() calls
+        if self.period_count < 2:
+            return 0.0
+        return math.sqrt(self.period_m2 / (self.period_count - 1))
+
+    def getCycleStats(self):
+        return {
+            'cycles': self.cycle_count,
+            'period_mean_ns': self.period_mean_ns,
+            'period_min_ns': self.period_min_ns,
+            'period_max_ns': self.period_max_ns,
+            'jitter_ns': self.getCycleJitterNs(),
+        }
+
+    def resetCycleStats(self):
+        self.last_start_ns = None
+        self.period_count = 0
+        self.period_mean_ns = 0.0
+        self.period_m2 = 0.0
+        self.period_min_ns = 0
+        self.period_max_ns = 0
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+
+from .robotis_def import *
+from .port_lock import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from .group_sync_read import GroupSyncRead
+from .group_sync_write import GroupSyncWrite
+from .group_bulk_read import GroupBulkRead
+from .group_bulk_write import GroupBulkWrite
+
+# per transaction time on top of the bytes on the wire until a job has been measured [ms]
+DEFAULT_TRANSACTION_OVERHEAD = 0.5
+# weight of the last run in the measured job duration
+DURATION_FILTER = 0.2
+
+
+def getTransactionLength(group):
+    # (instruction packet bytes, status packet bytes) of one txRxPacket() / txPacket() of a group
+    # stuffing is not counted, subclasses (GroupFieldSyncRead, ...) count as their base group
+    is_protocol1 = group.ph.getProtocolVersion() == 1.0
+    instruction = 6 if is_protocol1 else 10  # header .. INST + CHKSUM / CRC
+    status = 6 if is_protocol1 else 11  # header .. ERROR + CHKSUM / CRC
+    id_count = len(group.data_dict)
+
+    if isinstance(group, GroupSyncRead):
+        return instruction + 4 + id_count, id_count * (status + group.data_length)
+    if isinstance(group, GroupSyncWrite):
+        return instruction + (2 if is_protocol1 else 4) + id_count * (1 + group.data_length), 0
+    if isinstance(group, GroupBulkRead):
+        # one bulk read per round, one status packet per read range
+        span_list = [span for dxl_id in group.span_dict for span in group.span_dict[dxl_id]]
+        round_count = max(len(group.span_dict[dxl_id]) for dxl_id in group.span_dict) if span_list else 0
+        data_length = sum(span[2] for span in span_list)
+        param_length = round_count + len(span_list) * 3 if is_protocol1 else len(span_list) * 5
+        return round_count * instruction + param_length, len(span_list) * status + data_length
+    if isinstance(group, GroupBulkWrite):
+        return instruction + len(group.param), 0
+    raise ValueError("no transaction length for %s" % group.__class__.__name__)
+
+
+class BusJob(object):
+    def __init__(self, name, transaction, period_ns, priority, tx_length, rx_length):
+        self.name = name
+        self.transaction = transaction  # callable without arguments returning a COMM_* result
+        self.period_ns = period_ns  # 0: one-shot
+        self.priority = priority
+        self.tx_length = tx_length
+        self.rx_length = rx_length
+
+        self.next_release_ns = 0
+        self.deadline_ns = None
+        self.is_pending = False
+
+        self.run_count = 0
+        self.missed_count = 0
+        self.fail_count = 0
+        self.last_result = COMM_NOT_AVAILABLE
+        self.duration_ns = 0.0  # filtered measured duration, 0 until the first run
+        self.max_duration_ns = 0
+
+    def release(self, now_ns):
+        # periodic: a release that is still pending when the next one is due missed its deadline
+        if self.period_ns == 0 or self.next_release_ns > now_ns:
+            return
+
+        count = (now_ns - self.next_release_ns) // self.period_ns + 1
+        self.missed_count += count - 1
+        if self.is_pending:
+            self.missed_count += 1
+
+        self.next_release_ns += count * self.period_ns
+        self.deadline_ns = self.next_release_ns
+        self.is_pending = True
+
+    def getEstimateNs(self, tx_time_per_byte, overhead_ns):
+        if self.duration_ns > 0:
+            return int(self.duration_ns)
+
+        # tx_time_per_byte [ms]
+        return int((self.tx_length + self.rx_length) * tx_time_per_byte * 1000000) + overhead_ns
+
+    def addRun(self, result, duration_ns):
+        self.run_count += 1
+        self.last_result = result
+        if result != COMM_SUCCESS:
+            self.fail_count += 1
+
+        if self.duration_ns == 0:
+            self.duration_ns = float(duration_ns)
+        else:
+            self.duration_ns += DURATION_FILTER * (duration_ns - self.duration_ns)
+        self.max_duration_ns = max(self.max_duration_ns, duration_ns)
+
+
+class BusScheduler(object):
+    # Runs periodic and one-shot jobs on one port in fixed cycles.
+    #
+    # Every cycle the released jobs are taken by priority class, then by deadline,
+    # as long as their estimated duration fits into the rest of the cycle. The
+    # estimate starts from the bytes on the wire at the port baud rate and follows
+    # the measured duration once the job has run. A job that is still pending at
+    # its next release counts as a missed deadline.
+    #
+    #   scheduler = BusScheduler(port, 1.0)
+    #   scheduler.addPeriodicJob('goal', group_sync_write.txPacket, 1000, PRIORITY_HIGH,
+    #                            *getTransactionLength(group_sync_write))
+    #   scheduler.spin()
+    def __init__(self, port, cycle_period, clock=None, transaction_overhead=DEFAULT_TRANSACTION_OVERHEAD):
+        self.port = port
+        self.cycle_period_ns = int(cycle_period * 1000000)  # [ms]
+        self.overhead_ns = int(transaction_overhead * 1000000)  # [ms] USB latency, return delay time, ...
+        self.clock = clock if clock is not None else port.clock
+
+        self.jobs = []
+        self.job_dict = {}
+        self.is_running = False
+
+        self.cycle_count = 0
+        self.overrun_count = 0  # cycles that took longer than cycle_period
+        self.busy_time_ns = 0
+        self.stats_start_ns = None
+        self.dropped_count = 0  # one-shot jobs removed at their missed deadline
+
+    def addPeriodicJob(self, name, transaction, rate, priority=PRIORITY_NORMAL, tx_length=0, rx_length=0):
+        # rate [Hz]
+        if name in self.job_dict or rate <= 0:
+            return False
+
+        job = BusJob(name, transaction, int(1000000000 / rate), priority, tx_length, rx_length)
+        job.next_release_ns = self.clock.getTimeNs()
+        self.jobs.append(job)
+        self.job_dict[name] = job
+        return True
+
+    def addOneShotJob(self, name, transaction, priority=PRIORITY_LOW, tx_length=0, rx_length=0, deadline=None):
+        # deadline [ms] from now, None: no deadline
+        if name in self.job_dict:
+            return False
+
+        job = BusJob(name, transaction, 0, priority, tx_length, rx_length)
+        job.is_pending = True
+        if deadline is not None:
+            job.deadline_ns = self.clock.getTimeNs() + int(deadline * 1000000)
+        self.jobs.append(job)
+        self.job_dict[name] = job
+        return True
+
+    def removeJob(self, name):
+        if name not in self.job_dict:  # NOT exist
+            return False
+
+        self.jobs.remove(self.job_dict.pop(name))
+        return True
+
+    def getJob(self, name):
+        return self.job_dict.get(name)
+
+    def runCycle(self):
+        # returns [(job name, result)] of the jobs run in this cycle
+        start_ns = self.clock.getTimeNs()
+        if self.stats_start_ns is None:
+            self.stats_start_ns = start_ns
+        end_ns = start_ns + self.cycle_period_ns
+
+        ready = []
+        for job in list(self.jobs):
+            job.release(start_ns)
+            if job.is_pending:
+                if job.period_ns == 0 and job.deadline_ns is not None and job.deadline_ns < start_ns:
+                    # one-shot job that can not be served in time any more, its name is free again
+                    self.dropped_count += 1
+                    self.removeJob(job.name)
+                    continue
+                ready.append(job)
+
+        ready.sort(key=lambda job: (job.priority, job.deadline_ns if job.deadline_ns is not None else end_ns))
+
+        results = []
+        now_ns = start_ns
+        for job in ready:
+            # the first job always runs, so that a job longer than the cycle is not starved
+            if results and now_ns + job.getEstimateNs(self.port.tx_time_per_byte, self.overhead_ns) > end_ns:
+                continue
+
+            result = job.transaction()
+            job_end_ns = self.clock.getTimeNs()
+            job.addRun(result, job_end_ns - now_ns)
+            job.is_pending = False
+            self.busy_time_ns += job_end_ns - now_ns
+            now_ns = job_end_ns
+
+            results.append((job.name, result))
+            if job.period_ns == 0:
+                self.removeJob(job.name)
+
+        self.cycle_count += 1
+        if now_ns > end_ns:
+            self.overrun_count += 1
+
+        return results
+
+    def spin(self, cycle_count=None):
+        # runs cycles every cycle_period until stop() or cycle_count cycles
+        self.is_running = True
+        next_start_ns = self.clock.getTimeNs()
+
+        while self.is_running and (cycle_count is None or cycle_count > 0):
+            self.runCycle()
+            if cycle_count is not None:
+                cycle_count -= 1
+
+            next_start_ns += self.cycle_period_ns
+            wait_ns = next_start_ns - self.clock.getTimeNs()
+            if wait_ns > 0:
+                time.sleep(wait_ns / 1000000000.0)
+            else:
+                # behind schedule: start again from now instead of bursting
+                next_start_ns = self.clock.getTimeNs()
+
+        self.is_running = False
+
+    def stop(self):
+        self.is_running = False
+
+    def getUtilisation(self):
+        # share of the elapsed time spent in transactions
+        if self.stats_start_ns is None:
+            return 0.0
+
+        elapsed_ns = self.clock.getTimeNs() - self.stats_start_ns
+        if elapsed_ns <= 0:
+            return 0.0
+        return float(self.busy_time_ns) / elapsed_ns
+
+    def getMissedDeadlines(self):
+        return sum(job.missed_count for job in self.jobs) + self.dropped_count
+
+    def getStats(self):
+        jobs = {}
+        for job in self.jobs:
+            jobs[job.name] = {
+                'runs': job.run_count,
+                'missed': job.missed_count,
+                'failed': job.fail_count,
+                'last_result': job.last_result,
+                'duration_ns': job.duration_ns,
+                'max_duration_ns': job.max_duration_ns,
+            }
+
+        return {
+            'cycles': self.cycle_count,
+            'overruns': self.overrun_count,
+            'utilisation': self.getUtilisation(),
+            'missed_deadlines': self.getMissedDeadlines(),
+            'dropped': self.dropped_count,
+            'jobs': jobs,
+        }
+
+    def resetStats(self):
+        self.cycle_count = 0
+        self.overrun_count = 0
+        self.busy_time_ns = 0
+        self.stats_start_ns = None
+        self.dropped_count = 0
+        for job in self.jobs:
+            job.run_count = 0
+            job.missed_count = 0
+            job.fail_count = 0
+            job.max_duration_ns = 0
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+
+if hasattr(time, 'perf_counter_ns'):
+    _monotonic_ns = time.perf_counter_ns
+elif hasattr(time, 'perf_counter'):
+    def _monotonic_ns():
+        return int(time.perf_counter() * 1000000000)
+else:
+    # Python 2: no monotonic clock in the standard library
+    def _monotonic_ns():
+        return int(time.time() * 1000000000)
+
+
+class MonotonicClock(object):
+    # Integer nanoseconds from an arbitrary origin. Never goes backwards.
+    def getTimeNs(self):
+        return _monotonic_ns()
+
+
+class FakeClock(object):
+    # Manually driven clock for tests and simulations.
+    # step_ns is added after every read so that polling loops make progress.
+    def __init__(self, start_ns=0, step_ns=0):
+        self.time_ns = start_ns
+        self.step_ns = step_ns
+
+    def getTimeNs(self):
+        now = self.time_ns
+        self.time_ns += self.step_ns
+        return now
+
+    def setTimeNs(self, time_ns):
+        self.time_ns = time_ns
+
+    def advance(self, delta_ns):
+        self.time_ns += delta_ns
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Control table registry keyed by the model number of ping() / broadcastPing().
+#
+# The tables live in control_table_data.py, which is imported on the first lookup,
+# and are compiled once per model into fields with their struct codec:
+#
+#   model_number, result, error = ph.ping(port, DXL_ID)
+#   table = getControlTable(model_number)
+#   codec = table.makeCodec(['present_velocity', 'present_position'])
+#   group_sync_read = table.makeGroupSyncRead(port, ph, codec)
+#   ...
+#   velocity, position = codec.decode(group_sync_read.data_dict[DXL_ID])   # [rpm], [deg]
+
+import struct
+
+from .group_field_sync_read import GroupFieldSyncRead
+from .group_field_sync_write import GroupFieldSyncWrite, FIELD_FORMAT
+
+# direction bit of the protocol 1.0 sign and magnitude fields
+SIGN_MAGNITUDE_BIT = 0x400
+
+table_cache = {}
+
+
+class ControlField(object):
+    def __init__(self, name, address, width, kind, scale, unit):
+        self.name = name
+        self.address = address
+        self.width = width
+        self.signed = kind == 's'
+        self.sign_magnitude = kind == 'm'
+        self.scale = scale
+        self.unit = unit
+
+        self.format = FIELD_FORMAT[(width, self.signed)]
+        self.struct = struct.Struct('<' + self.format)
+
+    def toUnit(self, raw):
+        if self.sign_magnitude and raw & SIGN_MAGNITUDE_BIT:
+            raw = -(raw & (SIGN_MAGNITUDE_BIT - 1))
+        return raw * self.scale
+
+    def fromUnit(self, value):
+        raw = int(round(value / float(self.scale)))
+        if self.sign_magnitude and raw < 0:
+            raw = -raw | SIGN_MAGNITUDE_BIT
+        return raw
+
+    def decode(self, data, offset=0):
+        # [unit] from the little endian bytes of the field
+        return self.toUnit(self.struct.unpack_from(data, offset)[0])
+
+    def encode(self, value):
+        # little endian bytes of a [unit] value
+        return self.struct.pack(self.fromUnit(value))
+
+
+class FieldCodec(object):
+    # Fields read or written as one address range, decoded with one struct call.
+    # Bytes between the fields are skipped. decode() scales one row in Python, a
+    # NumPy array per row costs more than it saves for a few fields: decodeArrays()
+    # is the vectorised path, one scale per field over all IDs of a group read.
+    def __init__(self, fields):
+        self.fields = sorted(fields, key=lambda field: field.address)
+        if not self.fields:
+            raise ValueError("a codec needs at least one field")
+
+        self.start_address = self.fields[0].address
+        row_format = '<'
+        end = self.start_address
+        for field in self.fields:
+            if field.address < end:
+                raise ValueError("field '%s' overlaps the previous field" % field.name)
+            if field.address > end:
+                row_format += '%dx' % (field.address - end)
+            row_format += field.format
+            end = field.address + field.width
+
+        self.struct = struct.Struct(row_format)
+        self.data_length = end - self.start_address
+        self.names = tuple(field.name for field in self.fields)
+        self.scales = tuple(field.scale for field in self.fields)
+        self.is_raw = all(field.scale == 1 and not field.sign_magnitude for field in self.fields)
+        self.has_sign_magnitude = any(field.sign_magnitude for field in self.fields)
+
+    def decodeRaw(self, data, offset=0):
+        return self.struct.unpack_from(data, offset)
+
+    def decode(self, data, offset=0):
+        # tuple of [unit] values in address order
+        raw = self.struct.unpack_from(data, offset)
+        if self.is_raw:
+            return raw
+        if self.has_sign_magnitude:
+            return tuple(field.toUnit(value) for field, value in zip(self.fields, raw))
+        return tuple(value * scale for value, scale in zip(raw, self.scales))
+
+    def decodeDict(self, data, offset=0):
+        return dict(zip(self.names, self.decode(data, offset)))
+
+    def encode(self, values):
+        # values: {name: [unit]} or a sequence in address order
+        if isinstance(values, dict):
+            values = [values[name] for name in self.names]
+        return self.struct.pack(*[field.fromUnit(value) for field, value in zip(self.fields, values)])
+
+    def getGroupFields(self):
+        # (name, offset, width, signed) of GroupFieldSyncRead / GroupFieldSyncWrite, values stay raw
+        return [(field.name, field.address - self.start_address, field.width, field.signed) for field in self.fields]
+
+    def decodeArrays(self, group):
+        # {name: [unit] array} of a group read, see GroupSyncRead.getFieldArrays()
+        field_map = {}
+        for field in self.fields:
+            field_map[field.name] = (field.address, ('i%d' if field.signed else 'u%d') % field.width)
+
+        arrays = group.getFieldArrays(field_map)
+        for field in self.fields:
+            column = arrays[field.name]
+            if field.sign_magnitude:
+                column = (column & (SIGN_MAGNITUDE_BIT - 1)) * (1 - 2 * ((column & SIGN_MAGNITUDE_BIT) != 0))
+            if field.scale != 1 or field.sign_magnitude:
+                arrays[field.name] = column * field.scale
+        return arrays
+
+
+class ControlTable(object):
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.field_dict = dict((field.name, field) for field in fields)
+
+    def hasField(self, name):
+        return name in self.field_dict
+
+    def getField(self, name):
+        return self.field_dict.get(name)
+
+    def getFieldNames(self):
+        return [field.name for field in self.fields]
+
+    def getAddress(self, name):
+        return self.field_dict[name].address
+
+    def makeCodec(self, names):
+        missing = [name for name in names if name not in self.field_dict]
+        if missing:
+            raise ValueError("no field %s in the %s control table" % (', '.join(missing), self.name))
+        return FieldCodec([self.field_dict[name] for name in names])
+
+    def makeGroupSyncRead(self, port, ph, codec):
+        return GroupFieldSyncRead(port, ph, codec.start_address, codec.getGroupFields())
+
+    def makeGroupSyncWrite(self, port, ph, codec):
+        # the fields must be adjacent
+        return GroupFieldSyncWrite(port, ph, codec.start_address, codec.getGroupFields())
+
+
+def loadControlTable(name, model_number=None):
+    from . import control_table_data
+
+    field_dict = {}
+    for field in control_table_data.CONTROL_TABLE[name]:
+        field_dict[field[1]] = field
+    for field in control_table_data.MODEL_FIELDS.get(model_number, []):
+        if field[2] == 0:
+            field_dict.pop(field[1], None)
+        else:
+            field_dict[field[1]] = field
+
+    return ControlTable(name, [ControlField(*field_dict[address]) for address in sorted(field_dict)])
+
+
+def getModelName(model_number):
+    from . import control_table_data
+
+    if model_number not in control_table_data.MODEL_TABLE:
+        return None
+    return control_table_data.MODEL_TABLE[model_number][0]
+
+
+def getControlTable(model_number):
+    # ControlTable of a model number, None for an unknown model
+    table = table_cache.get(model_number)
+    if table is None:
+        from . import control_table_data
+
+        if model_number not in control_table_data.MODEL_TABLE:
+            return None
+        table = loadControlTable(control_table_data.MODEL_TABLE[model_number][1], model_number)
+        table_cache[model_number] = table
+    return table
+
+
+def getControlTableByName(name):
+    # 'X_SERIES', 'AX_SERIES', 'MX_SERIES_1', 'XL320', 'PRO_SERIES', 'P_SERIES'
+    table = table_cache.get(name)
+    if table is None:
+        from . import control_table_data
+
+        if name not in control_table_data.CONTROL_TABLE:
+            return None
+        table = loadControlTable(name)
+        table_cache[name] = table
+    return table
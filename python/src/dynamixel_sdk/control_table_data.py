@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Control tables, imported by control_table.py on the first lookup.
+#
+# A field is (name, address, width, kind, scale, unit):
+#   kind  'u' unsigned, 's' two's complement,
+#         'm' sign and magnitude with the direction in bit 10 (protocol 1.0 speed / load)
+#   scale unit value of one LSB, value [unit] = raw * scale
+# Refer to the product eManual for the items of a specific model.
+
+POSITION_4096 = 360.0 / 4096  # [deg]
+POSITION_1024 = 300.0 / 1024  # [deg]
+
+CONTROL_TABLE = {
+    'X_SERIES': [  # X series, MX series with 2.0 firmware update
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('model_information', 2, 4, 'u', 1, ''),
+        ('firmware_version', 6, 1, 'u', 1, ''),
+        ('id', 7, 1, 'u', 1, ''),
+        ('baud_rate', 8, 1, 'u', 1, ''),
+        ('return_delay_time', 9, 1, 'u', 2, 'us'),
+        ('drive_mode', 10, 1, 'u', 1, ''),
+        ('operating_mode', 11, 1, 'u', 1, ''),
+        ('secondary_id', 12, 1, 'u', 1, ''),
+        ('protocol_type', 13, 1, 'u', 1, ''),
+        ('homing_offset', 20, 4, 's', POSITION_4096, 'deg'),
+        ('moving_threshold', 24, 4, 'u', 0.229, 'rpm'),
+        ('temperature_limit', 31, 1, 'u', 1, 'degC'),
+        ('max_voltage_limit', 32, 2, 'u', 0.1, 'V'),
+        ('min_voltage_limit', 34, 2, 'u', 0.1, 'V'),
+        ('pwm_limit', 36, 2, 'u', 100.0 / 885, '%'),
+        ('current_limit', 38, 2, 'u', 2.69, 'mA'),
+        ('velocity_limit', 44, 4, 'u', 0.229, 'rpm'),
+        ('max_position_limit', 48, 4, 'u', POSITION_4096, 'deg'),
+        ('min_position_limit', 52, 4, 'u', POSITION_4096, 'deg'),
+        ('shutdown', 63, 1, 'u', 1, ''),
+        ('torque_enable', 64, 1, 'u', 1, ''),
+        ('led', 65, 1, 'u', 1, ''),
+        ('status_return_level', 68, 1, 'u', 1, ''),
+        ('registered_instruction', 69, 1, 'u', 1, ''),
+        ('hardware_error_status', 70, 1, 'u', 1, ''),
+        ('velocity_i_gain', 76, 2, 'u', 1, ''),
+        ('velocity_p_gain', 78, 2, 'u', 1, ''),
+        ('position_d_gain', 80, 2, 'u', 1, ''),
+        ('position_i_gain', 82, 2, 'u', 1, ''),
+        ('position_p_gain', 84, 2, 'u', 1, ''),
+        ('feedforward_2nd_gain', 88, 2, 'u', 1, ''),
+        ('feedforward_1st_gain', 90, 2, 'u', 1, ''),
+        ('bus_watchdog', 98, 1, 's', 20, 'ms'),
+        ('goal_pwm', 100, 2, 's', 100.0 / 885, '%'),
+        ('goal_current', 102, 2, 's', 2.69, 'mA'),
+        ('goal_velocity', 104, 4, 's', 0.229, 'rpm'),
+        ('profile_acceleration', 108, 4, 'u', 214.577, 'rev/min2'),
+        ('profile_velocity', 112, 4, 'u', 0.229, 'rpm'),
+        ('goal_position', 116, 4, 's', POSITION_4096, 'deg'),
+        ('realtime_tick', 120, 2, 'u', 1, 'ms'),
+        ('moving', 122, 1, 'u', 1, ''),
+        ('moving_status', 123, 1, 'u', 1, ''),
+        ('present_pwm', 124, 2, 's', 100.0 / 885, '%'),
+        ('present_current', 126, 2, 's', 2.69, 'mA'),
+        ('present_velocity', 128, 4, 's', 0.229, 'rpm'),
+        ('present_position', 132, 4, 's', POSITION_4096, 'deg'),
+        ('velocity_trajectory', 136, 4, 's', 0.229, 'rpm'),
+        ('position_trajectory', 140, 4, 's', POSITION_4096, 'deg'),
+        ('present_input_voltage', 144, 2, 'u', 0.1, 'V'),
+        ('present_temperature', 146, 1, 'u', 1, 'degC'),
+    ],
+    'AX_SERIES': [  # protocol 1.0 AX / RX series
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('firmware_version', 2, 1, 'u', 1, ''),
+        ('id', 3, 1, 'u', 1, ''),
+        ('baud_rate', 4, 1, 'u', 1, ''),
+        ('return_delay_time', 5, 1, 'u', 2, 'us'),
+        ('cw_angle_limit', 6, 2, 'u', POSITION_1024, 'deg'),
+        ('ccw_angle_limit', 8, 2, 'u', POSITION_1024, 'deg'),
+        ('temperature_limit', 11, 1, 'u', 1, 'degC'),
+        ('min_voltage_limit', 12, 1, 'u', 0.1, 'V'),
+        ('max_voltage_limit', 13, 1, 'u', 0.1, 'V'),
+        ('max_torque', 14, 2, 'u', 0.1, '%'),
+        ('status_return_level', 16, 1, 'u', 1, ''),
+        ('alarm_led', 17, 1, 'u', 1, ''),
+        ('shutdown', 18, 1, 'u', 1, ''),
+        ('torque_enable', 24, 1, 'u', 1, ''),
+        ('led', 25, 1, 'u', 1, ''),
+        ('cw_compliance_margin', 26, 1, 'u', 1, ''),
+        ('ccw_compliance_margin', 27, 1, 'u', 1, ''),
+        ('cw_compliance_slope', 28, 1, 'u', 1, ''),
+        ('ccw_compliance_slope', 29, 1, 'u', 1, ''),
+        ('goal_position', 30, 2, 'u', POSITION_1024, 'deg'),
+        ('moving_speed', 32, 2, 'm', 0.111, 'rpm'),
+        ('torque_limit', 34, 2, 'u', 0.1, '%'),
+        ('present_position', 36, 2, 'u', POSITION_1024, 'deg'),
+        ('present_speed', 38, 2, 'm', 0.111, 'rpm'),
+        ('present_load', 40, 2, 'm', 0.1, '%'),
+        ('present_voltage', 42, 1, 'u', 0.1, 'V'),
+        ('present_temperature', 43, 1, 'u', 1, 'degC'),
+        ('registered', 44, 1, 'u', 1, ''),
+        ('moving', 46, 1, 'u', 1, ''),
+        ('lock', 47, 1, 'u', 1, ''),
+        ('punch', 48, 2, 'u', 1, ''),
+    ],
+    'MX_SERIES_1': [  # protocol 1.0 MX series
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('firmware_version', 2, 1, 'u', 1, ''),
+        ('id', 3, 1, 'u', 1, ''),
+        ('baud_rate', 4, 1, 'u', 1, ''),
+        ('return_delay_time', 5, 1, 'u', 2, 'us'),
+        ('cw_angle_limit', 6, 2, 'u', POSITION_4096, 'deg'),
+        ('ccw_angle_limit', 8, 2, 'u', POSITION_4096, 'deg'),
+        ('temperature_limit', 11, 1, 'u', 1, 'degC'),
+        ('min_voltage_limit', 12, 1, 'u', 0.1, 'V'),
+        ('max_voltage_limit', 13, 1, 'u', 0.1, 'V'),
+        ('max_torque', 14, 2, 'u', 0.1, '%'),
+        ('status_return_level', 16, 1, 'u', 1, ''),
+        ('alarm_led', 17, 1, 'u', 1, ''),
+        ('shutdown', 18, 1, 'u', 1, ''),
+        ('multi_turn_offset', 20, 2, 's', POSITION_4096, 'deg'),
+        ('resolution_divider', 22, 1, 'u', 1, ''),
+        ('torque_enable', 24, 1, 'u', 1, ''),
+        ('led', 25, 1, 'u', 1, ''),
+        ('d_gain', 26, 1, 'u', 1, ''),
+        ('i_gain', 27, 1, 'u', 1, ''),
+        ('p_gain', 28, 1, 'u', 1, ''),
+        ('goal_position', 30, 2, 'u', POSITION_4096, 'deg'),
+        ('moving_speed', 32, 2, 'm', 0.114, 'rpm'),
+        ('torque_limit', 34, 2, 'u', 0.1, '%'),
+        ('present_position', 36, 2, 'u', POSITION_4096, 'deg'),
+        ('present_speed', 38, 2, 'm', 0.114, 'rpm'),
+        ('present_load', 40, 2, 'm', 0.1, '%'),
+        ('present_voltage', 42, 1, 'u', 0.1, 'V'),
+        ('present_temperature', 43, 1, 'u', 1, 'degC'),
+        ('registered', 44, 1, 'u', 1, ''),
+        ('moving', 46, 1, 'u', 1, ''),
+        ('lock', 47, 1, 'u', 1, ''),
+        ('punch', 48, 2, 'u', 1, ''),
+        ('goal_acceleration', 73, 1, 'u', 8.583, 'deg/s2'),
+    ],
+    'XL320': [
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('firmware_version', 2, 1, 'u', 1, ''),
+        ('id', 3, 1, 'u', 1, ''),
+        ('baud_rate', 4, 1, 'u', 1, ''),
+        ('return_delay_time', 5, 1, 'u', 2, 'us'),
+        ('cw_angle_limit', 6, 2, 'u', POSITION_1024, 'deg'),
+        ('ccw_angle_limit', 8, 2, 'u', POSITION_1024, 'deg'),
+        ('control_mode', 11, 1, 'u', 1, ''),
+        ('temperature_limit', 12, 1, 'u', 1, 'degC'),
+        ('min_voltage_limit', 13, 1, 'u', 0.1, 'V'),
+        ('max_voltage_limit', 14, 1, 'u', 0.1, 'V'),
+        ('max_torque', 15, 2, 'u', 0.1, '%'),
+        ('status_return_level', 17, 1, 'u', 1, ''),
+        ('shutdown', 18, 1, 'u', 1, ''),
+        ('torque_enable', 24, 1, 'u', 1, ''),
+        ('led', 25, 1, 'u', 1, ''),
+        ('d_gain', 27, 1, 'u', 1, ''),
+        ('i_gain', 28, 1, 'u', 1, ''),
+        ('p_gain', 29, 1, 'u', 1, ''),
+        ('goal_position', 30, 2, 'u', POSITION_1024, 'deg'),
+        ('moving_speed', 32, 2, 'm', 0.111, 'rpm'),
+        ('torque_limit', 35, 2, 'u', 0.1, '%'),
+        ('present_position', 37, 2, 'u', POSITION_1024, 'deg'),
+        ('present_speed', 39, 2, 'm', 0.111, 'rpm'),
+        ('present_load', 41, 2, 'm', 0.1, '%'),
+        ('present_voltage', 45, 1, 'u', 0.1, 'V'),
+        ('present_temperature', 46, 1, 'u', 1, 'degC'),
+        ('registered_instruction', 47, 1, 'u', 1, ''),
+        ('moving', 49, 1, 'u', 1, ''),
+        ('hardware_error_status', 50, 1, 'u', 1, ''),
+        ('punch', 51, 2, 'u', 1, ''),
+    ],
+    'PRO_SERIES': [  # H54, H42, M54, M42, L54, L42; position in pulses, the resolution differs per model
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('firmware_version', 6, 1, 'u', 1, ''),
+        ('id', 7, 1, 'u', 1, ''),
+        ('baud_rate', 8, 1, 'u', 1, ''),
+        ('return_delay_time', 9, 1, 'u', 2, 'us'),
+        ('operating_mode', 11, 1, 'u', 1, ''),
+        ('torque_enable', 562, 1, 'u', 1, ''),
+        ('led_red', 563, 1, 'u', 1, ''),
+        ('led_green', 564, 1, 'u', 1, ''),
+        ('led_blue', 565, 1, 'u', 1, ''),
+        ('goal_position', 596, 4, 's', 1, 'pulse'),
+        ('goal_velocity', 600, 4, 's', 1, ''),
+        ('goal_torque', 604, 2, 's', 1, ''),
+        ('goal_acceleration', 606, 4, 's', 1, ''),
+        ('moving', 610, 1, 'u', 1, ''),
+        ('present_position', 611, 4, 's', 1, 'pulse'),
+        ('present_velocity', 615, 4, 's', 1, ''),
+        ('present_current', 621, 2, 's', 1, ''),
+        ('present_input_voltage', 623, 2, 'u', 0.1, 'V'),
+        ('present_temperature', 625, 1, 'u', 1, 'degC'),
+    ],
+    'P_SERIES': [  # PH54, PH42, PM54, PM42, PRO series with (A) firmware update
+        ('model_number', 0, 2, 'u', 1, ''),
+        ('model_information', 2, 4, 'u', 1, ''),
+        ('firmware_version', 6, 1, 'u', 1, ''),
+        ('id', 7, 1, 'u', 1, ''),
+        ('baud_rate', 8, 1, 'u', 1, ''),
+        ('return_delay_time', 9, 1, 'u', 2, 'us'),
+        ('drive_mode', 10, 1, 'u', 1, ''),
+        ('operating_mode', 11, 1, 'u', 1, ''),
+        ('homing_offset', 20, 4, 's', 1, 'pulse'),
+        ('torque_enable', 512, 1, 'u', 1, ''),
+        ('led_red', 513, 1, 'u', 1, ''),
+        ('led_green', 514, 1, 'u', 1, ''),
+        ('led_blue', 515, 1, 'u', 1, ''),
+        ('goal_pwm', 548, 2, 's', 1, ''),
+        ('goal_current', 550, 2, 's', 1, 'mA'),
+        ('goal_velocity', 552, 4, 's', 0.01, 'rpm'),
+        ('profile_acceleration', 556, 4, 'u', 1, 'rev/min2'),
+        ('profile_velocity', 560, 4, 'u', 0.01, 'rpm'),
+        ('goal_position', 564, 4, 's', 1, 'pulse'),
+        ('realtime_tick', 568, 2, 'u', 1, 'ms'),
+        ('moving', 570, 1, 'u', 1, ''),
+        ('moving_status', 571, 1, 'u', 1, ''),
+        ('present_pwm', 572, 2, 's', 1, ''),
+        ('present_current', 574, 2, 's', 1, 'mA'),
+        ('present_velocity', 576, 4, 's', 0.01, 'rpm'),
+        ('present_position', 580, 4, 's', 1, 'pulse'),
+        ('present_input_voltage', 592, 2, 'u', 0.1, 'V'),
+        ('present_temperature', 594, 1, 'u', 1, 'degC'),
+    ],
+}
+
+# {model number: (model name, control table)}
+MODEL_TABLE = {
+    12: ('AX-12A', 'AX_SERIES'),
+    18: ('AX-18A', 'AX_SERIES'),
+    300: ('AX-12W', 'AX_SERIES'),
+    10: ('RX-10', 'AX_SERIES'),
+    24: ('RX-24F', 'AX_SERIES'),
+    28: ('RX-28', 'AX_SERIES'),
+    64: ('RX-64', 'AX_SERIES'),
+    360: ('MX-12W', 'MX_SERIES_1'),
+    29: ('MX-28', 'MX_SERIES_1'),
+    310: ('MX-64', 'MX_SERIES_1'),
+    320: ('MX-106', 'MX_SERIES_1'),
+    350: ('XL-320', 'XL320'),
+    30: ('MX-28(2.0)', 'X_SERIES'),
+    311: ('MX-64(2.0)', 'X_SERIES'),
+    321: ('MX-106(2.0)', 'X_SERIES'),
+    1000: ('XH430-W350', 'X_SERIES'),
+    1010: ('XH430-W210', 'X_SERIES'),
+    1020: ('XM430-W350', 'X_SERIES'),
+    1030: ('XM430-W210', 'X_SERIES'),
+    1040: ('XH430-V350', 'X_SERIES'),
+    1050: ('XH430-V210', 'X_SERIES'),
+    1060: ('XL430-W250', 'X_SERIES'),
+    1070: ('XC430-W150', 'X_SERIES'),
+    1080: ('XC430-W240', 'X_SERIES'),
+    1090: ('2XL430-W250', 'X_SERIES'),
+    1100: ('XH540-W270', 'X_SERIES'),
+    1110: ('XH540-W150', 'X_SERIES'),
+    1120: ('XM540-W270', 'X_SERIES'),
+    1130: ('XM540-W150', 'X_SERIES'),
+    1160: ('2XC430-W250', 'X_SERIES'),
+    1170: ('XW540-T260', 'X_SERIES'),
+    1180: ('XW540-T140', 'X_SERIES'),
+    1190: ('XL330-M077', 'X_SERIES'),
+    1200: ('XL330-M288', 'X_SERIES'),
+    1210: ('XC330-T181', 'X_SERIES'),
+    1220: ('XC330-T288', 'X_SERIES'),
+    1230: ('XC330-M181', 'X_SERIES'),
+    1240: ('XC330-M288', 'X_SERIES'),
+    1270: ('XW430-T333', 'X_SERIES'),
+    1280: ('XW430-T200', 'X_SERIES'),
+    54024: ('H54-200-S500-R', 'PRO_SERIES'),
+    53768: ('H54-100-S500-R', 'PRO_SERIES'),
+    51200: ('H42-20-S300-R', 'PRO_SERIES'),
+    46352: ('M54-60-S250-R', 'PRO_SERIES'),
+    46096: ('M54-40-S250-R', 'PRO_SERIES'),
+    43288: ('M42-10-S260-R', 'PRO_SERIES'),
+    54025: ('H54-200-S500-R(A)', 'P_SERIES'),
+    53769: ('H54-100-S500-R(A)', 'P_SERIES'),
+    51201: ('H42-20-S300-R(A)', 'P_SERIES'),
+    46353: ('M54-60-S250-R(A)', 'P_SERIES'),
+    46097: ('M54-40-S250-R(A)', 'P_SERIES'),
+    43289: ('M42-10-S260-R(A)', 'P_SERIES'),
+    2000: ('PH42-020-S300-R', 'P_SERIES'),
+    2010: ('PH54-100-S500-R', 'P_SERIES'),
+    2020: ('PH54-200-S500-R', 'P_SERIES'),
+    2100: ('PM42-010-S260-R', 'P_SERIES'),
+    2110: ('PM54-040-S250-R', 'P_SERIES'),
+    2120: ('PM54-060-S250-R', 'P_SERIES'),
+}
+
+# models measuring the load instead of the current
+LOAD_FIELDS = [
+    ('current_limit', 38, 0, 'u', 1, ''),  # width 0: not in the control table
+    ('goal_current', 102, 0, 's', 1, ''),
+    ('present_load', 126, 2, 's', 0.1, '%'),
+]
+
+# 1 mA current unit
+CURRENT_1MA_FIELDS = [
+    ('current_limit', 38, 2, 'u', 1, 'mA'),
+    ('goal_current', 102, 2, 's', 1, 'mA'),
+    ('present_current', 126, 2, 's', 1, 'mA'),
+]
+
+CURRENT_3_36MA_FIELDS = [
+    ('current_limit', 38, 2, 'u', 3.36, 'mA'),
+    ('goal_current', 102, 2, 's', 3.36, 'mA'),
+    ('present_current', 126, 2, 's', 3.36, 'mA'),
+]
+
+
+def makePositionFields(pulse_per_half_turn):
+    scale = 180.0 / pulse_per_half_turn
+    return [
+        ('homing_offset', 20, 4, 's', scale, 'deg'),
+        ('goal_position', 564, 4, 's', scale, 'deg'),
+        ('present_position', 580, 4, 's', scale, 'deg'),
+    ]
+
+
+# {model number: fields replacing the field at the same address of the control table}
+MODEL_FIELDS = {
+    30: LOAD_FIELDS,
+    311: CURRENT_3_36MA_FIELDS,
+    321: CURRENT_3_36MA_FIELDS,
+    1060: LOAD_FIELDS,
+    1070: LOAD_FIELDS,
+    1080: LOAD_FIELDS,
+    1090: LOAD_FIELDS,
+    1160: LOAD_FIELDS,
+    1190: CURRENT_1MA_FIELDS,
+    1200: CURRENT_1MA_FIELDS,
+    1210: CURRENT_1MA_FIELDS,
+    1220: CURRENT_1MA_FIELDS,
+    1230: CURRENT_1MA_FIELDS,
+    1240: CURRENT_1MA_FIELDS,
+    2000: makePositionFields(303454),
+    2010: makePositionFields(501923),
+    2020: makePositionFields(501923),
+    2110: makePositionFields(251173),
+    2120: makePositionFields(251173),
+    51201: makePositionFields(303454),
+    53769: makePositionFields(501923),
+    54025: makePositionFields(501923),
+    46097: makePositionFields(251173),
+    46353: makePositionFields(251173),
+}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Vectorised decoding of group read results.
+#
+# The groups keep the received payloads in one contiguous bytearray, one row of
+# row_length bytes per ID, where the first byte of a row is the control table item
+# at base_address. NumPy is imported only when one of the functions below is called.
+#
+# A field map is {name: (address, format)}, format being any NumPy dtype
+# ('i4', 'u2', 'int16', ...). Values are always decoded as little endian.
+
+
+def importNumpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for the array access of the group read results")
+    return numpy
+
+
+def makeFieldDtype(fields, base_address, row_length):
+    np = importNumpy()
+
+    names = []
+    formats = []
+    offsets = []
+    for name in fields:
+        address, fmt = fields[name]
+        dtype = np.dtype(fmt).newbyteorder('<')
+        offset = address - base_address
+        if offset < 0 or offset + dtype.itemsize > row_length:
+            raise ValueError("field '%s' (address %d, %d bytes) is out of the read range" % (
+                name, address, dtype.itemsize))
+
+        names.append(name)
+        formats.append(dtype)
+        offsets.append(offset)
+
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': row_length})
+
+
+def getByteArray(buffer, row_count, row_length):
+    # (row_count, row_length) uint8 view of the buffer, no copy
+    np = importNumpy()
+    return np.frombuffer(buffer, dtype=np.uint8, count=row_count * row_length).reshape(row_count, row_length)
+
+
+def getFieldArrays(buffer, row_count, base_address, row_length, fields):
+    # {name: 1-D array of row_count values} decoded in one pass
+    np = importNumpy()
+
+    records = np.frombuffer(buffer, dtype=makeFieldDtype(fields, base_address, row_length), count=row_count)
+
+    arrays = {}
+    for name in fields:
+        column = records[name]
+        # contiguous copy in native byte order
+        arrays[name] = np.ascontiguousarray(column, dtype=column.dtype.newbyteorder('='))
+    return arrays
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Servo discovery that returns as soon as the answer is known.
+#
+# broadcastPing() always waits for MAX_ID answer slots. discover() waits for the
+# slots up to max_id only, or up to the highest of the expected IDs, and stops
+# reading once the expected IDs have answered. The port is kept until the slot of
+# max_id has passed all the same: later answers would collide with the next
+# instruction and be taken for its status packets. The wait is set by the highest
+# ID that can answer, so there is no early stop on a number of servos or a gap in
+# the IDs: the answers of the remaining slots would have to be waited out anyway.
+# discoverPorts() scans several ports at the same time.
+#
+#   data_list, result = discover(port, ph, max_id=20)
+#   found = discoverPorts(['/dev/ttyUSB0', '/dev/ttyUSB1'], [57600, 1000000])
+
+import sys
+import threading
+
+from .robotis_def import *
+from .port_handler import PortHandler
+from .packet_handler import PacketHandler
+
+PING_STATUS_LENGTH = 14  # protocol 2.0 ping status packet
+PING_SLOT_TIME = 3.0  # [ms] answer delay per ID of a broadcast ping
+
+
+def getPingSlotTime(port):
+    # [ms] time of one ID in the answers of a broadcast ping
+    return PING_SLOT_TIME + PING_STATUS_LENGTH * port.tx_time_per_byte
+
+
+def isDiscoveryDone(data_list, expected_ids):
+    return expected_ids is not None and all(dxl_id in data_list for dxl_id in expected_ids)
+
+
+def drainPort(port, deadline_ns):
+    # discards the answers arriving until deadline_ns and what the status parser holds
+    port.packet_deadline_ns = deadline_ns
+    while not port.isPacketTimeout():
+        port.readPort(PING_STATUS_LENGTH * MAX_ID)
+    port.readPort(port.getBytesAvailable())
+    if port.status_parser is not None:
+        port.status_parser.clear()
+
+
+def discover(port, ph, expected_ids=None, max_id=MAX_ID):
+    # returns ({id: [model number, firmware version]}, result)
+    #   expected_ids  stop reading when these IDs answered, the wait ends after the slot of the highest
+    #   max_id        highest ID that can answer, bounds the wait: the call returns after its slot
+    if expected_ids is not None:
+        max_id = min(max_id, max(expected_ids))
+
+    if ph.getProtocolVersion() == 1.0:
+        return discoverByPing(port, ph, expected_ids, max_id)
+
+    data_list = {}
+
+    result = ph.broadcastPingTx(port)
+    if result != COMM_SUCCESS:
+        return data_list, result
+
+    slot_time = getPingSlotTime(port)
+    port.setPacketTimeoutMillis(slot_time * max_id + PING_STATUS_LENGTH * port.tx_time_per_byte + 16.0)
+    deadline_ns = port.packet_deadline_ns
+
+    rxpacket = bytearray()
+    try:
+        while not isDiscoveryDone(data_list, expected_ids):
+            if port.isPacketTimeout():
+                break
+
+            rxpacket += port.readPort(PING_STATUS_LENGTH - (len(rxpacket) % PING_STATUS_LENGTH))
+
+            # take the complete status packets, getBroadcastPingResult() drops the noise in front of them
+            while len(rxpacket) >= PING_STATUS_LENGTH:
+                idx = rxpacket.find(b'\xFF\xFF\xFD')
+                if idx == -1:
+                    del rxpacket[0: len(rxpacket) - 2]
+                    break
+                if len(rxpacket) - idx < PING_STATUS_LENGTH:
+                    del rxpacket[0: idx]
+                    break
+
+                status_list, _ = ph.getBroadcastPingResult(rxpacket[idx: idx + PING_STATUS_LENGTH])
+                if status_list:
+                    data_list.update(status_list)
+                    del rxpacket[0: idx + PING_STATUS_LENGTH]
+                else:
+                    del rxpacket[0: idx + 3]
+    finally:
+        drainPort(port, deadline_ns)
+        port.is_using = False
+
+    if not data_list:
+        return data_list, COMM_RX_TIMEOUT
+    return data_list, COMM_SUCCESS
+
+
+def discoverByPing(port, ph, expected_ids, max_id):
+    # protocol 1.0 has no broadcast ping: one ping per ID
+    data_list = {}
+
+    id_list = expected_ids if expected_ids is not None else range(0, max_id + 1)
+    for dxl_id in id_list:
+        model_number, result, _ = ph.ping(port, dxl_id)
+        if result != COMM_SUCCESS:
+            continue
+
+        firmware_version, result, _ = ph.read1ByteTxRx(port, dxl_id, 2)  # protocol 1.0 firmware version
+        data_list[dxl_id] = [model_number, firmware_version if result == COMM_SUCCESS else 0]
+
+    if not data_list:
+        return data_list, COMM_RX_TIMEOUT
+    return data_list, COMM_SUCCESS
+
+
+class DiscoveryWorker(threading.Thread):
+    def __init__(self, port, baudrate_list, protocol_version, stop_at_first, kwargs):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.port = port
+        self.baudrate_list = baudrate_list
+        self.ph = PacketHandler(protocol_version)
+        self.stop_at_first = stop_at_first
+        self.kwargs = kwargs
+
+        self.found = {}
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.scan()
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+    def scan(self):
+        is_opened = False
+        if isinstance(self.port, PortHandler):
+            port = self.port
+        else:
+            port = PortHandler(self.port)
+            if not port.openPort():
+                return
+            is_opened = True
+
+        try:
+            for baudrate in self.baudrate_list:
+                if not port.setBaudRate(baudrate):
+                    continue
+
+                data_list, _ = discover(port, self.ph, **self.kwargs)
+                self.found[baudrate] = data_list
+                if data_list and self.stop_at_first:
+                    break
+        finally:
+            if is_opened:
+                port.closePort()
+
+
+def discoverPorts(port_list, baudrate_list, protocol_version=2.0, stop_at_first=True, **kwargs):
+    # scans every port on its own thread, the baud rates of a port one after the other
+    #   port_list  device names (opened and closed here) or opened PortHandler
+    #   stop_at_first  skip the remaining baud rates of a port once servos answered
+    #   kwargs     discover() arguments
+    # returns {device name: {baudrate: {id: [model number, firmware version]}}}
+    workers = [DiscoveryWorker(port, baudrate_list, protocol_version, stop_at_first, kwargs) for port in port_list]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    found = {}
+    for worker in workers:
+        if worker.exc_info is not None:
+            raise worker.exc_info[1]
+
+        name = worker.port.getPortName() if isinstance(worker.port, PortHandler) else worker.port
+        found[name] = worker.found
+    return found
@@ -20,6 +20,7 @@
 # Author: Ryu Woon Jung (Leon)
 
 from .robotis_def import *
+from . import data_array
 
 PARAM_NUM_DATA = 0
 PARAM_NUM_ADDRESS = 1
@@ -34,34 +35,103 @@ class GroupBulkRead:
         self.last_result = False
         self.is_param_changed = False
         self.param = []
-        self.data_dict = {}
+        self.param_list = []  # bulk read parameters of every round, param is the first one
+        self.round_list = []  # IDs of every round
+        self.field_dict = {}  # {id: [(address, length)]} as added
+        self.span_dict = {}  # {id: [[data, address, length]]} read ranges, one per round
+        self.data_dict = {}  # {id: [data, address, length]} range of the first round
+        self.result_dict = {}
+        self.error_dict = {}
+        self.id_list = []
+        self.base_address = 0
+        self.row_length = 0
+        self.data_buffer = bytearray()  # received data of id_list, row_length bytes per ID from base_address
+
+        # fields of an ID are read as one range when the bytes in between cost less than a range of its own,
+        # see getMergeGap(). merge_gap [byte] set to a number replaces the estimate.
+        # A merged range fits the data of one status packet, LENGTH (data + ERROR + CHKSUM / CRC) is at
+        # most RXPACKET_MAX_LEN: one byte in protocol 1.0.
+        self.merge_gap = None
+        self.return_delay_time = 0.5  # [ms] of the servos, factory setting of the X series
+        if ph.getProtocolVersion() == 1.0:
+            self.round_length = 6 + 3 + 7
+            self.max_span_length = 250 - 2
+        else:
+            self.round_length = 11 + 5 + 10
+            self.max_span_length = 1024 - 4
 
         self.clearParam()
 
+    def getMergeGap(self):
+        # [byte] a range of its own costs a round: its status packet, its bulk read parameter and the bulk
+        # read instruction (round_length), and the turnaround of the round, USB latency timer and return
+        # delay time, in bytes on the wire at the baud rate of the port
+        if self.merge_gap is not None:
+            return self.merge_gap
+        if self.port.tx_time_per_byte <= 0:
+            return self.max_span_length
+        turnaround = self.port.latency_timer + self.return_delay_time
+        return self.round_length + int(turnaround / self.port.tx_time_per_byte)
+
+    def makeSpans(self, dxl_id):
+        merge_gap = self.getMergeGap()
+        spans = []
+        for address, length in sorted(self.field_dict[dxl_id]):
+            if spans:
+                span_end = max(spans[-1][PARAM_NUM_ADDRESS] + spans[-1][PARAM_NUM_LENGTH], address + length)
+                if address - (spans[-1][PARAM_NUM_ADDRESS] + spans[-1][PARAM_NUM_LENGTH]) <= merge_gap and \
+                        span_end - spans[-1][PARAM_NUM_ADDRESS] <= self.max_span_length:
+                    spans[-1][PARAM_NUM_LENGTH] = span_end - spans[-1][PARAM_NUM_ADDRESS]
+                    continue
+            spans.append([[], address, length])
+
+        self.span_dict[dxl_id] = spans
+        self.data_dict[dxl_id] = spans[0]
+
     def makeParam(self):
         if not self.data_dict:
             return
 
-        self.param = []
-
-        for dxl_id in self.data_dict:
-            if self.ph.getProtocolVersion() == 1.0:
-                self.param.append(self.data_dict[dxl_id][2])  # LEN
-                self.param.append(dxl_id)  # ID
-                self.param.append(self.data_dict[dxl_id][1])  # ADDR
-            else:
-                self.param.append(dxl_id)  # ID
-                self.param.append(DXL_LOBYTE(self.data_dict[dxl_id][1]))  # ADDR_L
-                self.param.append(DXL_HIBYTE(self.data_dict[dxl_id][1]))  # ADDR_H
-                self.param.append(DXL_LOBYTE(self.data_dict[dxl_id][2]))  # LEN_L
-                self.param.append(DXL_HIBYTE(self.data_dict[dxl_id][2]))  # LEN_H
+        # a bulk read takes one range per ID, further ranges of an ID go into the next rounds
+        self.round_list = []
+        for dxl_id in self.span_dict:
+            for n in range(len(self.span_dict[dxl_id])):
+                if n == len(self.round_list):
+                    self.round_list.append([])
+                self.round_list[n].append(dxl_id)
+
+        self.param_list = []
+        for n, round_id_list in enumerate(self.round_list):
+            param = bytearray()
+            for dxl_id in round_id_list:
+                span = self.span_dict[dxl_id][n]
+                if self.ph.getProtocolVersion() == 1.0:
+                    param.append(span[PARAM_NUM_LENGTH])  # LEN
+                    param.append(dxl_id)  # ID
+                    param.append(span[PARAM_NUM_ADDRESS])  # ADDR
+                else:
+                    param.append(dxl_id)  # ID
+                    param.append(DXL_LOBYTE(span[PARAM_NUM_ADDRESS]))  # ADDR_L
+                    param.append(DXL_HIBYTE(span[PARAM_NUM_ADDRESS]))  # ADDR_H
+                    param.append(DXL_LOBYTE(span[PARAM_NUM_LENGTH]))  # LEN_L
+                    param.append(DXL_HIBYTE(span[PARAM_NUM_LENGTH]))  # LEN_H
+            self.param_list.append(param)
+
+        self.param = self.param_list[0]
+        self.is_param_changed = False
 
     def addParam(self, dxl_id, start_address, data_length):
-        if dxl_id in self.data_dict:  # dxl_id already exist
+        # an ID can take several fields, they are merged into as few ranges as pays off
+        fields = self.field_dict.setdefault(dxl_id, [])
+        if (start_address, data_length) in fields:  # field already exist
             return False
 
-        data = []  # [0] * data_length
-        self.data_dict[dxl_id] = [data, start_address, data_length]
+        fields.append((start_address, data_length))
+        self.makeSpans(dxl_id)
+        # the ranges of the ID are new: its last data no longer fits them
+        self.result_dict.pop(dxl_id, None)
+        self.error_dict.pop(dxl_id, None)
+        self.data_buffer = None
 
         self.is_param_changed = True
         return True
@@ -71,13 +141,28 @@ class GroupBulkRead:
             return
 
         del self.data_dict[dxl_id]
+        del self.span_dict[dxl_id]
+        del self.field_dict[dxl_id]
+        self.result_dict.pop(dxl_id, None)
+        self.error_dict.pop(dxl_id, None)
+        self.data_buffer = None
 
         self.is_param_changed = True
 
     def clearParam(self):
         self.data_dict.clear()
+        self.span_dict.clear()
+        self.field_dict.clear()
+        self.result_dict.clear()
+        self.error_dict.clear()
+        self.data_buffer = None
+        self.param = []
         return
 
+    def getSpanList(self, dxl_id):
+        # [(address, length)] ranges read from an ID
+        return [(span[PARAM_NUM_ADDRESS], span[PARAM_NUM_LENGTH]) for span in self.span_dict.get(dxl_id, [])]
+
     def txPacket(self):
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
@@ -85,30 +170,85 @@ class GroupBulkRead:
         if self.is_param_changed is True or not self.param:
             self.makeParam()
 
+        return self.roundTxPacket(0)
+
+    def roundTxPacket(self, n):
         if self.ph.getProtocolVersion() == 1.0:
-            return self.ph.bulkReadTx(self.port, self.param, len(self.data_dict.keys()) * 3)
+            return self.ph.bulkReadTx(self.port, self.param_list[n], len(self.round_list[n]) * 3)
         else:
-            return self.ph.bulkReadTx(self.port, self.param, len(self.data_dict.keys()) * 5)
+            return self.ph.bulkReadTx(self.port, self.param_list[n], len(self.round_list[n]) * 5)
+
+    def roundRxPacket(self, n):
+        result = COMM_RX_FAIL
+
+        for dxl_id in self.round_list[n]:
+            span = self.span_dict[dxl_id][n]
+            span[PARAM_NUM_DATA], result, error = self.ph.readRxBuffer(self.port, dxl_id, span[PARAM_NUM_LENGTH])
+            self.result_dict[dxl_id] = result
+            self.error_dict[dxl_id] = error
+            if result != COMM_SUCCESS:
+                return result
+
+        return result
 
     def rxPacket(self):
         self.last_result = False
+        self.result_dict.clear()
+        self.error_dict.clear()
+        self.data_buffer = None
 
         result = COMM_RX_FAIL
 
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        for dxl_id in self.data_dict:
-            self.data_dict[dxl_id][PARAM_NUM_DATA], result, _ = self.ph.readRx(self.port, dxl_id,
-                                                                               self.data_dict[dxl_id][PARAM_NUM_LENGTH])
+        # every readRxBuffer() ends a transaction, keep the port until all status packets are in
+        self.port.lockPort()
+        try:
+            result = self.roundRxPacket(0)
+            for n in range(1, len(self.round_list)):
+                if result != COMM_SUCCESS:
+                    return result
+                result = self.roundTxPacket(n)
+                if result != COMM_SUCCESS:
+                    return result
+                result = self.roundRxPacket(n)
             if result != COMM_SUCCESS:
                 return result
+        finally:
+            self.port.unlockPort()
 
         if result == COMM_SUCCESS:
             self.last_result = True
 
         return result
 
+    def makeDataBuffer(self):
+        # rows share one address range so that a field sits at the same offset for every ID
+        # made on the first array access after rxPacket(), rows of failed IDs are zero
+        if self.data_buffer is not None:
+            return
+
+        self.id_list = [dxl_id for dxl_id in self.data_dict if dxl_id in self.span_dict]
+        if not self.id_list:
+            self.base_address = 0
+            self.row_length = 0
+            self.data_buffer = bytearray()
+            return
+
+        self.base_address = min(self.span_dict[dxl_id][0][PARAM_NUM_ADDRESS] for dxl_id in self.id_list)
+        self.row_length = max(self.span_dict[dxl_id][-1][PARAM_NUM_ADDRESS] +
+                              self.span_dict[dxl_id][-1][PARAM_NUM_LENGTH] for dxl_id in self.id_list) - self.base_address
+
+        self.data_buffer = bytearray(len(self.id_list) * self.row_length)
+        for row, dxl_id in enumerate(self.id_list):
+            if self.getResult(dxl_id) != COMM_SUCCESS:
+                continue
+            for span in self.span_dict[dxl_id]:
+                data = span[PARAM_NUM_DATA][0: span[PARAM_NUM_LENGTH]]
+                offset = row * self.row_length + span[PARAM_NUM_ADDRESS] - self.base_address
+                self.data_buffer[offset: offset + len(data)] = data
+
     def txRxPacket(self):
         result = self.txPacket()
         if result != COMM_SUCCESS:
@@ -116,13 +256,26 @@ class GroupBulkRead:
 
         return self.rxPacket()
 
+    def getResult(self, dxl_id):
+        # IDs after the first failed status packet are not read and stay COMM_NOT_AVAILABLE
+        return self.result_dict.get(dxl_id, COMM_NOT_AVAILABLE)
+
+    def getError(self, dxl_id):
+        return self.error_dict.get(dxl_id, 0)
+
+    def getSpan(self, dxl_id, address, data_length):
+        # read range of the ID holding [address, address + data_length)
+        for span in self.span_dict.get(dxl_id, []):
+            if span[PARAM_NUM_ADDRESS] <= address and \
+                    address + data_length <= span[PARAM_NUM_ADDRESS] + span[PARAM_NUM_LENGTH]:
+                return span
+        return None
+
     def isAvailable(self, dxl_id, address, data_length):
-        if self.last_result is False or dxl_id not in self.data_dict:
+        if self.last_result is False or self.getResult(dxl_id) != COMM_SUCCESS:
             return False
 
-        start_addr = self.data_dict[dxl_id][PARAM_NUM_ADDRESS]
-
-        if (address < start_addr) or (start_addr + self.data_dict[dxl_id][PARAM_NUM_LENGTH] - data_length < address):
+        if self.getSpan(dxl_id, address, data_length) is None:
             return False
 
         return True
@@ -131,17 +284,32 @@ class GroupBulkRead:
         if not self.isAvailable(dxl_id, address, data_length):
             return 0
 
-        start_addr = self.data_dict[dxl_id][PARAM_NUM_ADDRESS]
+        span = self.getSpan(dxl_id, address, data_length)
+        data = span[PARAM_NUM_DATA]
+        offset = address - span[PARAM_NUM_ADDRESS]
 
         if data_length == 1:
-            return self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr]
+            return data[offset]
         elif data_length == 2:
-            return DXL_MAKEWORD(self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr],
-                                self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr + 1])
+            return DXL_MAKEWORD(data[offset], data[offset + 1])
         elif data_length == 4:
-            return DXL_MAKEDWORD(DXL_MAKEWORD(self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr + 0],
-                                              self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr + 1]),
-                                 DXL_MAKEWORD(self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr + 2],
-                                              self.data_dict[dxl_id][PARAM_NUM_DATA][address - start_addr + 3]))
+            return DXL_MAKEDWORD(DXL_MAKEWORD(data[offset + 0], data[offset + 1]),
+                                 DXL_MAKEWORD(data[offset + 2], data[offset + 3]))
         else:
             return 0
+
+    def getIdList(self):
+        # row order of getByteArray() / getFieldArrays()
+        self.makeDataBuffer()
+        return self.id_list
+
+    def getByteArray(self):
+        # (number of IDs, row_length) uint8 array starting at base_address, bytes not read by an ID are zero
+        self.makeDataBuffer()
+        return data_array.getByteArray(self.data_buffer, len(self.id_list), self.row_length)
+
+    def getFieldArrays(self, fields):
+        # fields: {name: (address, format)}, e.g. {'position': (132, 'i4'), 'current': (126, 'i2')}
+        self.makeDataBuffer()
+        return data_array.getFieldArrays(self.data_buffer, len(self.id_list), self.base_address, self.row_length,
+                                         fields)
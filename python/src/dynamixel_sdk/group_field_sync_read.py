@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import struct
+
+from .robotis_def import *
+from .group_sync_read import GroupSyncRead
+from .group_field_sync_write import FIELD_FORMAT
+
+
+class GroupFieldSyncRead(GroupSyncRead):
+    # GroupSyncRead with a typed field layout.
+    #
+    # fields is a list of (name, offset, width, signed) where offset is counted from
+    # start_address, e.g. for an X series present current + velocity + position read at 126:
+    #   [('present_current', 0, 2, True), ('present_velocity', 2, 4, True), ('present_position', 6, 4, True)]
+    # The read range ends with the last field, bytes between fields are read and ignored.
+
+    def __init__(self, port, ph, start_address, fields):
+        self.field_dict = {}  # {name: (offset, struct)}
+        self.field_names = []
+        data_length = 0
+        for name, offset, width, signed in sorted(fields, key=lambda field: field[1]):
+            if (width, bool(signed)) not in FIELD_FORMAT:
+                raise ValueError("field '%s' has an unsupported width %d" % (name, width))
+
+            self.field_dict[name] = (offset, struct.Struct('<' + FIELD_FORMAT[(width, bool(signed))]))
+            self.field_names.append(name)
+            data_length = max(data_length, offset + width)
+
+        self.fields = list(fields)
+
+        GroupSyncRead.__init__(self, port, ph, start_address, data_length)
+
+    def getField(self, dxl_id, name):
+        # value of a field, 0 when the ID was not read
+        if self.getResult(dxl_id) != COMM_SUCCESS:
+            return 0
+
+        offset, field_struct = self.field_dict[name]
+        return field_struct.unpack_from(self.data_dict[dxl_id], offset)[0]
+
+    def getFields(self, dxl_id):
+        # {name: value} of an ID, None when the ID was not read
+        if self.getResult(dxl_id) != COMM_SUCCESS:
+            return None
+
+        data = self.data_dict[dxl_id]
+        values = {}
+        for name in self.field_names:
+            offset, field_struct = self.field_dict[name]
+            values[name] = field_struct.unpack_from(data, offset)[0]
+        return values
+
+    def getFieldArrays(self, fields=None):
+        # the own fields when no field map is given
+        if fields is None:
+            fields = {}
+            for name, offset, width, signed in self.fields:
+                fields[name] = (self.start_address + offset, ('i%d' if signed else 'u%d') % width)
+        return GroupSyncRead.getFieldArrays(self, fields)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import struct
+
+from .robotis_def import *
+from .group_sync_write import GroupSyncWrite
+
+FIELD_FORMAT = {
+    (1, False): 'B', (1, True): 'b',
+    (2, False): 'H', (2, True): 'h',
+    (4, False): 'I', (4, True): 'i',
+}
+
+
+class GroupFieldSyncWrite(GroupSyncWrite):
+    # GroupSyncWrite with a typed field layout.
+    #
+    # fields is a list of (name, offset, width, signed) where offset is counted from
+    # start_address. The fields must cover the written range without gaps, e.g. for
+    # an X series profile velocity + goal position write at 112:
+    #   [('profile_velocity', 0, 4, False), ('goal_position', 4, 4, True)]
+    #
+    # Values are given as {name: value} or as a sequence in offset order and are
+    # encoded with struct straight into the preencoded packet.
+
+    def __init__(self, port, ph, start_address, fields):
+        self.field_names = []
+        row_format = ''
+        data_length = 0
+        for name, offset, width, signed in sorted(fields, key=lambda field: field[1]):
+            if offset != data_length:
+                raise ValueError("field '%s' at offset %d leaves a gap or overlaps" % (name, offset))
+            if (width, bool(signed)) not in FIELD_FORMAT:
+                raise ValueError("field '%s' has an unsupported width %d" % (name, width))
+
+            self.field_names.append(name)
+            row_format += FIELD_FORMAT[(width, bool(signed))]
+            data_length += width
+
+        self.row_format = row_format
+        self.row_struct = struct.Struct('<' + row_format)
+        self.packet_struct = None
+        self.id_list = []
+
+        GroupSyncWrite.__init__(self, port, ph, start_address, data_length)
+
+    def encode(self, values):
+        if isinstance(values, dict):
+            values = [values[name] for name in self.field_names]
+        return self.row_struct.pack(*values)
+
+    def storePacketData(self):
+        # copy the values written into the packet back before it is rebuilt
+        if self.is_param_changed is True or not self.txpacket:
+            return
+
+        for dxl_id in self.slot_dict:
+            if dxl_id in self.data_dict:
+                slot = self.slot_dict[dxl_id]
+                self.data_dict[dxl_id] = bytes(self.txpacket[slot: slot + self.data_length])
+
+    def makePacket(self):
+        GroupSyncWrite.makePacket(self)
+
+        # ID + fields for every ID, written by setValues() / setArrays() in one pack_into()
+        self.id_list = list(self.data_dict)
+        self.packet_struct = struct.Struct('<' + ('B' + self.row_format) * len(self.id_list))
+
+    def addParam(self, dxl_id, values):
+        self.storePacketData()
+        return GroupSyncWrite.addParam(self, dxl_id, self.encode(values))
+
+    def removeParam(self, dxl_id):
+        self.storePacketData()
+        GroupSyncWrite.removeParam(self, dxl_id)
+
+    def changeParam(self, dxl_id, values):
+        return GroupSyncWrite.changeParam(self, dxl_id, self.encode(values))
+
+    def getIdList(self):
+        # ID order of setArrays()
+        if self.is_param_changed is True or not self.txpacket:
+            self.makePacket()
+        return self.id_list
+
+    def setValues(self, values_dict):
+        # values_dict: {dxl_id: {name: value} or sequence}
+        if not values_dict:
+            return True
+
+        for dxl_id in values_dict:
+            if dxl_id not in self.data_dict:  # NOT exist
+                return False
+
+        if self.is_param_changed is True or not self.txpacket:
+            self.makePacket()
+
+        if len(values_dict) == len(self.id_list):
+            flat = []
+            for dxl_id in self.id_list:
+                values = values_dict[dxl_id]
+                if isinstance(values, dict):
+                    values = [values[name] for name in self.field_names]
+                flat.append(dxl_id)
+                flat.extend(values)
+            self.packet_struct.pack_into(self.txpacket, self.slot_dict[self.id_list[0]] - 1, *flat)
+        else:
+            for dxl_id in values_dict:
+                values = values_dict[dxl_id]
+                if isinstance(values, dict):
+                    values = [values[name] for name in self.field_names]
+                self.row_struct.pack_into(self.txpacket, self.slot_dict[dxl_id], *values)
+
+        return True
+
+    def setArrays(self, arrays):
+        # arrays: {name: sequence / 1-D array of values in getIdList() order}, every field is required
+        id_list = self.getIdList()
+        if not id_list:
+            return False
+
+        columns = [id_list]
+        for name in self.field_names:
+            column = arrays[name]
+            if hasattr(column, 'tolist'):
+                column = column.tolist()
+            if len(column) != len(id_list):
+                return False
+            columns.append(column)
+
+        flat = [value for row in zip(*columns) for value in row]
+        self.packet_struct.pack_into(self.txpacket, self.slot_dict[id_list[0]] - 1, *flat)
+        return True
@@ -20,6 +20,7 @@
 # Author: Ryu Woon Jung (Leon)
 
 from .robotis_def import *
+from . import data_array
 
 
 class GroupSyncRead:
@@ -33,6 +34,10 @@ class GroupSyncRead:
         self.is_param_changed = False
         self.param = []
         self.data_dict = {}
+        self.result_dict = {}
+        self.error_dict = {}
+        self.id_list = []
+        self.data_buffer = bytearray()  # received data of id_list, data_length bytes per ID
 
         self.clearParam()
 
@@ -43,7 +48,7 @@ class GroupSyncRead:
         if not self.data_dict:  # len(self.data_dict.keys()) == 0:
             return
 
-        self.param = []
+        self.param = bytearray()
 
         for dxl_id in self.data_dict:
             self.param.append(dxl_id)
@@ -56,6 +61,7 @@ class GroupSyncRead:
             return False
 
         self.data_dict[dxl_id] = []  # [0] * self.data_length
+        self.data_buffer = None
 
         self.is_param_changed = True
         return True
@@ -68,6 +74,9 @@ class GroupSyncRead:
             return
 
         del self.data_dict[dxl_id]
+        self.result_dict.pop(dxl_id, None)
+        self.error_dict.pop(dxl_id, None)
+        self.data_buffer = None
 
         self.is_param_changed = True
 
@@ -76,6 +85,9 @@ class GroupSyncRead:
             return
 
         self.data_dict.clear()
+        self.result_dict.clear()
+        self.error_dict.clear()
+        self.data_buffer = None
 
     def txPacket(self):
         if self.ph.getProtocolVersion() == 1.0 or len(self.data_dict.keys()) == 0:
@@ -89,6 +101,7 @@ class GroupSyncRead:
 
     def rxPacket(self):
         self.last_result = False
+        self.result_dict.clear()
 
         if self.ph.getProtocolVersion() == 1.0:
             return COMM_NOT_AVAILABLE
@@ -98,15 +111,34 @@ class GroupSyncRead:
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        for dxl_id in self.data_dict:
-            self.data_dict[dxl_id], result, _ = self.ph.readRx(self.port, dxl_id, self.data_length)
-            if result != COMM_SUCCESS:
-                return result
+        status_dict, result = self.ph.syncReadRx(self.port, self.data_length, list(self.data_dict))
+        self.setStatus(status_dict, result)
+
+        return result
+
+    def setStatus(self, status_dict, result):
+        # stores the {id: [data, result, error]} of a received sync read
+        for dxl_id in status_dict:
+            self.data_dict[dxl_id], self.result_dict[dxl_id], self.error_dict[dxl_id] = status_dict[dxl_id]
+
+        # the array accessors make the rows when they are first called, see makeDataBuffer()
+        self.data_buffer = None
 
         if result == COMM_SUCCESS:
             self.last_result = True
 
-        return result
+    def makeDataBuffer(self):
+        # rows of the last received data in data_dict order, rows of failed IDs are zero
+        if self.data_buffer is not None:
+            return
+
+        self.id_list = list(self.data_dict)
+        self.data_buffer = bytearray(len(self.id_list) * self.data_length)
+        for row, dxl_id in enumerate(self.id_list):
+            if self.result_dict.get(dxl_id) == COMM_SUCCESS:
+                data = self.data_dict[dxl_id][0: self.data_length]
+                offset = row * self.data_length
+                self.data_buffer[offset: offset + len(data)] = data
 
     def txRxPacket(self):
         if self.ph.getProtocolVersion() == 1.0:
@@ -118,8 +150,18 @@ class GroupSyncRead:
 
         return self.rxPacket()
 
+    def getResult(self, dxl_id):
+        return self.result_dict.get(dxl_id, COMM_NOT_AVAILABLE)
+
+    def getError(self, dxl_id):
+        return self.error_dict.get(dxl_id, 0)
+
+    def getFailedIds(self):
+        # IDs whose status packet timed out or was corrupt in the last rxPacket()
+        return [dxl_id for dxl_id in self.data_dict if self.getResult(dxl_id) != COMM_SUCCESS]
+
     def isAvailable(self, dxl_id, address, data_length):
-        if self.ph.getProtocolVersion() == 1.0 or self.last_result is False or dxl_id not in self.data_dict:
+        if self.ph.getProtocolVersion() == 1.0 or self.getResult(dxl_id) != COMM_SUCCESS:
             return False
 
         if (address < self.start_address) or (self.start_address + self.data_length - data_length < address):
@@ -143,3 +185,24 @@ class GroupSyncRead:
                                               self.data_dict[dxl_id][address - self.start_address + 3]))
         else:
             return 0
+
+    def getIdList(self):
+        # row order of getByteArray() / getFieldArrays()
+        self.makeDataBuffer()
+        return self.id_list
+
+    def getByteArray(self):
+        # (number of IDs, data_length) uint8 array, rows of failed IDs are zero
+        self.makeDataBuffer()
+        return data_array.getByteArray(self.data_buffer, len(self.id_list), self.data_length)
+
+    def getFieldArrays(self, fields):
+        # fields: {name: (address, format)}, e.g. {'position': (132, 'i4'), 'current': (126, 'i2')}
+        self.makeDataBuffer()
+        return data_array.getFieldArrays(self.data_buffer, len(self.id_list), self.start_address, self.data_length,
+                                         fields)
+
+    def getAvailableMask(self):
+        self.makeDataBuffer()
+        np = data_array.importNumpy()
+        return np.array([self.getResult(dxl_id) == COMM_SUCCESS for dxl_id in self.id_list], dtype=bool)
@@ -19,6 +19,8 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import struct
+
 from .robotis_def import *
 
 
@@ -33,13 +35,23 @@ class GroupSyncWrite:
         self.param = []
         self.data_dict = {}
 
+        # the sync write packet is laid out once, changeParam() / setValue() write into the slot of the ID
+        self.txpacket = bytearray()
+        self.slot_dict = {}
+
+        if data_length in (1, 2, 4):
+            self.value_struct = struct.Struct({1: '<B', 2: '<H', 4: '<I'}[data_length])
+        else:
+            self.value_struct = None
+        self.value_mask = (1 << (8 * data_length)) - 1
+
         self.clearParam()
 
     def makeParam(self):
         if not self.data_dict:
             return
 
-        self.param = []
+        self.param = bytearray()
 
         for dxl_id in self.data_dict:
             if not self.data_dict[dxl_id]:
@@ -48,6 +60,20 @@ class GroupSyncWrite:
             self.param.append(dxl_id)
             self.param.extend(self.data_dict[dxl_id])
 
+    def makePacket(self):
+        self.makeParam()
+
+        param_length = len(self.data_dict.keys()) * (1 + self.data_length)
+        self.txpacket, param_index = self.ph.makeSyncWritePacket(self.start_address, self.data_length, self.param,
+                                                                 param_length)
+
+        self.slot_dict = {}
+        for dxl_id in self.data_dict:
+            self.slot_dict[dxl_id] = param_index + 1  # skip ID
+            param_index += 1 + self.data_length
+
+        self.is_param_changed = False
+
     def addParam(self, dxl_id, data):
         if dxl_id in self.data_dict:  # dxl_id already exist
             return False
@@ -77,18 +103,43 @@ class GroupSyncWrite:
 
         self.data_dict[dxl_id] = data
 
-        self.is_param_changed = True
+        if self.is_param_changed is True or not self.txpacket:
+            self.is_param_changed = True
+        else:
+            slot = self.slot_dict[dxl_id]
+            self.txpacket[slot: slot + len(data)] = bytearray(data)
+        return True
+
+    def setValue(self, dxl_id, value):
+        # writes value as data_length little endian bytes
+        if dxl_id not in self.data_dict:  # NOT exist
+            return False
+
+        value &= self.value_mask
+        if self.value_struct is not None:
+            data = self.value_struct.pack(value)
+        else:
+            data = bytearray((value >> (8 * i)) & 0xFF for i in range(self.data_length))
+
+        self.data_dict[dxl_id] = data
+
+        if self.is_param_changed is True or not self.txpacket:
+            self.is_param_changed = True
+        else:
+            slot = self.slot_dict[dxl_id]
+            self.txpacket[slot: slot + self.data_length] = data
         return True
 
     def clearParam(self):
         self.data_dict.clear()
+        self.txpacket = bytearray()
+        self.slot_dict = {}
 
     def txPacket(self):
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        if self.is_param_changed is True or not self.param:
-            self.makeParam()
+        if self.is_param_changed is True or not self.txpacket:
+            self.makePacket()
 
-        return self.ph.syncWriteTxOnly(self.port, self.start_address, self.data_length, self.param,
-                                       len(self.data_dict.keys()) * (1 + self.data_length))
+        return self.ph.syncWritePacketTxOnly(self.port, self.txpacket)
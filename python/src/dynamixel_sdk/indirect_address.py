@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+from .group_field_sync_read import GroupFieldSyncRead
+from .group_field_sync_write import GroupFieldSyncWrite
+
+# [(indirect address 1, indirect data 1, number of indirect addresses)] of every indirect block
+INDIRECT_LAYOUT = {
+    'X_SERIES': [(168, 224, 28), (578, 634, 28)],
+    'MX_SERIES': [(168, 224, 28), (578, 634, 28)],  # MX series with 2.0 firmware update
+    'PRO_SERIES': [(49, 634, 256)],
+    'PRO_A_SERIES': [(168, 634, 128)],
+    'P_SERIES': [(168, 634, 128)],
+}
+
+
+class IndirectAddressMap(object):
+    # Packs scattered control table fields into the indirect data area.
+    #
+    # Write fields take the first indirect addresses of the block and read fields
+    # the ones right after, so that each side is one contiguous range for a single
+    # sync transaction, e.g. for tests/protocol2_0/indirect_address.py:
+    #
+    #   indirect = IndirectAddressMap(port, ph, 'X_SERIES')
+    #   indirect.addWriteField('goal_position', 116, 4, True)
+    #   indirect.addWriteField('led_red', 65, 1)
+    #   indirect.addReadField('present_position', 132, 4, True)
+    #   indirect.addReadField('moving', 122, 1)
+    #   indirect.program([DXL1_ID, DXL2_ID])  # torque must be off, returns the failed IDs
+    #   group_sync_write = indirect.makeGroupSyncWrite()
+    #   group_sync_read = indirect.makeGroupSyncRead()
+    #
+    # The indirect addresses are in the EEPROM area: program() reads them back first
+    # and writes only the servos whose table differs.
+    def __init__(self, port, ph, model='X_SERIES', block=0):
+        if ph.getProtocolVersion() == 1.0:
+            raise ValueError("indirect addresses need protocol 2.0")
+        if model not in INDIRECT_LAYOUT or block >= len(INDIRECT_LAYOUT[model]):
+            raise ValueError("no indirect block %d for model '%s'" % (block, model))
+
+        self.port = port
+        self.ph = ph
+        self.address_start, self.data_start, self.capacity = INDIRECT_LAYOUT[model][block]
+
+        self.write_fields = []  # [(name, address, width, signed)]
+        self.read_fields = []
+
+    def getWriteLength(self):
+        return sum(field[2] for field in self.write_fields)
+
+    def getReadLength(self):
+        return sum(field[2] for field in self.read_fields)
+
+    def addField(self, fields, name, address, width, signed):
+        for field in self.write_fields + self.read_fields:
+            if field[0] == name:  # name already exist
+                return False
+
+        if self.getWriteLength() + self.getReadLength() + width > self.capacity:  # indirect block is full
+            return False
+
+        fields.append((name, address, width, signed))
+        return True
+
+    def addWriteField(self, name, address, width, signed=False):
+        return self.addField(self.write_fields, name, address, width, signed)
+
+    def addReadField(self, name, address, width, signed=False):
+        return self.addField(self.read_fields, name, address, width, signed)
+
+    def getWriteDataAddress(self):
+        return self.data_start
+
+    def getReadDataAddress(self):
+        return self.data_start + self.getWriteLength()
+
+    def makeTable(self):
+        # indirect address values: one entry per byte, write fields first
+        table = bytearray()
+        for _, address, width, _ in self.write_fields + self.read_fields:
+            for i in range(width):
+                table.append(DXL_LOBYTE(address + i))
+                table.append(DXL_HIBYTE(address + i))
+        return table
+
+    def programServo(self, dxl_id):
+        table = self.makeTable()
+        if not table:
+            return COMM_NOT_AVAILABLE, 0
+
+        data, result, error = self.ph.readTxRxBuffer(self.port, dxl_id, self.address_start, len(table))
+        if result == COMM_SUCCESS and error == 0 and data == table:
+            return COMM_SUCCESS, 0
+
+        # the whole table in one write instead of one write per indirect address
+        return self.ph.writeTxRx(self.port, dxl_id, self.address_start, len(table), list(table))
+
+    def program(self, id_list):
+        # returns the IDs that could not be programmed
+        failed_ids = []
+        for dxl_id in id_list:
+            result, error = self.programServo(dxl_id)
+            if result != COMM_SUCCESS or error != 0:
+                failed_ids.append(dxl_id)
+        return failed_ids
+
+    def makeFields(self, fields):
+        group_fields = []
+        offset = 0
+        for name, _, width, signed in fields:
+            group_fields.append((name, offset, width, signed))
+            offset += width
+        return group_fields
+
+    def makeGroupSyncWrite(self):
+        # GroupFieldSyncWrite over the indirect data of the write fields
+        return GroupFieldSyncWrite(self.port, self.ph, self.getWriteDataAddress(), self.makeFields(self.write_fields))
+
+    def makeGroupSyncRead(self):
+        # GroupFieldSyncRead over the indirect data of the read fields
+        return GroupFieldSyncRead(self.port, self.ph, self.getReadDataAddress(), self.makeFields(self.read_fields))
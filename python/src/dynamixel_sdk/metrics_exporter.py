@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Prometheus exporter of the TransactionMonitor of ports, standard library only.
+#
+# The text is made from the counters of the monitors when scraped, the packet
+# handlers only update the monitors. Rates are left to the server, e.g. the bus
+# utilisation of a port is rate(dynamixel_bus_busy_seconds_total[1m]).
+#
+#   from dynamixel_sdk.metrics_exporter import MetricsExporter, MetricsServer
+#
+#   exporter = MetricsExporter()
+#   exporter.addPort(port, PROTOCOL_VERSION)     # sets a TransactionMonitor on the port
+#   server = MetricsServer(exporter)             # http://127.0.0.1:9327/metrics
+#   server.start()
+#
+# The server listens on the loopback interface unless another host is given.
+
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from .robotis_def import *
+from .transaction_monitor import TransactionMonitor, INSTRUCTION_NAMES, BUCKET_COUNT, getBucketValue
+from . import protocol1_packet_handler as protocol1
+from . import protocol2_packet_handler as protocol2
+
+DEFAULT_METRICS_PORT = 9327
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# upper bounds [us] of the exported latency buckets, powers of two fall on the monitor buckets
+LATENCY_BUCKETS = [1 << n for n in range(5, 21)]
+
+RESULT_NAMES = {
+    COMM_SUCCESS: 'success',
+    COMM_PORT_BUSY: 'port_busy',
+    COMM_TX_FAIL: 'tx_fail',
+    COMM_RX_FAIL: 'rx_fail',
+    COMM_TX_ERROR: 'tx_error',
+    COMM_RX_WAITING: 'rx_waiting',
+    COMM_RX_TIMEOUT: 'rx_timeout',
+    COMM_RX_CORRUPT: 'rx_corrupt',
+    COMM_NOT_AVAILABLE: 'not_available',
+}
+
+PROTOCOL1_ERROR_BITS = [
+    (protocol1.ERRBIT_VOLTAGE, 'voltage'),
+    (protocol1.ERRBIT_ANGLE, 'angle_limit'),
+    (protocol1.ERRBIT_OVERHEAT, 'overheat'),
+    (protocol1.ERRBIT_RANGE, 'range'),
+    (protocol1.ERRBIT_CHECKSUM, 'checksum'),
+    (protocol1.ERRBIT_OVERLOAD, 'overload'),
+    (protocol1.ERRBIT_INSTRUCTION, 'instruction'),
+]
+
+PROTOCOL2_ERROR_NUMBERS = {
+    protocol2.ERRNUM_RESULT_FAIL: 'result_fail',
+    protocol2.ERRNUM_INSTRUCTION: 'instruction',
+    protocol2.ERRNUM_CRC: 'crc',
+    protocol2.ERRNUM_DATA_RANGE: 'data_range',
+    protocol2.ERRNUM_DATA_LENGTH: 'data_length',
+    protocol2.ERRNUM_DATA_LIMIT: 'data_limit',
+    protocol2.ERRNUM_ACCESS: 'access',
+}
+
+
+def getErrorNames(protocol_version, error):
+    # names of the errors of a status packet error byte, as getRxPacketError() reads it
+    if protocol_version == 1.0:
+        return [name for bit, name in PROTOCOL1_ERROR_BITS if error & bit]
+
+    names = []
+    if error & protocol2.ERRBIT_ALERT:
+        names.append('hardware_alert')
+    number = error & ~protocol2.ERRBIT_ALERT
+    if number:
+        names.append(PROTOCOL2_ERROR_NUMBERS.get(number, 'unknown'))
+    return names
+
+
+def getBucketLimit(bound_us):
+    # number of monitor buckets whose samples are all <= bound_us, the 'le' of a Prometheus bucket:
+    # the upper edge of such a bucket does not exceed the bound, the last bucket has none
+    # (the monitor puts a sample at a bucket bound into the bucket below, see LatencyHistogram.add())
+    bucket = 0
+    while bucket < BUCKET_COUNT - 1 and getBucketValue(bucket + 1) <= bound_us:
+        bucket += 1
+    return bucket
+
+
+def escapeLabel(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def formatLabels(labels):
+    return '{' + ','.join('%s="%s"' % (name, escapeLabel(value)) for name, value in labels) + '}'
+
+
+LATENCY_BUCKET_LIMITS = [getBucketLimit(bound_us) for bound_us in LATENCY_BUCKETS]
+
+
+class MetricsExporter(object):
+    def __init__(self):
+        self.port_list = []  # [(name, monitor, protocol version)]
+
+    def addPort(self, port, protocol_version, name=None, monitor=None):
+        # exports the monitor of port, a TransactionMonitor is set when the port has none
+        if monitor is None:
+            monitor = port.getMonitor()
+        if monitor is None:
+            monitor = TransactionMonitor()
+            port.setMonitor(monitor)
+
+        self.port_list.append((name if name is not None else port.getPortName(), monitor, protocol_version))
+        return monitor
+
+    def render(self):
+        # Prometheus text exposition format
+        families = [
+            ('dynamixel_transactions_total', 'counter', 'Transactions by instruction and result.'),
+            ('dynamixel_bytes_total', 'counter', 'Bytes written and read on the bus.'),
+            ('dynamixel_bus_busy_seconds_total', 'counter', 'Wire time of the counted bytes at the port baud rate.'),
+            ('dynamixel_status_packets_total', 'counter', 'Status packets by ID and result.'),
+            ('dynamixel_status_errors_total', 'counter', 'Errors reported in the status packets by ID.'),
+            ('dynamixel_transaction_seconds', 'histogram', 'Transaction time from txPacket() to the result.'),
+            ('dynamixel_status_seconds', 'histogram', 'Time from txPacket() to the status packet of an ID.'),
+        ]
+        samples = dict((name, []) for name, _, _ in families)  # {name: [(suffix, labels, value)]}
+
+        for port_name, monitor, protocol_version in self.port_list:
+            port_labels = [('port', port_name)]
+
+            samples['dynamixel_bytes_total'].append(('', port_labels + [('direction', 'tx')], monitor.tx_bytes))
+            samples['dynamixel_bytes_total'].append(('', port_labels + [('direction', 'rx')], monitor.rx_bytes))
+            samples['dynamixel_bus_busy_seconds_total'].append(
+                ('', port_labels, monitor.wire_ns / 1000000000.0))
+
+            for instruction in list(monitor.instruction_stats):
+                instruction_stats = monitor.instruction_stats[instruction]
+                labels = port_labels + [('instruction', INSTRUCTION_NAMES.get(instruction, str(instruction)))]
+                for result, count in list(instruction_stats.results.items()):
+                    samples['dynamixel_transactions_total'].append(
+                        ('', labels + [('result', RESULT_NAMES.get(result, str(result)))], count))
+                samples['dynamixel_transaction_seconds'] += self.renderHistogram(
+                    labels, instruction_stats.phases['total'])
+
+            for dxl_id in sorted(monitor.id_stats):
+                id_stats = monitor.id_stats[dxl_id]
+                labels = port_labels + [('id', dxl_id)]
+                for result, count in list(id_stats.results.items()):
+                    samples['dynamixel_status_packets_total'].append(
+                        ('', labels + [('result', RESULT_NAMES.get(result, str(result)))], count))
+
+                error_counts = {}
+                for error, count in list(id_stats.error_dict.items()):
+                    for error_name in getErrorNames(protocol_version, error):
+                        error_counts[error_name] = error_counts.get(error_name, 0) + count
+                for error_name in sorted(error_counts):
+                    samples['dynamixel_status_errors_total'].append(
+                        ('', labels + [('error', error_name)], error_counts[error_name]))
+
+                samples['dynamixel_status_seconds'] += self.renderHistogram(labels, id_stats.latency)
+
+        lines = []
+        for name, metric_type, help_text in families:
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for suffix, labels, value in samples[name]:
+                lines.append('%s%s%s %s' % (name, suffix, formatLabels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+    def renderHistogram(self, labels, histogram):
+        # cumulative buckets in seconds from a LatencyHistogram
+        buckets = list(histogram.buckets)
+        series = []
+        for bound_us, limit in zip(LATENCY_BUCKETS, LATENCY_BUCKET_LIMITS):
+            count = sum(buckets[0: limit])
+            series.append(('_bucket', labels + [('le', '%g' % (bound_us / 1000000.0))], count))
+        count = sum(buckets)
+        series.append(('_bucket', labels + [('le', '+Inf')], count))
+        series.append(('_sum', labels, histogram.sum_ns / 1000000000.0))
+        series.append(('_count', labels, count))
+        return series
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = self.server.exporter.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(object):
+    def __init__(self, exporter, port=DEFAULT_METRICS_PORT, host='127.0.0.1'):
+        # port 0 takes a free port, see getAddress()
+        self.server = HTTPServer((host, port), MetricsRequestHandler)
+        self.server.exporter = exporter
+        self.thread = None
+
+    def getAddress(self):
+        return self.server.server_address
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -19,26 +19,72 @@
 
 # Author: Ryu Woon Jung (Leon)
 
-import time
+import math
+import os
 import serial
 import sys
 import platform
+import select
+import threading
+from contextlib import contextmanager
+
+from .robotis_def import *
+from .clock import MonotonicClock
+from .port_lock import *
 
 LATENCY_TIMER = 16
 DEFAULT_BAUDRATE = 1000000
 
+USB_LATENCY_TIMER_PATH = '/sys/bus/usb-serial/devices/%s/latency_timer'
+
 
 class PortHandler(object):
-    def __init__(self, port_name):
+    def __init__(self, port_name, clock=None):
         self.is_open = False
         self.baudrate = DEFAULT_BAUDRATE
-        self.packet_start_time = 0.0
         self.packet_timeout = 0.0
         self.tx_time_per_byte = 0.0
+        self.latency_timer = LATENCY_TIMER  # [ms] used in the packet timeout
+
+        # all timing is done in integer nanoseconds of this clock
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.packet_start_ns = 0
+        self.packet_deadline_ns = 0
+        self.last_write_ns = 0
+        self.last_read_ns = 0
+
+        # a packet transaction (txPacket() .. rxPacket()) is in progress, see is_using
+        self.is_busy = False
+        self.port_lock = PortLock()
+        self.lock_timeout = 0.0  # [ms] txPacket() waits this long for a port used by another thread
+        self.thread_state = threading.local()
 
-        self.is_using = False
         self.port_name = port_name
         self.ser = None
+        self.status_parser = None
+        self.monitor = None  # TransactionMonitor told about every transaction, see setMonitor()
+
+        # False: readPort() returns immediately with whatever is buffered (busy polling)
+        # True: readPort() sleeps in the kernel until the bytes arrive or the packet deadline passes
+        self.is_blocking_read = False
+
+    @property
+    def is_using(self):
+        return self.is_busy
+
+    @is_using.setter
+    def is_using(self, is_using):
+        # kept for callers that set the former flag directly, see acquirePort() / releasePort().
+        # A transaction belongs to the thread that started it: txPacket() and rxPacket() of one
+        # transaction run on the same thread, and only that thread ends it. RuntimeError when the
+        # flag is set while another thread holds the port, the setter cannot return COMM_PORT_BUSY.
+        if is_using:
+            if not self.acquirePort() and not self.port_lock.isOwner():
+                raise RuntimeError("port %s is used by another thread" % self.port_name)
+        elif self.is_busy and not self.port_lock.isOwner():
+            raise RuntimeError("the transaction on port %s belongs to another thread" % self.port_name)
+        else:
+            self.releasePort()
 
     def openPort(self):
         return self.setBaudRate(self.baudrate)
@@ -73,39 +119,262 @@ class PortHandler(object):
     def getBytesAvailable(self):
         return self.ser.in_waiting
 
+    def setBlockingRead(self, enable):
+        self.is_blocking_read = enable
+
+    def getBlockingRead(self):
+        return self.is_blocking_read
+
     def readPort(self, length):
+        if self.is_blocking_read and length > 0:
+            data = self.readPortBlocking(length)
+        else:
+            data = self.ser.read(length)
+
+        if data:
+            self.last_read_ns = self.clock.getTimeNs()
+
         if (sys.version_info > (3, 0)):
-            return self.ser.read(length)
+            return data
         else:
-            return [ord(ch) for ch in self.ser.read(length)]
+            return bytearray(data)
+
+    def readPortBlocking(self, length):
+        timeout = (self.packet_deadline_ns - self.clock.getTimeNs()) / 1000000000.0
+
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, NotImplementedError, ValueError):
+            fd = None
+
+        if fd is None:
+            # no pollable file descriptor (e.g. Windows): let pyserial block
+            self.ser.timeout = max(timeout, 0)
+            data = self.ser.read(length)
+            self.ser.timeout = 0
+            return data
+
+        data = self.ser.read(length)
+        while len(data) < length and timeout > 0:
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                break
+
+            data += self.ser.read(length - len(data))
+            timeout = (self.packet_deadline_ns - self.clock.getTimeNs()) / 1000000000.0
+
+        return data
 
     def writePort(self, packet):
+        self.last_write_ns = self.clock.getTimeNs()
         return self.ser.write(packet)
 
     def setPacketTimeout(self, packet_length):
-        self.packet_start_time = self.getCurrentTime()
-        self.packet_timeout = (self.tx_time_per_byte * packet_length) + (LATENCY_TIMER * 2.0) + 2.0
+        self.setPacketTimeoutMillis((self.tx_time_per_byte * packet_length) + (self.latency_timer * 2.0) + 2.0)
 
     def setPacketTimeoutMillis(self, msec):
-        self.packet_start_time = self.getCurrentTime()
+        self.packet_start_ns = self.clock.getTimeNs()
         self.packet_timeout = msec
+        self.packet_deadline_ns = self.packet_start_ns + int(msec * 1000000)
 
     def isPacketTimeout(self):
-        if self.getTimeSinceStart() > self.packet_timeout:
+        if self.clock.getTimeNs() > self.packet_deadline_ns:
             self.packet_timeout = 0
+            self.packet_deadline_ns = self.packet_start_ns
             return True
 
         return False
 
+    def setLatencyTimer(self, msec):
+        self.latency_timer = msec
+
+    def getLatencyTimer(self):
+        return self.latency_timer
+
+    def getUSBLatencyTimerPath(self):
+        if platform.system() != 'Linux':
+            return None
+
+        return USB_LATENCY_TIMER_PATH % os.path.basename(os.path.realpath(self.port_name))
+
+    def getUSBLatencyTimer(self):
+        # latency_timer of the FTDI (usb-serial) driver in ms, -1 if it is not available
+        path = self.getUSBLatencyTimerPath()
+        if path is None:
+            return -1
+
+        try:
+            with open(path, 'r') as f:
+                return int(f.read().strip())
+        except (IOError, OSError, ValueError):
+            return -1
+
+    def setUSBLatencyTimer(self, msec):
+        # needs write permission on the sysfs attribute (root or a udev rule)
+        path = self.getUSBLatencyTimerPath()
+        if path is None:
+            return False
+
+        try:
+            with open(path, 'w') as f:
+                f.write('%d' % msec)
+        except (IOError, OSError):
+            return False
+
+        self.latency_timer = msec
+        return True
+
+    def useUSBLatencyTimer(self):
+        # take the latency of the driver into the packet timeout
+        latency_timer = self.getUSBLatencyTimer()
+        if latency_timer < 0:
+            return False
+
+        self.latency_timer = latency_timer
+        return True
+
+    def calibrateLatencyTimer(self, ph, dxl_id, sample_count=20, margin=1.5):
+        # Measures the ping round trip time and sets the latency timer so that
+        # the packet timeout of a ping covers the slowest response times margin.
+        # Returns (latency_timer, max round trip time [ms], result)
+        # One ping packet per sample: ph.ping() of protocol 1.0 also reads the model number.
+        if dxl_id >= BROADCAST_ID:
+            return self.latency_timer, 0.0, COMM_NOT_AVAILABLE
+
+        max_rtt_ns = 0
+        result = COMM_RX_TIMEOUT
+
+        for _ in range(sample_count):
+            start_ns = self.clock.getTimeNs()
+            _, ping_result, _ = ph.txRxPacket(self, ph.makePingPacket(dxl_id))
+            if ping_result != COMM_SUCCESS:
+                result = ping_result
+                continue
+
+            max_rtt_ns = max(max_rtt_ns, self.clock.getTimeNs() - start_ns)
+            result = COMM_SUCCESS
+
+        if max_rtt_ns == 0:
+            return self.latency_timer, 0.0, result
+
+        max_rtt = max_rtt_ns / 1000000.0
+
+        # timeout = tx_time_per_byte * status length + 2 * latency_timer + 2 [ms]
+        status_length = 14 if ph.getProtocolVersion() == 2.0 else 6
+        latency_timer = (max_rtt * margin - 2.0 - self.tx_time_per_byte * status_length) / 2.0
+        self.latency_timer = max(1, int(math.ceil(latency_timer)))
+
+        return self.latency_timer, max_rtt, COMM_SUCCESS
+
+    def setLockTimeout(self, msec):
+        # 0: txPacket() returns COMM_PORT_BUSY at once when another thread uses the port
+        self.lock_timeout = msec
+
+    def getLockTimeout(self):
+        return self.lock_timeout
+
+    def setTransactionPriority(self, priority):
+        # priority class (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW) of the calling thread
+        self.thread_state.priority = priority
+
+    def getTransactionPriority(self):
+        return getattr(self.thread_state, 'priority', PRIORITY_NORMAL)
+
+    def acquirePort(self):
+        # start of a packet transaction, called by txPacket(). False means COMM_PORT_BUSY
+        if self.port_lock.isOwner():
+            if self.is_busy:
+                # the previous transaction of this thread is not finished
+                return False
+            self.is_busy = True
+            return True
+
+        if not self.port_lock.acquire(self.getTransactionPriority(), self.lock_timeout / 1000.0):
+            return False
+
+        self.is_busy = True
+        return True
+
+    def releasePort(self):
+        # end of a packet transaction, ignored in a thread that does not hold the port
+        if not self.is_busy or not self.port_lock.isOwner():
+            return
+
+        self.is_busy = False
+        if self.monitor is not None:
+            self.monitor.onRelease(self)
+        if self.port_lock.depth == 0:
+            self.port_lock.release()
+
+    def lockPort(self, priority=None, timeout=None):
+        # holds the port over several transactions, e.g. a bulk read or a read-modify-write
+        # timeout [ms]: None waits until the port is free. Calls can be nested.
+        if self.port_lock.isOwner():
+            self.port_lock.depth += 1
+            return True
+
+        if priority is None:
+            priority = self.getTransactionPriority()
+
+        if not self.port_lock.acquire(priority, None if timeout is None else timeout / 1000.0):
+            return False
+
+        self.port_lock.depth = 1
+        return True
+
+    def unlockPort(self):
+        if not self.port_lock.isOwner() or self.port_lock.depth == 0:
+            return
+
+        self.port_lock.depth -= 1
+        if self.port_lock.depth == 0 and not self.is_busy:
+            if self.monitor is not None:
+                self.monitor.onRelease(self)
+            self.port_lock.release()
+
+    @contextmanager
+    def transaction(self, priority=None, timeout=None):
+        # with port.transaction(PRIORITY_HIGH) as is_locked: ...
+        is_locked = self.lockPort(priority, timeout)
+        try:
+            yield is_locked
+        finally:
+            if is_locked:
+                self.unlockPort()
+
+    def getLockStats(self):
+        return self.port_lock.getStats()
+
+    def setMonitor(self, monitor):
+        # None turns the instrumentation off
+        self.monitor = monitor
+
+    def getMonitor(self):
+        return self.monitor
+
+    def setClock(self, clock):
+        self.clock = clock
+
+    def getClock(self):
+        return self.clock
+
     def getCurrentTime(self):
-        return round(time.time() * 1000000000) / 1000000.0
+        # milliseconds
+        return self.clock.getTimeNs() / 1000000.0
 
     def getTimeSinceStart(self):
-        time_since = self.getCurrentTime() - self.packet_start_time
-        if time_since < 0.0:
-            self.packet_start_time = self.getCurrentTime()
+        # milliseconds
+        return (self.clock.getTimeNs() - self.packet_start_ns) / 1000000.0
+
+    def getRemainingTimeNs(self):
+        return self.packet_deadline_ns - self.clock.getTimeNs()
+
+    def getRoundTripTimeNs(self):
+        # from the last instruction packet written to the last bytes read after it
+        if self.last_read_ns < self.last_write_ns:
+            return 0
 
-        return time_since
+        return self.last_read_ns - self.last_write_ns
 
     def setupPort(self, cflag_baud):
         if self.is_open:
@@ -123,6 +392,8 @@ class PortHandler(object):
         self.is_open = True
 
         self.ser.reset_input_buffer()
+        if self.status_parser is not None:
+            self.status_parser.clear()
 
         self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
 
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import heapq
+import threading
+
+from .clock import MonotonicClock
+
+# priority classes, lower value is served first
+PRIORITY_HIGH = 0  # control loop
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # telemetry polling
+
+
+class PortLock(object):
+    # Transaction lock of a port.
+    #
+    # A running transaction is never interrupted; when the port is released, the
+    # waiting thread of the highest priority class gets it next, threads of the same
+    # class are served in arrival order.
+    def __init__(self):
+        self.clock = MonotonicClock()
+        self.condition = threading.Condition(threading.Lock())
+
+        self.owner = None  # thread holding the port
+        self.depth = 0  # nesting of explicit PortHandler.lockPort() calls
+        self.owner_since_ns = 0
+
+        self.waiters = []  # heap of (priority, arrival, thread)
+        self.arrival = 0
+
+        self.acquire_count = 0
+        self.contention_count = 0  # acquisitions that found the port taken
+        self.timeout_count = 0
+        self.wait_time_ns = 0
+        self.max_wait_time_ns = 0
+        self.busy_time_ns = 0
+
+    def isOwner(self):
+        return self.owner is threading.current_thread()
+
+    def acquire(self, priority, timeout):
+        # timeout [s]: None waits forever, 0 does not wait
+        me = threading.current_thread()
+
+        with self.condition:
+            self.acquire_count += 1
+
+            if self.owner is None and not self.waiters:
+                self.owner = me
+                self.owner_since_ns = self.clock.getTimeNs()
+                return True
+
+            self.contention_count += 1
+            if timeout is not None and timeout <= 0:
+                self.timeout_count += 1
+                return False
+
+            start_ns = self.clock.getTimeNs()
+            entry = (priority, self.arrival, me)
+            self.arrival += 1
+            heapq.heappush(self.waiters, entry)
+
+            while self.owner is not None or self.waiters[0] is not entry:
+                if timeout is None:
+                    self.condition.wait()
+                    continue
+
+                remaining = timeout - (self.clock.getTimeNs() - start_ns) / 1000000000.0
+                if remaining <= 0:
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+                    self.timeout_count += 1
+                    self.addWaitTime(self.clock.getTimeNs() - start_ns)
+                    # the next waiter may be at the head now
+                    self.condition.notify_all()
+                    return False
+
+                self.condition.wait(remaining)
+
+            heapq.heappop(self.waiters)
+            self.owner = me
+            self.owner_since_ns = self.clock.getTimeNs()
+            self.addWaitTime(self.owner_since_ns - start_ns)
+            return True
+
+    def release(self):
+        # only the owner can release, a thread that did not get the port must not end its transaction
+        with self.condition:
+            if self.owner is not threading.current_thread():
+                return
+
+            self.busy_time_ns += self.clock.getTimeNs() - self.owner_since_ns
+            self.owner = None
+            self.depth = 0
+            if self.waiters:
+                self.condition.notify_all()
+
+    def addWaitTime(self, wait_ns):
+        self.wait_time_ns += wait_ns
+        self.max_wait_time_ns = max(self.max_wait_time_ns, wait_ns)
+
+    def getStats(self):
+        return {
+            'acquire_count': self.acquire_count,
+            'contention_count': self.contention_count,
+            'timeout_count': self.timeout_count,
+            'waiting': len(self.waiters),
+            'wait_time_ns': self.wait_time_ns,
+            'max_wait_time_ns': self.max_wait_time_ns,
+            'busy_time_ns': self.busy_time_ns,
+        }
+
+    def resetStats(self):
+        with self.condition:
+            self.acquire_count = 0
+            self.contention_count = 0
+            self.timeout_count = 0
+            self.wait_time_ns = 0
+            self.max_wait_time_ns = 0
+            self.busy_time_ns = 0
+            if self.owner is not None:
+                self.owner_since_ns = self.clock.getTimeNs()
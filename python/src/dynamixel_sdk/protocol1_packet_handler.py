@@ -19,10 +19,14 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import struct
+
 from .robotis_def import *
+from .status_packet_parser import StatusPacketParser
 
 TXPACKET_MAX_LEN = 250
 RXPACKET_MAX_LEN = 250
+RXBUFFER_LEN = 4 * 256
 
 # for Protocol 1.0 Packet
 PKT_HEADER0 = 0
@@ -33,6 +37,8 @@ PKT_INSTRUCTION = 4
 PKT_ERROR = 4
 PKT_PARAMETER0 = 5
 
+PKT_HEADER = b'\xFF\xFF'
+
 # Protocol 1.0 Error bit
 ERRBIT_VOLTAGE = 1  # Supplied voltage is out of the range (operating volatage set in the control table)
 ERRBIT_ANGLE = 2  # Goal position is written out of the range (from CW angle limit to CCW angle limit)
@@ -43,6 +49,26 @@ ERRBIT_OVERLOAD = 32  # The current load cannot be controlled by the set torque.
 ERRBIT_INSTRUCTION = 64  # Undefined instruction or delivering the action command without the reg_write command.
 
 
+class Protocol1StatusParser(StatusPacketParser):
+    HEADER = PKT_HEADER
+    MIN_LENGTH = 6  # HEADER0 HEADER1 ID LENGTH ERROR CHKSUM
+
+    def __init__(self, capacity=RXBUFFER_LEN):
+        StatusPacketParser.__init__(self, capacity)
+
+    def getFrameLength(self, buffer, idx):
+        if (buffer[idx + PKT_ID] > 0xFD) or (buffer[idx + PKT_LENGTH] > RXPACKET_MAX_LEN) or (
+                buffer[idx + PKT_ERROR] > 0x7F):
+            # unavailable ID or unavailable Length or unavailable Error
+            return -1
+
+        return buffer[idx + PKT_LENGTH] + PKT_LENGTH + 1
+
+    def verifyFrame(self, packet, frame_length):
+        checksum = ~sum(packet[2: frame_length - 1]) & 0xFF  # except header, checksum
+        return packet[frame_length - 1] == checksum
+
+
 class Protocol1PacketHandler(object):
     def getProtocolVersion(self):
         return 1.0
@@ -94,15 +120,22 @@ class Protocol1PacketHandler(object):
         return ""
 
     def txPacket(self, port, txpacket):
-        checksum = 0
         total_packet_length = txpacket[PKT_LENGTH] + 4  # 4: HEADER0 HEADER1 ID LENGTH
 
-        if port.is_using:
+        if not port.acquirePort():
             return COMM_PORT_BUSY
-        port.is_using = True
+
+        monitor = getattr(port, 'monitor', None)
+        if monitor is not None:
+            monitor.onTxStart(port, txpacket[PKT_ID], txpacket[PKT_INSTRUCTION])
+
+        if not isinstance(txpacket, bytearray):
+            txpacket = bytearray(txpacket)
 
         # check max packet length
         if total_packet_length > TXPACKET_MAX_LEN:
+            if monitor is not None:
+                monitor.onTxEnd(port, COMM_TX_ERROR, 0)
             port.is_using = False
             return COMM_TX_ERROR
 
@@ -111,8 +144,7 @@ class Protocol1PacketHandler(object):
         txpacket[PKT_HEADER1] = 0xFF
 
         # add a checksum to the packet
-        for idx in range(2, total_packet_length - 1):  # except header, checksum
-            checksum += txpacket[idx]
+        checksum = sum(txpacket[2: total_packet_length - 1])  # except header, checksum
 
         txpacket[total_packet_length - 1] = ~checksum & 0xFF
 
@@ -120,96 +152,76 @@ class Protocol1PacketHandler(object):
 
         # tx packet
         port.clearPort()
-        written_packet_length = port.writePort(txpacket)
+        parser = getattr(port, 'status_parser', None)
+        if parser is not None:
+            # bytes left from an earlier transaction must not be taken for the status packet
+            parser.clear()
+        if len(txpacket) != total_packet_length:
+            written_packet_length = port.writePort(txpacket[0: total_packet_length])
+        else:
+            written_packet_length = port.writePort(txpacket)
         if total_packet_length != written_packet_length:
+            if monitor is not None:
+                monitor.onTxEnd(port, COMM_TX_FAIL, written_packet_length or 0)
             port.is_using = False
             return COMM_TX_FAIL
 
+        if monitor is not None:
+            monitor.onTxEnd(port, COMM_SUCCESS, total_packet_length)
         return COMM_SUCCESS
 
-    def rxPacket(self, port):
-        rxpacket = []
+    def getStatusParser(self, port):
+        parser = getattr(port, 'status_parser', None)
+        if not isinstance(parser, Protocol1StatusParser):
+            parser = Protocol1StatusParser()
+            port.status_parser = parser
 
-        result = COMM_TX_FAIL
-        checksum = 0
-        rx_length = 0
-        wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
+        return parser
 
-        while True:
-            rxpacket.extend(port.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 1)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
-                        break
-
-                if idx == 0:  # found at the beginning of the packet
-                    if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_ERROR] > 0x7F):
-                        # unavailable ID or unavailable Length or unavailable Error
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    # re-calculate the exact length of the rx packet
-                    if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
-                        wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        # check timeout
-                        if port.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
-
-                    # calculate checksum
-                    for i in range(2, wait_length - 1):  # except header, checksum
-                        checksum += rxpacket[i]
-                    checksum = ~checksum & 0xFF
-
-                    # verify checksum
-                    if rxpacket[wait_length - 1] == checksum:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
-
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
+    def pollRxPacket(self, port, data):
+        # one step of rxPacket(): COMM_RX_WAITING while the packet is incomplete and the timeout has not passed
+        parser = self.getStatusParser(port)
+        parser.feed(data)
 
-            else:
-                # check timeout
-                if port.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+        monitor = getattr(port, 'monitor', None)
+        if monitor is not None and data:
+            monitor.onRead(port, data)
 
+        rxpacket, result = parser.getPacket()
+        if result == COMM_RX_WAITING:
+            # check timeout
+            if not port.isPacketTimeout():
+                return rxpacket, result
+
+            if parser.available() == 0:
+                result = COMM_RX_TIMEOUT
+            else:
+                result = COMM_RX_CORRUPT
+            # drop the partial packet so that it does not corrupt the next transaction
+            parser.clear()
+            rxpacket = bytearray()
+        elif monitor is not None:
+            monitor.onFrame(port, rxpacket[PKT_ID], result, rxpacket[PKT_ERROR] if result == COMM_SUCCESS else 0)
+
+        if monitor is not None:
+            monitor.onResult(port, result)
         port.is_using = False
 
         #print "[RxPacket] %r" % rxpacket
 
         return rxpacket, result
 
-    # NOT for BulkRead
-    def txRxPacket(self, port, txpacket):
-        rxpacket = None
-        error = 0
+    def rxPacket(self, port):
+        parser = self.getStatusParser(port)
 
-        # tx packet
-        result = self.txPacket(port, txpacket)
-        if result != COMM_SUCCESS:
-            return rxpacket, result, error
+        while True:
+            rxpacket, result = self.pollRxPacket(port, port.readPort(parser.getWaitLength()))
+            if result != COMM_RX_WAITING:
+                return rxpacket, result
+
+    def startRxPacket(self, port, txpacket):
+        # after txPacket() in txRxPacket(): (True, result) when a status packet follows, the packet timeout is then set
+        result = COMM_SUCCESS
 
         # (Instruction == BulkRead) == this function is not available.
         if txpacket[PKT_INSTRUCTION] == INST_BULK_READ:
@@ -218,7 +230,7 @@ class Protocol1PacketHandler(object):
         # (ID == Broadcast ID) == no need to wait for status packet or not available
         if (txpacket[PKT_ID] == BROADCAST_ID):
             port.is_using = False
-            return rxpacket, result, error
+            return False, result
 
         # set packet timeout
         if txpacket[PKT_INSTRUCTION] == INST_READ:
@@ -226,6 +238,22 @@ class Protocol1PacketHandler(object):
         else:
             port.setPacketTimeout(6)  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
 
+        return True, result
+
+    # NOT for BulkRead
+    def txRxPacket(self, port, txpacket):
+        rxpacket = None
+        error = 0
+
+        # tx packet
+        result = self.txPacket(port, txpacket)
+        if result != COMM_SUCCESS:
+            return rxpacket, result, error
+
+        is_waiting, result = self.startRxPacket(port, txpacket)
+        if not is_waiting:
+            return rxpacket, result, error
+
         # rx packet
         while True:
             rxpacket, result = self.rxPacket(port)
@@ -237,23 +265,26 @@ class Protocol1PacketHandler(object):
 
         return rxpacket, result, error
 
+    def makePingPacket(self, dxl_id):
+        txpacket = bytearray(6)
+
+        txpacket[PKT_ID] = dxl_id
+        txpacket[PKT_LENGTH] = 2
+        txpacket[PKT_INSTRUCTION] = INST_PING
+
+        return txpacket
+
     def ping(self, port, dxl_id):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 6
-
         if dxl_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH] = 2
-        txpacket[PKT_INSTRUCTION] = INST_PING
-
-        rxpacket, result, error = self.txRxPacket(port, txpacket)
+        rxpacket, result, error = self.txRxPacket(port, self.makePingPacket(dxl_id))
 
         if result == COMM_SUCCESS:
-            data_read, result, error = self.readTxRx(port, dxl_id, 0, 2)  # Address 0 : Model Number
+            data_read, result, error = self.readTxRxBuffer(port, dxl_id, 0, 2)  # Address 0 : Model Number
             if result == COMM_SUCCESS:
                 model_number = DXL_MAKEWORD(data_read[0], data_read[1])
 
@@ -264,7 +295,7 @@ class Protocol1PacketHandler(object):
         return data_list, COMM_NOT_AVAILABLE
 
     def action(self, port, dxl_id):
-        txpacket = [0] * 6
+        txpacket = bytearray(6)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = 2
@@ -278,7 +309,7 @@ class Protocol1PacketHandler(object):
         return COMM_NOT_AVAILABLE, 0
 
     def factoryReset(self, port, dxl_id):
-        txpacket = [0] * 6
+        txpacket = bytearray(6)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = 2
@@ -288,12 +319,8 @@ class Protocol1PacketHandler(object):
 
         return result, error
 
-    def readTx(self, port, dxl_id, address, length):
-
-        txpacket = [0] * 8
-
-        if dxl_id >= BROADCAST_ID:
-            return COMM_NOT_AVAILABLE
+    def makeReadPacket(self, dxl_id, address, length):
+        txpacket = bytearray(8)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = 4
@@ -301,6 +328,14 @@ class Protocol1PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 0] = address
         txpacket[PKT_PARAMETER0 + 1] = length
 
+        return txpacket
+
+    def readTx(self, port, dxl_id, address, length):
+        if dxl_id >= BROADCAST_ID:
+            return COMM_NOT_AVAILABLE
+
+        txpacket = self.makeReadPacket(dxl_id, address, length)
+
         result = self.txPacket(port, txpacket)
 
         # set packet timeout
@@ -309,12 +344,16 @@ class Protocol1PacketHandler(object):
 
         return result
 
-    def readRx(self, port, dxl_id, length):
+    def getRxPacketData(self, rxpacket, length):
+        # ERROR is followed by the data of a READ status packet
+        return rxpacket[PKT_PARAMETER0: PKT_PARAMETER0 + length]
+
+    def readRxBuffer(self, port, dxl_id, length):
         result = COMM_TX_FAIL
         error = 0
 
         rxpacket = None
-        data = []
+        data = bytearray()
 
         while True:
             rxpacket, result = self.rxPacket(port)
@@ -325,41 +364,44 @@ class Protocol1PacketHandler(object):
         if result == COMM_SUCCESS and rxpacket[PKT_ID] == dxl_id:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0: PKT_PARAMETER0 + length])
+            data = self.getRxPacketData(rxpacket, length)
 
         return data, result, error
 
-    def readTxRx(self, port, dxl_id, address, length):
-        txpacket = [0] * 8
-        data = []
+    def readRx(self, port, dxl_id, length):
+        data, result, error = self.readRxBuffer(port, dxl_id, length)
+        return list(data), result, error
+
+    def readTxRxBuffer(self, port, dxl_id, address, length):
+        data = bytearray()
 
         if dxl_id >= BROADCAST_ID:
             return data, COMM_NOT_AVAILABLE, 0
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH] = 4
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = address
-        txpacket[PKT_PARAMETER0 + 1] = length
+        txpacket = self.makeReadPacket(dxl_id, address, length)
 
         rxpacket, result, error = self.txRxPacket(port, txpacket)
         if result == COMM_SUCCESS:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0: PKT_PARAMETER0 + length])
+            data = self.getRxPacketData(rxpacket, length)
 
         return data, result, error
 
+    def readTxRx(self, port, dxl_id, address, length):
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, length)
+        return list(data), result, error
+
     def read1ByteTx(self, port, dxl_id, address):
         return self.readTx(port, dxl_id, address, 1)
 
     def read1ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 1)
+        data, result, error = self.readRxBuffer(port, dxl_id, 1)
         data_read = data[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read1ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 1)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 1)
         data_read = data[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
@@ -367,12 +409,12 @@ class Protocol1PacketHandler(object):
         return self.readTx(port, dxl_id, address, 2)
 
     def read2ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 2)
+        data, result, error = self.readRxBuffer(port, dxl_id, 2)
         data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read2ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 2)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 2)
         data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
@@ -380,19 +422,19 @@ class Protocol1PacketHandler(object):
         return self.readTx(port, dxl_id, address, 4)
 
     def read4ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 4)
+        data, result, error = self.readRxBuffer(port, dxl_id, 4)
         data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
                                   DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read4ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 4)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 4)
         data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
                                   DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
-    def writeTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 7)
+    def makeWritePacket(self, dxl_id, address, length, data):
+        txpacket = bytearray(length + 7)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = length + 3
@@ -401,56 +443,50 @@ class Protocol1PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
 
+        return txpacket
+
+    def writeTxOnly(self, port, dxl_id, address, length, data):
+        txpacket = self.makeWritePacket(dxl_id, address, length, data)
+
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result != COMM_PORT_BUSY:
+            port.is_using = False
 
         return result
 
     def writeTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0] = address
+        txpacket = self.makeWritePacket(dxl_id, address, length, data)
 
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
         rxpacket, result, error = self.txRxPacket(port, txpacket)
 
         return result, error
 
     def write1ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [data]
+        data_write = struct.pack('<B', data & 0xFF)
         return self.writeTxOnly(port, dxl_id, address, 1, data_write)
 
     def write1ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [data]
+        data_write = struct.pack('<B', data & 0xFF)
         return self.writeTxRx(port, dxl_id, address, 1, data_write)
 
     def write2ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
+        data_write = struct.pack('<H', data & 0xFFFF)
         return self.writeTxOnly(port, dxl_id, address, 2, data_write)
 
     def write2ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
+        data_write = struct.pack('<H', data & 0xFFFF)
         return self.writeTxRx(port, dxl_id, address, 2, data_write)
 
     def write4ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
+        data_write = struct.pack('<I', data & 0xFFFFFFFF)
         return self.writeTxOnly(port, dxl_id, address, 4, data_write)
 
     def write4ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
+        data_write = struct.pack('<I', data & 0xFFFFFFFF)
         return self.writeTxRx(port, dxl_id, address, 4, data_write)
 
     def regWriteTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 7)
+        txpacket = bytearray(length + 7)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = length + 3
@@ -460,12 +496,13 @@ class Protocol1PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result != COMM_PORT_BUSY:
+            port.is_using = False
 
         return result
 
     def regWriteTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 7)
+        txpacket = bytearray(length + 7)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH] = length + 3
@@ -481,8 +518,9 @@ class Protocol1PacketHandler(object):
     def syncReadTx(self, port, start_address, data_length, param, param_length):
         return COMM_NOT_AVAILABLE
 
-    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 8)
+    def makeSyncWritePacket(self, start_address, data_length, param, param_length):
+        # returns the packet and the index of its first parameter (ID) byte
+        txpacket = bytearray(param_length + 8)
         # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN ... CHKSUM
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -493,12 +531,21 @@ class Protocol1PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + param_length] = param[0: param_length]
 
+        return txpacket, PKT_PARAMETER0 + 2
+
+    def syncWritePacketTxOnly(self, port, txpacket):
+        # sends a packet from makeSyncWritePacket(), the checksum is recomputed in place
         _, result, _ = self.txRxPacket(port, txpacket)
 
         return result
 
+    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
+        txpacket, _ = self.makeSyncWritePacket(start_address, data_length, param, param_length)
+
+        return self.syncWritePacketTxOnly(port, txpacket)
+
     def bulkReadTx(self, port, param, param_length):
-        txpacket = [0] * (param_length + 7)
+        txpacket = bytearray(param_length + 7)
         # 7: HEADER0 HEADER1 ID LEN INST 0x00 ... CHKSUM
 
         txpacket[PKT_ID] = BROADCAST_ID
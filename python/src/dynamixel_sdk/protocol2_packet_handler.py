@@ -19,10 +19,15 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import struct
+
 from .robotis_def import *
+from .crc import updateCRC
+from .status_packet_parser import StatusPacketParser
 
 TXPACKET_MAX_LEN = 1 * 1024
 RXPACKET_MAX_LEN = 1 * 1024
+RXBUFFER_LEN = 4 * RXPACKET_MAX_LEN
 
 # for Protocol 2.0 Packet
 PKT_HEADER0 = 0
@@ -36,6 +41,9 @@ PKT_INSTRUCTION = 7
 PKT_ERROR = 8
 PKT_PARAMETER0 = 8
 
+PKT_HEADER = b'\xFF\xFF\xFD'
+PKT_HEADER_STUFFED = b'\xFF\xFF\xFD\xFD'
+
 # Protocol 2.0 Error bit
 ERRNUM_RESULT_FAIL = 1  # Failed to process the instruction packet.
 ERRNUM_INSTRUCTION = 2  # Instruction error
@@ -48,6 +56,28 @@ ERRNUM_ACCESS = 7  # Access error
 ERRBIT_ALERT = 128  # When the device has a problem, this bit is set to 1. Check "Device Status Check" value.
 
 
+class Protocol2StatusParser(StatusPacketParser):
+    HEADER = PKT_HEADER
+    MIN_LENGTH = 11  # HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H
+
+    def __init__(self, capacity=RXBUFFER_LEN):
+        StatusPacketParser.__init__(self, capacity)
+
+    def getFrameLength(self, buffer, idx):
+        packet_length = DXL_MAKEWORD(buffer[idx + PKT_LENGTH_L], buffer[idx + PKT_LENGTH_H])
+
+        # FF FF FD FD (stuffed header) is rejected by the reserved byte check
+        if (buffer[idx + PKT_RESERVED] != 0x00) or (buffer[idx + PKT_ID] > 0xFC) or (
+                packet_length > RXPACKET_MAX_LEN) or (buffer[idx + PKT_INSTRUCTION] != 0x55):
+            return -1
+
+        return packet_length + PKT_LENGTH_H + 1
+
+    def verifyFrame(self, packet, frame_length):
+        crc = DXL_MAKEWORD(packet[frame_length - 2], packet[frame_length - 1])
+        return updateCRC(0, packet, frame_length - 2) == crc
+
+
 class Protocol2PacketHandler(object):
     def getProtocolVersion(self):
         return 2.0
@@ -106,122 +136,90 @@ class Protocol2PacketHandler(object):
             return "[RxPacketError] Unknown error code!"
 
     def updateCRC(self, crc_accum, data_blk_ptr, data_blk_size):
-        crc_table = [0x0000,
-                     0x8005, 0x800F, 0x000A, 0x801B, 0x001E, 0x0014, 0x8011,
-                     0x8033, 0x0036, 0x003C, 0x8039, 0x0028, 0x802D, 0x8027,
-                     0x0022, 0x8063, 0x0066, 0x006C, 0x8069, 0x0078, 0x807D,
-                     0x8077, 0x0072, 0x0050, 0x8055, 0x805F, 0x005A, 0x804B,
-                     0x004E, 0x0044, 0x8041, 0x80C3, 0x00C6, 0x00CC, 0x80C9,
-                     0x00D8, 0x80DD, 0x80D7, 0x00D2, 0x00F0, 0x80F5, 0x80FF,
-                     0x00FA, 0x80EB, 0x00EE, 0x00E4, 0x80E1, 0x00A0, 0x80A5,
-                     0x80AF, 0x00AA, 0x80BB, 0x00BE, 0x00B4, 0x80B1, 0x8093,
-                     0x0096, 0x009C, 0x8099, 0x0088, 0x808D, 0x8087, 0x0082,
-                     0x8183, 0x0186, 0x018C, 0x8189, 0x0198, 0x819D, 0x8197,
-                     0x0192, 0x01B0, 0x81B5, 0x81BF, 0x01BA, 0x81AB, 0x01AE,
-                     0x01A4, 0x81A1, 0x01E0, 0x81E5, 0x81EF, 0x01EA, 0x81FB,
-                     0x01FE, 0x01F4, 0x81F1, 0x81D3, 0x01D6, 0x01DC, 0x81D9,
-                     0x01C8, 0x81CD, 0x81C7, 0x01C2, 0x0140, 0x8145, 0x814F,
-                     0x014A, 0x815B, 0x015E, 0x0154, 0x8151, 0x8173, 0x0176,
-                     0x017C, 0x8179, 0x0168, 0x816D, 0x8167, 0x0162, 0x8123,
-                     0x0126, 0x012C, 0x8129, 0x0138, 0x813D, 0x8137, 0x0132,
-                     0x0110, 0x8115, 0x811F, 0x011A, 0x810B, 0x010E, 0x0104,
-                     0x8101, 0x8303, 0x0306, 0x030C, 0x8309, 0x0318, 0x831D,
-                     0x8317, 0x0312, 0x0330, 0x8335, 0x833F, 0x033A, 0x832B,
-                     0x032E, 0x0324, 0x8321, 0x0360, 0x8365, 0x836F, 0x036A,
-                     0x837B, 0x037E, 0x0374, 0x8371, 0x8353, 0x0356, 0x035C,
-                     0x8359, 0x0348, 0x834D, 0x8347, 0x0342, 0x03C0, 0x83C5,
-                     0x83CF, 0x03CA, 0x83DB, 0x03DE, 0x03D4, 0x83D1, 0x83F3,
-                     0x03F6, 0x03FC, 0x83F9, 0x03E8, 0x83ED, 0x83E7, 0x03E2,
-                     0x83A3, 0x03A6, 0x03AC, 0x83A9, 0x03B8, 0x83BD, 0x83B7,
-                     0x03B2, 0x0390, 0x8395, 0x839F, 0x039A, 0x838B, 0x038E,
-                     0x0384, 0x8381, 0x0280, 0x8285, 0x828F, 0x028A, 0x829B,
-                     0x029E, 0x0294, 0x8291, 0x82B3, 0x02B6, 0x02BC, 0x82B9,
-                     0x02A8, 0x82AD, 0x82A7, 0x02A2, 0x82E3, 0x02E6, 0x02EC,
-                     0x82E9, 0x02F8, 0x82FD, 0x82F7, 0x02F2, 0x02D0, 0x82D5,
-                     0x82DF, 0x02DA, 0x82CB, 0x02CE, 0x02C4, 0x82C1, 0x8243,
-                     0x0246, 0x024C, 0x8249, 0x0258, 0x825D, 0x8257, 0x0252,
-                     0x0270, 0x8275, 0x827F, 0x027A, 0x826B, 0x026E, 0x0264,
-                     0x8261, 0x0220, 0x8225, 0x822F, 0x022A, 0x823B, 0x023E,
-                     0x0234, 0x8231, 0x8213, 0x0216, 0x021C, 0x8219, 0x0208,
-                     0x820D, 0x8207, 0x0202]
-
-        for j in range(0, data_blk_size):
-            i = ((crc_accum >> 8) ^ data_blk_ptr[j]) & 0xFF
-            crc_accum = ((crc_accum << 8) ^ crc_table[i]) & 0xFFFF
-
-        return crc_accum
+        return updateCRC(crc_accum, data_blk_ptr, data_blk_size)
 
     def addStuffing(self, packet):
+        if not isinstance(packet, bytearray):
+            packet = bytearray(packet)
+
         packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
         packet_length_out = packet_length_in
 
-        temp = [0] * TXPACKET_MAX_LEN
+        # FF FF FD can start at LEN_L at the earliest and must end before the CRC
+        search_end = PKT_INSTRUCTION + packet_length_in - 2
+        idx = packet.find(PKT_HEADER, PKT_INSTRUCTION - 2, search_end)
+        if idx == -1:
+            return packet
 
         # FF FF FD XX ID LEN_L LEN_H
-        temp[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1] = packet[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1]
+        stuffed = bytearray(packet[PKT_HEADER0: PKT_INSTRUCTION])
+        start = PKT_INSTRUCTION
 
-        index = PKT_INSTRUCTION
+        while idx != -1:
+            # FF FF FD -> FF FF FD FD
+            stuffed += packet[start: idx + 3]
+            stuffed.append(0xFD)
+            packet_length_out = packet_length_out + 1
+            start = idx + 3
+            idx = packet.find(PKT_HEADER, start, search_end)
 
-        for i in range(0, packet_length_in - 2):  # except CRC
-            temp[index] = packet[i + PKT_INSTRUCTION]
-            index = index + 1
-            if packet[i + PKT_INSTRUCTION] == 0xFD \
-                    and packet[i + PKT_INSTRUCTION - 1] == 0xFF \
-                    and packet[i + PKT_INSTRUCTION - 2] == 0xFF:
-                # FF FF FD
-                temp[index] = 0xFD
-                index = index + 1
-                packet_length_out = packet_length_out + 1
+        stuffed += packet[start: PKT_INSTRUCTION + packet_length_in]  # including CRC
 
-        temp[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        temp[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
-        index = index + 2
+        stuffed[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
+        stuffed[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
-        if packet_length_in != packet_length_out:
-            packet = [0] * index
-
-        packet[0: index] = temp[0: index]
-
-        packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
-        packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
-
-        return packet
+        return stuffed
 
     def removeStuffing(self, packet):
+        if not isinstance(packet, bytearray):
+            packet = bytearray(packet)
+
         packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
         packet_length_out = packet_length_in
 
-        index = PKT_INSTRUCTION
-        for i in range(0, (packet_length_in - 2)):  # except CRC
-            if (packet[i + PKT_INSTRUCTION] == 0xFD) and (packet[i + PKT_INSTRUCTION + 1] == 0xFD) and (
-                    packet[i + PKT_INSTRUCTION - 1] == 0xFF) and (packet[i + PKT_INSTRUCTION - 2] == 0xFF):
-                # FF FF FD FD
-                packet_length_out = packet_length_out - 1
-            else:
-                packet[index] = packet[i + PKT_INSTRUCTION]
-                index += 1
+        search_end = PKT_INSTRUCTION + packet_length_in - 1
+        idx = packet.find(PKT_HEADER_STUFFED, PKT_INSTRUCTION - 2, search_end)
+        if idx == -1:
+            return packet
 
-        packet[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        packet[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
+        while idx != -1:
+            # FF FF FD FD -> FF FF FD
+            del packet[idx + 3]
+            packet_length_out = packet_length_out - 1
+            search_end = search_end - 1
+            idx = packet.find(PKT_HEADER_STUFFED, idx + 3, search_end)
 
         packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
         packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
         return packet
 
+    def getStatusParser(self, port):
+        parser = getattr(port, 'status_parser', None)
+        if not isinstance(parser, Protocol2StatusParser):
+            parser = Protocol2StatusParser()
+            port.status_parser = parser
+
+        return parser
+
     def txPacket(self, port, txpacket):
-        if port.is_using:
+        if not port.acquirePort():
             return COMM_PORT_BUSY
-        port.is_using = True
+
+        monitor = getattr(port, 'monitor', None)
+        if monitor is not None:
+            monitor.onTxStart(port, txpacket[PKT_ID], txpacket[PKT_INSTRUCTION])
 
         # byte stuffing for header
-        self.addStuffing(txpacket)
+        txpacket = self.addStuffing(txpacket)
 
         # check max packet length
         total_packet_length = DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H]) + 7
         # 7: HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H
 
         if total_packet_length > TXPACKET_MAX_LEN:
+            if monitor is not None:
+                monitor.onTxEnd(port, COMM_TX_ERROR, 0)
             port.is_using = False
             return COMM_TX_ERROR
 
@@ -239,74 +237,50 @@ class Protocol2PacketHandler(object):
 
         # tx packet
         port.clearPort()
-        written_packet_length = port.writePort(txpacket)
+        parser = getattr(port, 'status_parser', None)
+        if parser is not None:
+            # bytes left from an earlier transaction must not be taken for the status packet
+            parser.clear()
+        if len(txpacket) != total_packet_length:
+            written_packet_length = port.writePort(txpacket[0: total_packet_length])
+        else:
+            written_packet_length = port.writePort(txpacket)
         if total_packet_length != written_packet_length:
+            if monitor is not None:
+                monitor.onTxEnd(port, COMM_TX_FAIL, written_packet_length or 0)
             port.is_using = False
             return COMM_TX_FAIL
 
+        if monitor is not None:
+            monitor.onTxEnd(port, COMM_SUCCESS, total_packet_length)
         return COMM_SUCCESS
 
-    def rxPacket(self, port):
-        rxpacket = []
-
-        result = COMM_TX_FAIL
-        rx_length = 0
-        wait_length = 11  # minimum length (HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H)
+    def pollRxPacket(self, port, data):
+        # one step of rxPacket(): COMM_RX_WAITING while the packet is incomplete and the timeout has not passed
+        parser = self.getStatusParser(port)
+        parser.feed(data)
 
-        while True:
-            rxpacket.extend(port.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 3)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF) and (rxpacket[idx + 2] == 0xFD) and (
-                            rxpacket[idx + 3] != 0xFD):
-                        break
-
-                if idx == 0:
-                    if (rxpacket[PKT_RESERVED] != 0x00) or (rxpacket[PKT_ID] > 0xFC) or (
-                            DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_INSTRUCTION] != 0x55):
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    if wait_length != (DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1):
-                        wait_length = DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        if port.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
-
-                    crc = DXL_MAKEWORD(rxpacket[wait_length - 2], rxpacket[wait_length - 1])
-
-                    if self.updateCRC(0, rxpacket, wait_length - 2) == crc:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+        monitor = getattr(port, 'monitor', None)
+        if monitor is not None and data:
+            monitor.onRead(port, data)
 
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
+        rxpacket, result = parser.getPacket()
+        if result == COMM_RX_WAITING:
+            if not port.isPacketTimeout():
+                return rxpacket, result
 
+            if parser.available() == 0:
+                result = COMM_RX_TIMEOUT
             else:
-                if port.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
-
+                result = COMM_RX_CORRUPT
+            # drop the partial packet so that it does not corrupt the next transaction
+            parser.clear()
+            rxpacket = bytearray()
+        elif monitor is not None:
+            monitor.onFrame(port, rxpacket[PKT_ID], result, rxpacket[PKT_ERROR] if result == COMM_SUCCESS else 0)
+
+        if monitor is not None:
+            monitor.onResult(port, result)
         port.is_using = False
 
         if result == COMM_SUCCESS:
@@ -314,15 +288,17 @@ class Protocol2PacketHandler(object):
 
         return rxpacket, result
 
-    # NOT for BulkRead / SyncRead instruction
-    def txRxPacket(self, port, txpacket):
-        rxpacket = None
-        error = 0
+    def rxPacket(self, port):
+        parser = self.getStatusParser(port)
 
-        # tx packet
-        result = self.txPacket(port, txpacket)
-        if result != COMM_SUCCESS:
-            return rxpacket, result, error
+        while True:
+            rxpacket, result = self.pollRxPacket(port, port.readPort(parser.getWaitLength()))
+            if result != COMM_RX_WAITING:
+                return rxpacket, result
+
+    def startRxPacket(self, port, txpacket):
+        # after txPacket() in txRxPacket(): (True, result) when a status packet follows, the packet timeout is then set
+        result = COMM_SUCCESS
 
         # (Instruction == BulkRead or SyncRead) == this function is not available.
         if txpacket[PKT_INSTRUCTION] == INST_BULK_READ or txpacket[PKT_INSTRUCTION] == INST_SYNC_READ:
@@ -332,7 +308,7 @@ class Protocol2PacketHandler(object):
         # (Instruction == action) == no need to wait for status packet
         if txpacket[PKT_ID] == BROADCAST_ID or txpacket[PKT_INSTRUCTION] == INST_ACTION:
             port.is_using = False
-            return rxpacket, result, error
+            return False, result
 
         # set packet timeout
         if txpacket[PKT_INSTRUCTION] == INST_READ:
@@ -341,6 +317,22 @@ class Protocol2PacketHandler(object):
             port.setPacketTimeout(11)
             # HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H
 
+        return True, result
+
+    # NOT for BulkRead / SyncRead instruction
+    def txRxPacket(self, port, txpacket):
+        rxpacket = None
+        error = 0
+
+        # tx packet
+        result = self.txPacket(port, txpacket)
+        if result != COMM_SUCCESS:
+            return rxpacket, result, error
+
+        is_waiting, result = self.startRxPacket(port, txpacket)
+        if not is_waiting:
+            return rxpacket, result, error
+
         # rx packet
         while True:
             rxpacket, result = self.rxPacket(port)
@@ -352,36 +344,35 @@ class Protocol2PacketHandler(object):
 
         return rxpacket, result, error
 
+    def makePingPacket(self, dxl_id):
+        txpacket = bytearray(10)
+
+        txpacket[PKT_ID] = dxl_id
+        txpacket[PKT_LENGTH_L] = 3
+        txpacket[PKT_LENGTH_H] = 0
+        txpacket[PKT_INSTRUCTION] = INST_PING
+
+        return txpacket
+
     def ping(self, port, dxl_id):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 10
-
         if dxl_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 3
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_PING
-
-        rxpacket, result, error = self.txRxPacket(port, txpacket)
+        rxpacket, result, error = self.txRxPacket(port, self.makePingPacket(dxl_id))
         if result == COMM_SUCCESS:
             model_number = DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2])
 
         return model_number, result, error
 
-    def broadcastPing(self, port):
-        data_list = {}
-
+    def broadcastPingTx(self, port):
         STATUS_LENGTH = 14
 
-        rx_length = 0
         wait_length = STATUS_LENGTH * MAX_ID
 
-        txpacket = [0] * 10
-        rxpacket = []
+        txpacket = bytearray(10)
 
         tx_time_per_byte = (1000.0 / port.getBaudRate()) *10.0;
 
@@ -392,13 +383,29 @@ class Protocol2PacketHandler(object):
 
         result = self.txPacket(port, txpacket)
         if result != COMM_SUCCESS:
-            port.is_using = False
-            return data_list, result
+            # txPacket() released the port after a failed write, a busy port is not ours
+            return result
 
         # set rx timeout
         #port.setPacketTimeout(wait_length * 1)
         port.setPacketTimeoutMillis((wait_length * tx_time_per_byte) + (3.0 * MAX_ID) + 16.0);
 
+        return result
+
+    def broadcastPing(self, port):
+        data_list = {}
+
+        STATUS_LENGTH = 14
+
+        rx_length = 0
+        wait_length = STATUS_LENGTH * MAX_ID
+
+        rxpacket = bytearray()
+
+        result = self.broadcastPingTx(port)
+        if result != COMM_SUCCESS:
+            return data_list, result
+
         while True:
             rxpacket += port.readPort(wait_length - rx_length)
             rx_length = len(rxpacket)
@@ -408,6 +415,17 @@ class Protocol2PacketHandler(object):
 
         port.is_using = False
 
+        return self.getBroadcastPingResult(rxpacket)
+
+    def getBroadcastPingResult(self, rxpacket):
+        # {id: [model number, firmware version]} from the status packets collected after broadcastPingTx()
+        data_list = {}
+
+        STATUS_LENGTH = 14
+
+        result = COMM_RX_TIMEOUT
+        rx_length = len(rxpacket)
+
         if rx_length == 0:
             return data_list, COMM_RX_TIMEOUT
 
@@ -416,9 +434,9 @@ class Protocol2PacketHandler(object):
                 return data_list, COMM_RX_CORRUPT
 
             # find packet header
-            for idx in range(0, rx_length - 2):
-                if rxpacket[idx] == 0xFF and rxpacket[idx + 1] == 0xFF and rxpacket[idx + 2] == 0xFD:
-                    break
+            idx = rxpacket.find(PKT_HEADER)
+            if idx == -1:
+                idx = rx_length - 3
 
             if idx == 0:  # found at the beginning of the packet
                 # verify CRC16
@@ -453,7 +471,7 @@ class Protocol2PacketHandler(object):
         return data_list, result
 
     def action(self, port, dxl_id):
-        txpacket = [0] * 10
+        txpacket = bytearray(10)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 3
@@ -464,7 +482,7 @@ class Protocol2PacketHandler(object):
         return result
 
     def reboot(self, port, dxl_id):
-        txpacket = [0] * 10
+        txpacket = bytearray(10)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 3
@@ -475,7 +493,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def clearMultiTurn(self, port, dxl_id):
-        txpacket = [0] * 15
+        txpacket = bytearray(15)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 8
@@ -491,7 +509,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def factoryReset(self, port, dxl_id, option):
-        txpacket = [0] * 11
+        txpacket = bytearray(11)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 4
@@ -502,11 +520,8 @@ class Protocol2PacketHandler(object):
         _, result, error = self.txRxPacket(port, txpacket)
         return result, error
 
-    def readTx(self, port, dxl_id, address, length):
-        txpacket = [0] * 14
-
-        if dxl_id >= BROADCAST_ID:
-            return COMM_NOT_AVAILABLE
+    def makeReadPacket(self, dxl_id, address, length):
+        txpacket = bytearray(14)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 7
@@ -517,6 +532,14 @@ class Protocol2PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(length)
         txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(length)
 
+        return txpacket
+
+    def readTx(self, port, dxl_id, address, length):
+        if dxl_id >= BROADCAST_ID:
+            return COMM_NOT_AVAILABLE
+
+        txpacket = self.makeReadPacket(dxl_id, address, length)
+
         result = self.txPacket(port, txpacket)
 
         # set packet timeout
@@ -525,12 +548,16 @@ class Protocol2PacketHandler(object):
 
         return result
 
-    def readRx(self, port, dxl_id, length):
+    def getRxPacketData(self, rxpacket, length):
+        # ERROR is followed by the data of a READ status packet
+        return rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length]
+
+    def readRxBuffer(self, port, dxl_id, length):
         result = COMM_TX_FAIL
         error = 0
 
         rxpacket = None
-        data = []
+        data = bytearray()
 
         while True:
             rxpacket, result = self.rxPacket(port)
@@ -541,46 +568,46 @@ class Protocol2PacketHandler(object):
         if result == COMM_SUCCESS and rxpacket[PKT_ID] == dxl_id:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length])
+            data = self.getRxPacketData(rxpacket, length)
 
         return data, result, error
 
-    def readTxRx(self, port, dxl_id, address, length):
+    def readRx(self, port, dxl_id, length):
+        data, result, error = self.readRxBuffer(port, dxl_id, length)
+        return list(data), result, error
+
+    def readTxRxBuffer(self, port, dxl_id, address, length):
         error = 0
 
-        txpacket = [0] * 14
-        data = []
+        data = bytearray()
 
         if dxl_id >= BROADCAST_ID:
             return data, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 7
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-        txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(length)
-        txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(length)
+        txpacket = self.makeReadPacket(dxl_id, address, length)
 
         rxpacket, result, error = self.txRxPacket(port, txpacket)
         if result == COMM_SUCCESS:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length])
+            data = self.getRxPacketData(rxpacket, length)
 
         return data, result, error
 
+    def readTxRx(self, port, dxl_id, address, length):
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, length)
+        return list(data), result, error
+
     def read1ByteTx(self, port, dxl_id, address):
         return self.readTx(port, dxl_id, address, 1)
 
     def read1ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 1)
+        data, result, error = self.readRxBuffer(port, dxl_id, 1)
         data_read = data[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read1ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 1)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 1)
         data_read = data[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
@@ -588,12 +615,12 @@ class Protocol2PacketHandler(object):
         return self.readTx(port, dxl_id, address, 2)
 
     def read2ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 2)
+        data, result, error = self.readRxBuffer(port, dxl_id, 2)
         data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read2ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 2)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 2)
         data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
@@ -601,19 +628,19 @@ class Protocol2PacketHandler(object):
         return self.readTx(port, dxl_id, address, 4)
 
     def read4ByteRx(self, port, dxl_id):
-        data, result, error = self.readRx(port, dxl_id, 4)
+        data, result, error = self.readRxBuffer(port, dxl_id, 4)
         data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
                                   DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read4ByteTxRx(self, port, dxl_id, address):
-        data, result, error = self.readTxRx(port, dxl_id, address, 4)
+        data, result, error = self.readTxRxBuffer(port, dxl_id, address, 4)
         data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
                                   DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
-    def writeTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+    def makeWritePacket(self, dxl_id, address, length, data):
+        txpacket = bytearray(length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -624,58 +651,50 @@ class Protocol2PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
 
+        return txpacket
+
+    def writeTxOnly(self, port, dxl_id, address, length, data):
+        txpacket = self.makeWritePacket(dxl_id, address, length, data)
+
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result != COMM_PORT_BUSY:
+            port.is_using = False
 
         return result
 
     def writeTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = self.makeWritePacket(dxl_id, address, length, data)
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(length + 5)
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
         rxpacket, result, error = self.txRxPacket(port, txpacket)
 
         return result, error
 
     def write1ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [data]
+        data_write = struct.pack('<B', data & 0xFF)
         return self.writeTxOnly(port, dxl_id, address, 1, data_write)
 
     def write1ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [data]
+        data_write = struct.pack('<B', data & 0xFF)
         return self.writeTxRx(port, dxl_id, address, 1, data_write)
 
     def write2ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
+        data_write = struct.pack('<H', data & 0xFFFF)
         return self.writeTxOnly(port, dxl_id, address, 2, data_write)
 
     def write2ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
+        data_write = struct.pack('<H', data & 0xFFFF)
         return self.writeTxRx(port, dxl_id, address, 2, data_write)
 
     def write4ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
+        data_write = struct.pack('<I', data & 0xFFFFFFFF)
         return self.writeTxOnly(port, dxl_id, address, 4, data_write)
 
     def write4ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
+        data_write = struct.pack('<I', data & 0xFFFFFFFF)
         return self.writeTxRx(port, dxl_id, address, 4, data_write)
 
     def regWriteTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = bytearray(length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -687,12 +706,13 @@ class Protocol2PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result != COMM_PORT_BUSY:
+            port.is_using = False
 
         return result
 
     def regWriteTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = bytearray(length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -708,7 +728,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def syncReadTx(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
+        txpacket = bytearray(param_length + 14)
         # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -730,8 +750,84 @@ class Protocol2PacketHandler(object):
 
         return result
 
-    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
+    def syncReadRx(self, port, data_length, id_list):
+        # Receives the whole status packet train of a sync read and demultiplexes it by ID.
+        # Returns {id: [data, result, error]} and the first failed result in id_list order.
+        status_dict = {}
+        pending = {}
+        for dxl_id in id_list:
+            pending[dxl_id] = COMM_RX_TIMEOUT
+
+        data = bytearray()
+        while True:
+            status_dict, result = self.pollSyncReadRx(port, data_length, id_list, pending, status_dict, data)
+            if result != COMM_RX_WAITING:
+                return status_dict, result
+            data = port.readPort(self.getSyncReadWaitLength(port, data_length, pending))
+
+    def getSyncReadWaitLength(self, port, data_length, pending):
+        # ask for the rest of the train at once, the parser keeps whatever arrives
+        parser = self.getStatusParser(port)
+        return max(parser.getWaitLength(), (len(pending) * (11 + data_length)) - parser.available())
+
+    def pollSyncReadRx(self, port, data_length, id_list, pending, status_dict, data):
+        # one step of syncReadRx(): COMM_RX_WAITING while IDs are pending and the timeout has not passed
+        parser = self.getStatusParser(port)
+        parser.feed(data)
+
+        monitor = getattr(port, 'monitor', None)
+        if monitor is not None and data:
+            monitor.onRead(port, data)
+        self.collectSyncReadPackets(parser, data_length, pending, status_dict, port)
+
+        if pending:
+            if not port.isPacketTimeout():
+                return status_dict, COMM_RX_WAITING
+            parser.clear()
+
+        status_dict, result = self.getSyncReadResult(id_list, pending, status_dict)
+        if monitor is not None:
+            monitor.onResult(port, result)
+        port.is_using = False
+
+        return status_dict, result
+
+    def collectSyncReadPackets(self, parser, data_length, pending, status_dict, port=None):
+        # moves the complete status packets of pending IDs from the parser into status_dict
+        # port: its monitor is told about every status packet
+        monitor = getattr(port, 'monitor', None)
+        while pending:
+            rxpacket, result = parser.getPacket()
+            if result == COMM_RX_WAITING:
+                break
+
+            dxl_id = rxpacket[PKT_ID]
+            if monitor is not None:
+                monitor.onFrame(port, dxl_id, result, rxpacket[PKT_ERROR] if result == COMM_SUCCESS else 0)
+            if dxl_id not in pending:
+                continue
+
+            if result == COMM_SUCCESS:
+                rxpacket = self.removeStuffing(rxpacket)
+                status_dict[dxl_id] = [self.getRxPacketData(rxpacket, data_length), COMM_SUCCESS, rxpacket[PKT_ERROR]]
+                del pending[dxl_id]
+            else:
+                # a later frame from the same ID may still arrive intact
+                pending[dxl_id] = COMM_RX_CORRUPT
+
+    def getSyncReadResult(self, id_list, pending, status_dict):
+        result = COMM_SUCCESS
+        for dxl_id in id_list:
+            if dxl_id in pending:
+                status_dict[dxl_id] = [bytearray(), pending[dxl_id], 0]
+                if result == COMM_SUCCESS:
+                    result = pending[dxl_id]
+
+        return status_dict, result
+
+    def makeSyncWritePacket(self, start_address, data_length, param, param_length):
+        # returns the packet and the index of its first parameter (ID) byte
+        txpacket = bytearray(param_length + 14)
         # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -747,12 +843,21 @@ class Protocol2PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = param[0: param_length]
 
+        return txpacket, PKT_PARAMETER0 + 4
+
+    def syncWritePacketTxOnly(self, port, txpacket):
+        # sends a packet from makeSyncWritePacket(), the CRC is recomputed and stuffing is applied to a copy
         _, result, _ = self.txRxPacket(port, txpacket)
 
         return result
 
+    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
+        txpacket, _ = self.makeSyncWritePacket(start_address, data_length, param, param_length)
+
+        return self.syncWritePacketTxOnly(port, txpacket)
+
     def bulkReadTx(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = bytearray(param_length + 10)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -774,7 +879,7 @@ class Protocol2PacketHandler(object):
         return result
 
     def bulkWriteTxOnly(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = bytearray(param_length + 10)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+
+
+class StatusPacketParser(object):
+    # Incremental status packet parser.
+    #
+    # Bytes are kept in a mirrored ring buffer: every byte is stored at i and at
+    # i + capacity, so the unread region is always one contiguous slice and header
+    # search / CRC can run on it directly. Discarding garbage only moves the read
+    # cursor, memory is never shifted.
+    #
+    # Subclasses define HEADER, MIN_LENGTH and
+    #   getFrameLength(buffer, idx)        total frame length of the candidate at buffer[idx],
+    #                                      -1 when its header fields are not valid
+    #   verifyFrame(packet, frame_length)  True when the checksum / CRC of the frame is right
+
+    HEADER = b''
+    MIN_LENGTH = 0
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * 2)
+        self.read_pos = 0
+        self.write_pos = 0
+        self.frame_length = self.MIN_LENGTH
+
+        self.packet_count = 0
+        self.corrupt_count = 0
+        self.discarded_bytes = 0
+        self.overflow_bytes = 0
+
+    def clear(self):
+        self.discarded_bytes += self.write_pos - self.read_pos
+        self.read_pos = self.write_pos
+        self.frame_length = self.MIN_LENGTH
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def getWaitLength(self):
+        # number of bytes still missing for the frame at the read cursor
+        wait_length = self.frame_length - (self.write_pos - self.read_pos)
+        return wait_length if wait_length > 0 else 0
+
+    def getFreeSpace(self):
+        return self.capacity - (self.write_pos - self.read_pos)
+
+    def feed(self, data):
+        length = len(data)
+        if length == 0:
+            return
+
+        capacity = self.capacity
+        data = memoryview(data)
+        if length > capacity:
+            self.overflow_bytes += length - capacity
+            data = data[length - capacity:]
+            length = capacity
+
+        overflow = (self.write_pos - self.read_pos) + length - capacity
+        if overflow > 0:
+            # keep the newest bytes
+            self.read_pos += overflow
+            self.overflow_bytes += overflow
+
+        buffer = self.buffer
+        start = self.write_pos % capacity
+        first = min(length, capacity - start)
+        buffer[start: start + first] = data[0: first]
+        buffer[start + capacity: start + capacity + first] = data[0: first]
+        if first < length:
+            rest = length - first
+            buffer[0: rest] = data[first: length]
+            buffer[capacity: capacity + rest] = data[first: length]
+
+        self.write_pos += length
+
+    def getPacket(self):
+        buffer = self.buffer
+        header = self.HEADER
+        min_length = self.MIN_LENGTH
+
+        while True:
+            start = self.read_pos % self.capacity
+            end = start + (self.write_pos - self.read_pos)
+
+            # find packet header
+            idx = buffer.find(header, start, end)
+            if idx == -1:
+                # keep the tail in case it holds the beginning of a header
+                idx = max(end - len(header) + 1, start)
+
+            if idx != start:
+                # remove unnecessary bytes
+                self.discarded_bytes += idx - start
+                self.read_pos += idx - start
+
+            rx_length = end - idx
+            if rx_length < min_length:
+                self.frame_length = min_length
+                return None, COMM_RX_WAITING
+
+            frame_length = self.getFrameLength(buffer, idx)
+            if frame_length < 0:
+                # not a status packet: skip the first byte of the header
+                self.discarded_bytes += 1
+                self.read_pos += 1
+                continue
+
+            if rx_length < frame_length:
+                self.frame_length = frame_length
+                return None, COMM_RX_WAITING
+
+            packet = buffer[idx: idx + frame_length]
+            self.frame_length = min_length
+
+            if self.verifyFrame(packet, frame_length):
+                self.read_pos += frame_length
+                self.packet_count += 1
+                return packet, COMM_SUCCESS
+
+            # resynchronise just after this header, a real frame may start inside the corrupt one
+            self.discarded_bytes += 1
+            self.read_pos += 1
+            self.corrupt_count += 1
+            return packet, COMM_RX_CORRUPT
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Bus topology kept on disk between runs.
+#
+# For every port the cache holds the baud rate, the protocol and per ID the model
+# number, firmware version, return delay time and status return level. warmStart()
+# checks the cached IDs with one sync read of the model numbers (protocol 2.0) or a
+# ping per ID (protocol 1.0, or servos that do not answer reads) and scans the bus
+# only when an ID is missing or reports another model. Servos added to the bus are
+# found by the next scan().
+#
+#   cache = TopologyCache('dxl_topology.json')
+#   servos, is_cached = cache.warmStart(port, ph, baudrate=57600)
+
+import json
+import os
+
+from .robotis_def import *
+from .group_sync_read import GroupSyncRead
+from .control_table import getControlTable
+from .discovery import discover
+
+CACHE_VERSION = 1
+
+# items kept per ID, read with the address of the model's control table. They are
+# the values read by the last scan(): status_return_level is in RAM on the X series
+# and back to its default after a power cycle, warmStart() does not write them back
+SETTING_NAMES = ['return_delay_time', 'status_return_level']
+
+
+class TopologyCache(object):
+    def __init__(self, path):
+        self.path = path
+        self.bus_dict = {}  # {port name: {'baudrate', 'protocol', 'servos': {id: {...}}}}
+
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            self.bus_dict = {}
+            return False
+
+        if data.get('version') != CACHE_VERSION:
+            self.bus_dict = {}
+            return False
+
+        self.bus_dict = {}
+        for port_name in data.get('ports', {}):
+            bus = data['ports'][port_name]
+            servos = {}
+            for dxl_id in bus['servos']:
+                servos[int(dxl_id)] = bus['servos'][dxl_id]  # JSON keys are strings
+            self.bus_dict[port_name] = {'baudrate': bus['baudrate'], 'protocol': bus['protocol'], 'servos': servos}
+        return True
+
+    def save(self):
+        data = {'version': CACHE_VERSION, 'ports': {}}
+        for port_name in self.bus_dict:
+            bus = self.bus_dict[port_name]
+            data['ports'][port_name] = {
+                'baudrate': bus['baudrate'],
+                'protocol': bus['protocol'],
+                'servos': dict((str(dxl_id), bus['servos'][dxl_id]) for dxl_id in bus['servos']),
+            }
+
+        # write aside and rename, an interrupted save leaves the previous cache
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as cache_file:
+            json.dump(data, cache_file, indent=1, sort_keys=True)
+        if hasattr(os, 'replace'):
+            os.replace(temp_path, self.path)
+        else:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp_path, self.path)
+
+    def getBus(self, port_name):
+        return self.bus_dict.get(port_name)
+
+    def getServos(self, port_name):
+        # {id: {'model_number', 'firmware_version', 'return_delay_time', 'status_return_level'}}
+        bus = self.bus_dict.get(port_name)
+        if bus is None:
+            return {}
+        return bus['servos']
+
+    def invalidate(self, port_name):
+        if self.bus_dict.pop(port_name, None) is not None:
+            self.save()
+
+    def readSettings(self, port, ph, dxl_id, model_number):
+        settings = {}
+        table = getControlTable(model_number)
+        for name in SETTING_NAMES:
+            settings[name] = None
+            if table is None or not table.hasField(name):
+                continue
+
+            value, result, error = ph.read1ByteTxRx(port, dxl_id, table.getAddress(name))
+            if result == COMM_SUCCESS and error == 0:
+                settings[name] = value
+        return settings
+
+    def scan(self, port, ph, **kwargs):
+        # discovers the bus at the current baud rate of the port and stores it, kwargs are discover() arguments
+        data_list, result = discover(port, ph, **kwargs)
+        if result != COMM_SUCCESS:
+            return result
+
+        servos = {}
+        for dxl_id in sorted(data_list):
+            model_number, firmware_version = data_list[dxl_id]
+            servo = {'model_number': model_number, 'firmware_version': firmware_version}
+            servo.update(self.readSettings(port, ph, dxl_id, model_number))
+            servos[dxl_id] = servo
+
+        self.bus_dict[port.getPortName()] = {
+            'baudrate': port.getBaudRate(),
+            'protocol': ph.getProtocolVersion(),
+            'servos': servos,
+        }
+        self.save()
+        return COMM_SUCCESS
+
+    def validate(self, port, ph):
+        # True when every cached ID answers with its cached model number, the port must be at the cached baud rate
+        bus = self.bus_dict.get(port.getPortName())
+        if bus is None or not bus['servos'] or bus['protocol'] != ph.getProtocolVersion():
+            return False
+        if port.getBaudRate() != bus['baudrate']:
+            return False
+
+        servos = bus['servos']
+
+        # the model number is at address 0 in every control table. A servo at status return level 0
+        # only answers ping, and the level may have changed since the scan (RAM on the X series):
+        # when the sync read gets no answer, the IDs are pinged
+        if ph.getProtocolVersion() != 1.0 and \
+                all(servos[dxl_id].get('status_return_level') != 0 for dxl_id in servos):
+            group_sync_read = GroupSyncRead(port, ph, 0, 2)
+            for dxl_id in servos:
+                group_sync_read.addParam(dxl_id)
+
+            if group_sync_read.txRxPacket() == COMM_SUCCESS:
+                for dxl_id in servos:
+                    if group_sync_read.getData(dxl_id, 0, 2) != servos[dxl_id]['model_number']:
+                        return False
+                return True
+
+        return self.validateByPing(port, ph, servos)
+
+    def validateByPing(self, port, ph, servos):
+        for dxl_id in servos:
+            model_number, result, _ = ph.ping(port, dxl_id)
+            if result != COMM_SUCCESS or model_number != servos[dxl_id]['model_number']:
+                return False
+        return True
+
+    def warmStart(self, port, ph, baudrate=None, **kwargs):
+        # returns (servos, is_cached): the cached servos when they are still there, otherwise a new scan()
+        #   baudrate  scan at this baud rate when the port is not cached, None keeps the current one
+        bus = self.bus_dict.get(port.getPortName())
+        if bus is not None and port.getBaudRate() != bus['baudrate']:
+            port.setBaudRate(bus['baudrate'])
+
+        if self.validate(port, ph):
+            return bus['servos'], True
+
+        if bus is None and baudrate is not None and port.getBaudRate() != baudrate:
+            port.setBaudRate(baudrate)
+
+        if self.scan(port, ph, **kwargs) != COMM_SUCCESS:
+            self.invalidate(port.getPortName())
+            return {}, False
+        return self.getServos(port.getPortName()), False
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Wire-level traffic log of a port and its replay.
+#
+# RecordingPortHandler is a PortHandler that writes every chunk given to writePort()
+# and returned by readPort() to a binary log, with the port clock time:
+#
+#   header  8s magic, H version, H reserved
+#   record  q time [ns], B kind (RECORD_WRITE / RECORD_READ / RECORD_BAUDRATE), I length, payload
+#
+# ReplayPortHandler plays a log back to the packet handlers: each writePort() takes the
+# next recorded instruction and the chunks read after it come back with their recorded
+# delay and size. On its default FakeClock the delays are simulated and the replay runs
+# as fast as possible; with realtime=True they are waited on the monotonic clock.
+#
+#   port = RecordingPortHandler('/dev/ttyUSB0', 'robot.dxltraffic')     # on the robot
+#   ...
+#   port.closePort()
+#   port.stopRecording()
+#
+#   port = ReplayPortHandler('robot.dxltraffic')                        # offline, same program
+
+import mmap
+import struct
+import sys
+import time
+
+from .port_handler import PortHandler
+from .clock import FakeClock, MonotonicClock
+
+TRAFFIC_LOG_MAGIC = b'DXLTRAF\x00'
+TRAFFIC_LOG_VERSION = 1
+
+RECORD_WRITE = 0
+RECORD_READ = 1
+RECORD_BAUDRATE = 2  # payload: I baud rate
+
+LOG_HEADER = struct.Struct('<8sHH')
+LOG_RECORD = struct.Struct('<qBI')
+
+
+class TrafficLogWriter(object):
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(LOG_HEADER.pack(TRAFFIC_LOG_MAGIC, TRAFFIC_LOG_VERSION, 0))
+
+    def write(self, kind, time_ns, data):
+        if self.file is None:
+            return
+        self.file.write(LOG_RECORD.pack(time_ns, kind, len(data)))
+        self.file.write(data)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TrafficLogReader(object):
+    def __init__(self, path):
+        with open(path, 'rb') as log_file:
+            header = log_file.read(LOG_HEADER.size)
+            if len(header) < LOG_HEADER.size:
+                raise ValueError("%s is not a traffic log" % path)
+            magic, version, _ = LOG_HEADER.unpack(header)
+            if magic != TRAFFIC_LOG_MAGIC:
+                raise ValueError("%s is not a traffic log" % path)
+            if version != TRAFFIC_LOG_VERSION:
+                raise ValueError("traffic log version %d is not supported" % version)
+
+            self.data = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def getRecords(self):
+        # (time [ns], kind, payload) in recorded order, a record cut by a crash ends the log
+        offset = LOG_HEADER.size
+        size = len(self.data)
+        while offset + LOG_RECORD.size <= size:
+            time_ns, kind, length = LOG_RECORD.unpack_from(self.data, offset)
+            offset += LOG_RECORD.size
+            if offset + length > size:
+                break
+            yield time_ns, kind, self.data[offset: offset + length]
+            offset += length
+
+    def getReadStream(self):
+        # every received byte, e.g. for the status packet parser
+        return bytearray().join(data for _, kind, data in self.getRecords() if kind == RECORD_READ)
+
+    def close(self):
+        self.data.close()
+
+
+class RecordingPortHandler(PortHandler):
+    def __init__(self, port_name, log_path, clock=None):
+        PortHandler.__init__(self, port_name, clock)
+        self.log = TrafficLogWriter(log_path)
+
+    def setupPort(self, cflag_baud):
+        if not PortHandler.setupPort(self, cflag_baud):
+            return False
+        self.log.write(RECORD_BAUDRATE, self.clock.getTimeNs(), struct.pack('<I', self.baudrate))
+        return True
+
+    def closePort(self):
+        # also called by setBaudRate(), the log stays open until stopRecording()
+        PortHandler.closePort(self)
+        self.log.flush()
+
+    def stopRecording(self):
+        self.log.close()
+
+    def readPort(self, length):
+        data = PortHandler.readPort(self, length)
+        if data:
+            self.log.write(RECORD_READ, self.last_read_ns, data)
+        return data
+
+    def writePort(self, packet):
+        written_length = PortHandler.writePort(self, packet)
+        self.log.write(RECORD_WRITE, self.last_write_ns, packet)
+        return written_length
+
+
+class ReplayPortHandler(PortHandler):
+    def __init__(self, log_path, realtime=False, clock=None):
+        if clock is None:
+            clock = MonotonicClock() if realtime else FakeClock()
+        PortHandler.__init__(self, log_path, clock)
+        self.is_simulated_time = hasattr(self.clock, 'setTimeNs')
+
+        self.transactions = []  # [recorded write time, instruction, [(recorded read time, data)]]
+        self.recorded_baudrate = None  # of the first instruction
+        leading = []  # read before the first instruction
+        reader = TrafficLogReader(log_path)
+        try:
+            for time_ns, kind, data in reader.getRecords():
+                if kind == RECORD_WRITE:
+                    self.transactions.append([time_ns, data, []])
+                elif kind == RECORD_READ:
+                    (self.transactions[-1][2] if self.transactions else leading).append((time_ns, data))
+                elif kind == RECORD_BAUDRATE and not self.transactions:
+                    self.recorded_baudrate = struct.unpack('<I', data)[0]
+        finally:
+            reader.close()
+
+        self.index = -1
+        self.rx_queue = [[0, data] for _, data in leading]  # [replay time, data]
+        self.mismatch_count = 0  # instructions that differ from the recorded ones
+
+        if self.recorded_baudrate is not None:
+            self.baudrate = self.recorded_baudrate
+
+    def isFinished(self):
+        return self.index + 1 >= len(self.transactions) and not self.rx_queue
+
+    def setupPort(self, cflag_baud):
+        self.is_open = True
+        if self.status_parser is not None:
+            self.status_parser.clear()
+
+        self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        pass
+
+    def getBytesAvailable(self):
+        now_ns = self.clock.getTimeNs()
+        return sum(len(chunk[1]) for chunk in self.rx_queue if chunk[0] <= now_ns)
+
+    def writePort(self, packet):
+        now_ns = self.clock.getTimeNs()
+        self.last_write_ns = now_ns
+
+        self.index += 1
+        if self.index >= len(self.transactions):
+            return len(packet)
+
+        write_ns, instruction, read_list = self.transactions[self.index]
+        if bytes(instruction) != bytes(packet):
+            self.mismatch_count += 1
+
+        # the reads keep their delay to the instruction
+        for read_ns, data in read_list:
+            self.rx_queue.append([now_ns + read_ns - write_ns, data])
+        return len(packet)
+
+    def waitData(self):
+        now_ns = self.clock.getTimeNs()
+        wake_ns = self.packet_deadline_ns + 1  # past the deadline so that isPacketTimeout() fires
+        if self.rx_queue:
+            wake_ns = min(wake_ns, self.rx_queue[0][0])
+        if wake_ns <= now_ns:
+            return
+
+        if self.is_simulated_time:
+            self.clock.setTimeNs(wake_ns)
+        elif self.is_blocking_read:
+            time.sleep((wake_ns - now_ns) / 1000000000.0)
+
+    def readPort(self, length):
+        if length > 0 and (self.is_blocking_read or self.is_simulated_time) and \
+                (not self.rx_queue or self.rx_queue[0][0] > self.clock.getTimeNs()):
+            self.waitData()
+
+        # at most one recorded chunk per call, the parser sees the recorded chunking
+        data = b''
+        if length > 0 and self.rx_queue and self.rx_queue[0][0] <= self.clock.getTimeNs():
+            chunk = self.rx_queue[0]
+            data = bytes(chunk[1][0: length])
+            if length < len(chunk[1]):
+                chunk[1] = chunk[1][length:]
+            else:
+                self.rx_queue.pop(0)
+            self.last_read_ns = self.clock.getTimeNs()
+
+        if (sys.version_info > (3, 0)):
+            return data
+        else:
+            return bytearray(data)
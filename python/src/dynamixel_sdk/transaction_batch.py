@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import threading
+
+from .robotis_def import *
+from .group_sync_read import GroupSyncRead
+from .group_sync_write import GroupSyncWrite
+from .group_bulk_read import GroupBulkRead
+from .group_bulk_write import GroupBulkWrite
+
+# groups kept for instruction layouts that repeat every cycle
+GROUP_CACHE_SIZE = 64
+
+
+class BatchRequest(object):
+    # One read or write queued in a TransactionBatch, completed by flush()
+    def __init__(self, dxl_id, address, length, data=None):
+        self.dxl_id = dxl_id
+        self.address = address
+        self.length = length
+        self.data = data  # write: bytes to write, read: bytes read
+        self.result = COMM_NOT_AVAILABLE
+        self.error = 0
+        self.done_event = threading.Event()
+
+    def setResult(self, result, error, data=None):
+        if data is not None:
+            self.data = data
+        self.result = result
+        self.error = error
+        self.done_event.set()
+
+    def isDone(self):
+        return self.done_event.is_set()
+
+    def wait(self, timeout=None):
+        # timeout [s], for requests queued on another thread than the one calling flush()
+        return self.done_event.wait(timeout)
+
+    def getValue(self):
+        # read data as a little endian unsigned value
+        if self.result != COMM_SUCCESS or not self.data:
+            return 0
+
+        value = 0
+        for i in range(len(self.data)):
+            value |= self.data[i] << (8 * i)
+        return value
+
+
+def mergeSpans(requests, max_span_length=None):
+    # {dxl_id: [[address, end, [(order, request)]]]}, overlapping or adjacent requests of an ID share a span;
+    # adjacent ones only while the span stays within max_span_length, overlapping ones always (a later write wins)
+    span_dict = {}
+    for order, request in sorted(enumerate(requests), key=lambda item: (item[1].dxl_id, item[1].address, item[0])):
+        spans = span_dict.setdefault(request.dxl_id, [])
+        end = request.address + request.length
+        if spans and (request.address < spans[-1][1] or
+                      (request.address == spans[-1][1] and
+                       (max_span_length is None or end - spans[-1][0] <= max_span_length))):
+            spans[-1][1] = max(spans[-1][1], end)
+            spans[-1][2].append((order, request))
+        else:
+            spans.append([request.address, end, [(order, request)]])
+    return span_dict
+
+
+def makeRounds(span_dict):
+    # a sync / bulk instruction carries one range per ID: round n holds the n-th span of every ID,
+    # ranges shared by more IDs come first so that they end up in the same round
+    range_count = {}
+    for dxl_id in span_dict:
+        for span in span_dict[dxl_id]:
+            range_count[(span[0], span[1])] = range_count.get((span[0], span[1]), 0) + 1
+
+    rounds = []
+    for dxl_id in span_dict:
+        spans = sorted(span_dict[dxl_id], key=lambda span: (-range_count[(span[0], span[1])], span[0]))
+        for n, span in enumerate(spans):
+            if n == len(rounds):
+                rounds.append({})
+            rounds[n][dxl_id] = span
+    return rounds
+
+
+class TransactionBatch(object):
+    # Coalesces single reads and writes into sync / bulk instructions.
+    #
+    # Requests are queued with addRead() / addWrite() (from any thread) and sent by
+    # flush(), typically once per control cycle or as a BusScheduler job. Requests
+    # of an ID that overlap or touch are merged into one address range, touching ones
+    # as long as the range fits in max_span_length bytes of one packet. Ranges
+    # shared by every ID of a round go out as GroupSyncRead / GroupSyncWrite, the
+    # others as GroupBulkRead / GroupBulkWrite, a lone ID as a plain readTxRx /
+    # writeTxRx. Writes are sent before reads, a later write to the same bytes wins.
+    #
+    #   batch = TransactionBatch(port, ph)
+    #   position = batch.addRead(1, 132, 4)
+    #   batch.addWrite4Byte(1, 116, 2048)
+    #   batch.flush()
+    #   position.result, position.getValue()
+    #
+    # Sync and bulk writes have no status packet, their requests only get the
+    # transmit result and no error. Protocol 1.0 has no sync read and no bulk
+    # write: shared ranges are read with bulk read (MX series and newer), which can
+    # be turned off with use_bulk_read = False for older models.
+    def __init__(self, port, ph):
+        self.port = port
+        self.ph = ph
+        self.use_bulk_read = True
+
+        if ph.getProtocolVersion() == 1.0:
+            self.max_span_length = 250 - 7  # write instruction packet: header, ID, length, instruction, address
+        else:
+            self.max_span_length = 1024 - 12
+
+        self.queue_lock = threading.Lock()
+        self.read_list = []
+        self.write_list = []
+        self.group_cache = {}
+
+        self.request_count = 0
+        self.instruction_count = 0
+
+    def addRead(self, dxl_id, address, length):
+        request = BatchRequest(dxl_id, address, length)
+        with self.queue_lock:
+            self.read_list.append(request)
+        return request
+
+    def addWrite(self, dxl_id, address, length, data):
+        if len(data) != length:
+            return None
+
+        request = BatchRequest(dxl_id, address, length, bytearray(data))
+        with self.queue_lock:
+            self.write_list.append(request)
+        return request
+
+    def addWrite1Byte(self, dxl_id, address, data):
+        return self.addWrite(dxl_id, address, 1, [data & 0xFF])
+
+    def addWrite2Byte(self, dxl_id, address, data):
+        return self.addWrite(dxl_id, address, 2, [DXL_LOBYTE(data), DXL_HIBYTE(data)])
+
+    def addWrite4Byte(self, dxl_id, address, data):
+        return self.addWrite(dxl_id, address, 4, [DXL_LOBYTE(DXL_LOWORD(data)),
+                                                  DXL_HIBYTE(DXL_LOWORD(data)),
+                                                  DXL_LOBYTE(DXL_HIWORD(data)),
+                                                  DXL_HIBYTE(DXL_HIWORD(data))])
+
+    def getPendingCount(self):
+        with self.queue_lock:
+            return len(self.read_list) + len(self.write_list)
+
+    def flush(self):
+        # sends the queued requests, returns COMM_SUCCESS or the last failed result
+        with self.queue_lock:
+            write_list, self.write_list = self.write_list, []
+            read_list, self.read_list = self.read_list, []
+
+        self.request_count += len(write_list) + len(read_list)
+        result = COMM_SUCCESS
+
+        for spans in makeRounds(mergeSpans(write_list, self.max_span_length)):
+            round_result = self.writeRound(spans)
+            if round_result != COMM_SUCCESS:
+                result = round_result
+
+        for spans in makeRounds(mergeSpans(read_list, self.max_span_length)):
+            round_result = self.readRound(spans)
+            if round_result != COMM_SUCCESS:
+                result = round_result
+
+        return result
+
+    def getGroup(self, key, make_group):
+        group = self.group_cache.get(key)
+        if group is None:
+            if len(self.group_cache) >= GROUP_CACHE_SIZE:
+                self.group_cache.clear()
+            group = make_group()
+            self.group_cache[key] = group
+        return group
+
+    def writeRound(self, spans):
+        data_dict = {}
+        for dxl_id in spans:
+            address, end, requests = spans[dxl_id]
+            data = bytearray(end - address)
+            for _, request in sorted(requests, key=lambda item: item[0]):
+                offset = request.address - address
+                data[offset: offset + request.length] = request.data
+            data_dict[dxl_id] = data
+
+        id_list = list(spans)
+        range_set = set((spans[dxl_id][0], spans[dxl_id][1]) for dxl_id in id_list)
+
+        if len(id_list) == 1:
+            dxl_id = id_list[0]
+            address, end, _ = spans[dxl_id]
+            self.instruction_count += 1
+            result, error = self.ph.writeTxRx(self.port, dxl_id, address, end - address, data_dict[dxl_id])
+            self.setWriteResult(spans[dxl_id], result, error)
+            return result
+
+        if len(range_set) == 1:
+            address, end = range_set.pop()
+            group = self.getGroup(('sync_write', address, end, tuple(id_list)),
+                                  lambda: GroupSyncWrite(self.port, self.ph, address, end - address))
+            for dxl_id in id_list:
+                if not group.changeParam(dxl_id, data_dict[dxl_id]):
+                    group.addParam(dxl_id, data_dict[dxl_id])
+
+        elif self.ph.getProtocolVersion() != 1.0:
+            layout = tuple((dxl_id, spans[dxl_id][0], spans[dxl_id][1]) for dxl_id in id_list)
+            group = self.getGroup(('bulk_write', layout), lambda: GroupBulkWrite(self.port, self.ph))
+            for dxl_id, address, end in layout:
+                if not group.changeParam(dxl_id, address, end - address, data_dict[dxl_id]):
+                    group.addParam(dxl_id, address, end - address, data_dict[dxl_id])
+
+        else:
+            # no bulk write in protocol 1.0, one sync write per range
+            result = COMM_SUCCESS
+            for address, end in range_set:
+                range_result = self.writeRound(dict((dxl_id, spans[dxl_id]) for dxl_id in id_list
+                                                    if spans[dxl_id][0] == address and spans[dxl_id][1] == end))
+                if range_result != COMM_SUCCESS:
+                    result = range_result
+            return result
+
+        self.instruction_count += 1
+        result = group.txPacket()
+        for dxl_id in id_list:
+            self.setWriteResult(spans[dxl_id], result, 0)
+        return result
+
+    def setWriteResult(self, span, result, error):
+        for _, request in span[2]:
+            request.setResult(result, error)
+
+    def readRound(self, spans):
+        id_list = list(spans)
+        range_set = set((spans[dxl_id][0], spans[dxl_id][1]) for dxl_id in id_list)
+        is_protocol1 = self.ph.getProtocolVersion() == 1.0
+
+        if len(id_list) > 1 and len(range_set) == 1 and not is_protocol1:
+            address, end = range_set.pop()
+            group = self.getGroup(('sync_read', address, end, tuple(id_list)),
+                                  lambda: GroupSyncRead(self.port, self.ph, address, end - address))
+            if not group.data_dict:
+                for dxl_id in id_list:
+                    group.addParam(dxl_id)
+
+            self.instruction_count += 1
+            result = group.txRxPacket()
+            for dxl_id in id_list:
+                id_result = group.result_dict.get(dxl_id, result)
+                self.setReadResult(spans[dxl_id], group.data_dict[dxl_id], id_result, group.getError(dxl_id))
+            return result
+
+        if len(id_list) > 1 and self.use_bulk_read:
+            layout = tuple((dxl_id, spans[dxl_id][0], spans[dxl_id][1]) for dxl_id in id_list)
+            group = self.getGroup(('bulk_read', layout), lambda: GroupBulkRead(self.port, self.ph))
+            if not group.data_dict:
+                for dxl_id, address, end in layout:
+                    group.addParam(dxl_id, address, end - address)
+
+            self.instruction_count += 1
+            result = group.txRxPacket()
+            for dxl_id in id_list:
+                id_result = group.result_dict.get(dxl_id, result)
+                self.setReadResult(spans[dxl_id], group.data_dict[dxl_id][0], id_result, group.getError(dxl_id))
+            return result
+
+        result = COMM_SUCCESS
+        for dxl_id in id_list:
+            address, end, _ = spans[dxl_id]
+            self.instruction_count += 1
+            data, id_result, error = self.ph.readTxRxBuffer(self.port, dxl_id, address, end - address)
+            self.setReadResult(spans[dxl_id], data, id_result, error)
+            if id_result != COMM_SUCCESS:
+                result = id_result
+        return result
+
+    def setReadResult(self, span, data, result, error):
+        address = span[0]
+        for _, request in span[2]:
+            if result == COMM_SUCCESS:
+                offset = request.address - address
+                request.setResult(result, error, bytearray(data[offset: offset + request.length]))
+            else:
+                request.setResult(result, error, bytearray())
+
+    def getStats(self):
+        # requests queued and instructions sent by flush() so far
+        return {
+            'requests': self.request_count,
+            'instructions': self.instruction_count,
+        }
+
+    def resetStats(self):
+        self.request_count = 0
+        self.instruction_count = 0
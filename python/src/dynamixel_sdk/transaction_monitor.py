@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Latency and error statistics of the transactions of a port.
+#
+# The packet handlers report the steps of a transaction to the monitor of the port,
+# with the port clock time:
+#
+#   onTxStart(port, dxl_id, instruction)   txPacket() got the port
+#   onTxEnd(port, result, length)          instruction packet of length bytes written (or failed)
+#   onRead(port, data)                     bytes received, the first ones give the wait time
+#   onFrame(port, dxl_id, result, error)   status packet complete and its CRC / checksum checked
+#   onResult(port, result)                 result of the receive
+#   onRelease(port)                        transaction over, port released or unlocked
+#
+# A group read holding the port with lockPort() (GroupBulkRead) is one transaction
+# until unlockPort(). TransactionMonitor puts the phases into histograms per instruction
+# and ID; subclass it and extend the on* methods for callbacks of your own. Without a
+# monitor each step costs one attribute test.
+#
+#   monitor = TransactionMonitor()
+#   port.setMonitor(monitor)
+#   ...
+#   print(monitor.getStats()['instructions']['sync_read']['phases']['total']['p99_us'])
+#
+# The monitor has no lock: its events come from the thread holding the port, so they
+# never overlap. getStats() from another thread sees the counts of a moment.
+
+from .robotis_def import *
+
+INSTRUCTION_NAMES = {
+    INST_PING: 'ping',
+    INST_READ: 'read',
+    INST_WRITE: 'write',
+    INST_REG_WRITE: 'reg_write',
+    INST_ACTION: 'action',
+    INST_FACTORY_RESET: 'factory_reset',
+    INST_REBOOT: 'reboot',
+    INST_CLEAR: 'clear',
+    INST_SYNC_READ: 'sync_read',
+    INST_SYNC_WRITE: 'sync_write',
+    INST_BULK_READ: 'bulk_read',
+    INST_BULK_WRITE: 'bulk_write',
+}
+
+# tx: writing the instruction packet
+# wait: instruction written .. first status byte (wire time, return delay time, USB latency)
+# receive: first status byte .. last status packet complete
+# parse: last bytes read .. their status packet complete
+# total: txPacket() .. end of the transaction
+PHASE_NAMES = ('tx', 'wait', 'receive', 'parse', 'total')
+
+SUB_BUCKET_BITS = 2  # 4 buckets per power of two: at most 25 % between bucket bounds
+BUCKET_COUNT = 100  # last bucket from about 58 s
+
+
+def getBucket(value_us):
+    if value_us < (1 << SUB_BUCKET_BITS):
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    bucket = ((shift + 1) << SUB_BUCKET_BITS) + (value_us >> shift) - (1 << SUB_BUCKET_BITS)
+    return min(bucket, BUCKET_COUNT - 1)
+
+
+def getBucketValue(bucket):
+    # lowest [us] of a bucket
+    if bucket < (1 << SUB_BUCKET_BITS):
+        return bucket
+    shift = (bucket >> SUB_BUCKET_BITS) - 1
+    return ((bucket & ((1 << SUB_BUCKET_BITS) - 1)) + (1 << SUB_BUCKET_BITS)) << shift
+
+
+class LatencyHistogram(object):
+    # log-linear histogram of durations, fixed size
+    def __init__(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def add(self, value_ns):
+        # a bucket holds the durations above its lowest value up to the lowest value of the next one,
+        # so counting whole buckets gives the samples <= a bucket bound (the 'le' of Prometheus)
+        if value_ns < 0:
+            value_ns = 0
+        self.buckets[getBucket((value_ns - 1) // 1000 if value_ns else 0)] += 1
+        self.count += 1
+        self.sum_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def getPercentile(self, fraction):
+        # [us], lower bound of the bucket holding the fraction of the samples
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        total = 0
+        for bucket, count in enumerate(self.buckets):
+            total += count
+            if total >= rank and count:
+                return float(getBucketValue(bucket))
+        return self.max_ns / 1000.0
+
+    def getMean(self):
+        # [us]
+        return self.sum_ns / 1000.0 / self.count if self.count else 0.0
+
+    def getStats(self):
+        return {
+            'count': self.count,
+            'mean_us': self.getMean(),
+            'p50_us': self.getPercentile(0.50),
+            'p99_us': self.getPercentile(0.99),
+            'max_us': self.max_ns / 1000.0,
+        }
+
+
+class InstructionStats(object):
+    def __init__(self):
+        self.phases = dict((name, LatencyHistogram()) for name in PHASE_NAMES)
+        self.results = {}  # {COMM_* result: count}
+        self.foreign_frames = 0  # status packets of another ID than addressed (unicast)
+
+
+class IdStats(object):
+    def __init__(self):
+        self.latency = LatencyHistogram()  # txPacket() .. status packet of this ID
+        self.results = {}  # {COMM_* result: count}, COMM_RX_CORRUPT for each broken frame
+        self.error_count = 0  # status packets with an error byte
+        self.error_dict = {}  # {error byte: count}, see getRxPacketError()
+
+
+class Transaction(object):
+    def __init__(self, dxl_id, instruction, start_ns):
+        self.dxl_id = dxl_id
+        self.instruction = instruction
+        self.start_ns = start_ns
+        self.tx_end_ns = None
+        self.first_read_ns = None
+        self.last_read_ns = None
+        self.last_frame_ns = None
+        self.end_ns = start_ns  # last event
+        self.parse_ns = 0
+        self.result = None
+
+
+class TransactionMonitor(object):
+    def __init__(self):
+        self.instruction_stats = {}  # {instruction: InstructionStats}
+        self.id_stats = {}  # {id: IdStats}
+        self.current = None
+
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.wire_ns = 0  # time the counted bytes took on the wire at the baud rate of the port
+
+    def reset(self):
+        self.instruction_stats = {}
+        self.id_stats = {}
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.wire_ns = 0
+
+    def getInstructionStats(self, instruction):
+        stats = self.instruction_stats.get(instruction)
+        if stats is None:
+            stats = self.instruction_stats[instruction] = InstructionStats()
+        return stats
+
+    def getIdStats(self, dxl_id):
+        stats = self.id_stats.get(dxl_id)
+        if stats is None:
+            stats = self.id_stats[dxl_id] = IdStats()
+        return stats
+
+    def onTxStart(self, port, dxl_id, instruction):
+        if self.current is not None:
+            self.finish(self.current)
+        self.current = Transaction(dxl_id, instruction, port.clock.getTimeNs())
+
+    def onTxEnd(self, port, result, length):
+        self.tx_bytes += length
+        self.wire_ns += int(length * port.tx_time_per_byte * 1000000)
+
+        transaction = self.current
+        if transaction is None:
+            return
+        transaction.tx_end_ns = transaction.end_ns = port.clock.getTimeNs()
+        if result != COMM_SUCCESS:
+            transaction.result = result
+
+    def onRead(self, port, data):
+        self.rx_bytes += len(data)
+        self.wire_ns += int(len(data) * port.tx_time_per_byte * 1000000)
+
+        transaction = self.current
+        if transaction is None:
+            return
+        now_ns = port.clock.getTimeNs()
+        if transaction.first_read_ns is None:
+            transaction.first_read_ns = now_ns
+        transaction.last_read_ns = now_ns
+
+    def onFrame(self, port, dxl_id, result, error):
+        transaction = self.current
+        if transaction is None:
+            return
+        now_ns = port.clock.getTimeNs()
+        transaction.last_frame_ns = transaction.end_ns = now_ns
+        if transaction.last_read_ns is not None:
+            transaction.parse_ns = now_ns - transaction.last_read_ns
+
+        stats = self.getIdStats(dxl_id)
+        stats.results[result] = stats.results.get(result, 0) + 1
+        if result == COMM_SUCCESS:
+            stats.latency.add(now_ns - transaction.start_ns)
+            if error:
+                stats.error_count += 1
+                stats.error_dict[error] = stats.error_dict.get(error, 0) + 1
+            if transaction.dxl_id != BROADCAST_ID and dxl_id != transaction.dxl_id:
+                self.getInstructionStats(transaction.instruction).foreign_frames += 1
+
+    def onResult(self, port, result):
+        # the first failure of the transaction is kept
+        transaction = self.current
+        if transaction is None:
+            return
+        transaction.end_ns = port.clock.getTimeNs()
+        if transaction.result in (None, COMM_SUCCESS):
+            transaction.result = result
+
+    def onRelease(self, port):
+        # a port locked over several transactions ends them at the last unlockPort()
+        if self.current is not None and port.port_lock.depth == 0:
+            self.finish(self.current)
+
+    def finish(self, transaction):
+        self.current = None
+        if transaction.result in (None, COMM_SUCCESS) and transaction.tx_end_ns is None:
+            transaction.result = COMM_TX_FAIL
+
+        stats = self.getInstructionStats(transaction.instruction)
+        result = COMM_SUCCESS if transaction.result is None else transaction.result
+        stats.results[result] = stats.results.get(result, 0) + 1
+
+        phases = stats.phases
+        phases['total'].add(transaction.end_ns - transaction.start_ns)
+        if transaction.tx_end_ns is not None:
+            phases['tx'].add(transaction.tx_end_ns - transaction.start_ns)
+            if transaction.first_read_ns is not None:
+                phases['wait'].add(transaction.first_read_ns - transaction.tx_end_ns)
+        if transaction.first_read_ns is not None and transaction.last_frame_ns is not None:
+            phases['receive'].add(transaction.last_frame_ns - transaction.first_read_ns)
+            phases['parse'].add(transaction.parse_ns)
+
+        if transaction.dxl_id != BROADCAST_ID and result != COMM_SUCCESS:
+            # a unicast that got no status packet counts for the addressed ID
+            id_stats = self.getIdStats(transaction.dxl_id)
+            if transaction.last_frame_ns is None:
+                id_stats.results[result] = id_stats.results.get(result, 0) + 1
+
+    def getStats(self):
+        # {'instructions': {name: {...}}, 'ids': {id: {...}}}, durations in [us]
+        instructions = {}
+        for instruction in list(self.instruction_stats):
+            stats = self.instruction_stats[instruction]
+            instructions[INSTRUCTION_NAMES.get(instruction, str(instruction))] = {
+                'count': sum(stats.results.values()),
+                'results': dict(stats.results),
+                'foreign_frames': stats.foreign_frames,
+                'phases': dict((name, stats.phases[name].getStats()) for name in PHASE_NAMES),
+            }
+
+        ids = {}
+        for dxl_id in list(self.id_stats):
+            stats = self.id_stats[dxl_id]
+            ids[dxl_id] = {
+                'results': dict(stats.results),
+                'error_count': stats.error_count,
+                'errors': dict(stats.error_dict),
+                'latency': stats.latency.getStats(),
+            }
+        return {
+            'instructions': instructions,
+            'ids': ids,
+            'tx_bytes': self.tx_bytes,
+            'rx_bytes': self.rx_bytes,
+            'wire_s': self.wire_ns / 1000000000.0,
+        }
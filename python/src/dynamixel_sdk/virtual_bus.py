@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Simulated DYNAMIXEL bus.
+#
+# A VirtualBus holds VirtualDevice objects with a control table from the
+# control_table registry. It takes instruction packets, answers them like the
+# servos do (status return level, return delay time, ID order of sync / bulk reads
+# and broadcast pings) and schedules every status byte at the baud rate of the bus.
+#
+# VirtualPortHandler is a PortHandler on a VirtualBus, in-process. With a FakeClock
+# the simulated time jumps to the next byte or timeout whenever a read would wait,
+# so a run is deterministic and takes the wire time the packets would take:
+#
+#   clock = FakeClock()
+#   bus = VirtualBus(2.0, 1000000, clock)
+#   for dxl_id in range(1, 7):
+#       bus.addDevice(VirtualDevice(dxl_id, 1020))
+#   port = VirtualPortHandler(bus)
+#   port.openPort()
+#
+# VirtualBusServer serves a bus on a Linux pty pair for programs that open a device name.
+
+import os
+import select
+import sys
+import threading
+import time
+
+from .robotis_def import *
+from .port_handler import PortHandler, DEFAULT_BAUDRATE
+from .packet_handler import PacketHandler
+from .control_table import getControlTable
+from .clock import MonotonicClock
+from .discovery import PING_SLOT_TIME
+
+MEMORY_SIZE = 1024
+
+# (written item, item following it) of the simulated motor
+FOLLOW_FIELDS = [
+    ('goal_position', 'present_position'),
+    ('goal_velocity', 'present_velocity'),
+    ('goal_current', 'present_current'),
+]
+
+# status packet error of an address out of the control table
+PROTOCOL1_RANGE_ERROR = 0x08
+PROTOCOL2_ACCESS_ERROR = 0x07
+
+
+class VirtualDevice(object):
+    def __init__(self, dxl_id, model_number=1020, firmware_version=45):
+        self.table = getControlTable(model_number)
+        if self.table is None:
+            raise ValueError("no control table for model number %d" % model_number)
+
+        self.memory = bytearray(MEMORY_SIZE)
+        self.registered = None  # (address, data) of a REG_WRITE waiting for ACTION
+
+        self.setValue('model_number', model_number)
+        self.setValue('firmware_version', firmware_version)
+        self.setValue('id', dxl_id)
+        self.setValue('return_delay_time', 250)  # factory default 500 us
+        self.setValue('status_return_level', 2)
+
+        self.follow_list = []
+        for goal_name, present_name in FOLLOW_FIELDS:
+            if self.table.hasField(goal_name) and self.table.hasField(present_name):
+                self.follow_list.append((self.table.getField(goal_name), self.table.getField(present_name)))
+
+    def setValue(self, name, value):
+        # raw value of a control table item
+        field = self.table.getField(name)
+        if field is not None:
+            field.struct.pack_into(self.memory, field.address, value)
+
+    def getValue(self, name):
+        field = self.table.getField(name)
+        if field is None:
+            return None
+        return field.struct.unpack_from(self.memory, field.address)[0]
+
+    def getId(self):
+        return self.getValue('id')
+
+    def getModelNumber(self):
+        return self.getValue('model_number')
+
+    def getFirmwareVersion(self):
+        return self.getValue('firmware_version')
+
+    def getReturnDelayNs(self):
+        return int(self.getValue('return_delay_time') * 2000)  # 2 us unit
+
+    def getStatusReturnLevel(self):
+        level = self.getValue('status_return_level')
+        return 2 if level is None else level
+
+    def read(self, address, length):
+        if address + length > MEMORY_SIZE:
+            return None
+        return self.memory[address: address + length]
+
+    def write(self, address, data):
+        if address + len(data) > MEMORY_SIZE:
+            return False
+
+        self.memory[address: address + len(data)] = data
+
+        # the simulated motor reaches a goal at once
+        for goal, present in self.follow_list:
+            if address <= goal.address and goal.address + goal.width <= address + len(data):
+                self.memory[present.address: present.address + present.width] = \
+                    self.memory[goal.address: goal.address + goal.width]
+        return True
+
+
+class VirtualBus(object):
+    def __init__(self, protocol_version=2.0, baudrate=DEFAULT_BAUDRATE, clock=None, usb_latency=0.0):
+        self.ph = PacketHandler(protocol_version)
+        self.is_protocol1 = protocol_version == 1.0
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.lock = threading.RLock()
+
+        self.devices = []
+        self.baudrate = baudrate
+        self.byte_time_ns = int(10 * 1000000000 / baudrate)  # 8N1
+        self.usb_latency_ns = int(usb_latency * 1000000)  # [ms] added to every received byte
+
+        self.instruction_buffer = bytearray()
+        self.segments = []  # [[start_ns, status packet bytes, bytes already read]]
+        self.line_free_ns = 0  # end of the last byte on the wire
+
+        self.instruction_count = 0
+        self.status_count = 0
+
+    def addDevice(self, device):
+        with self.lock:
+            self.devices.append(device)
+
+    def removeDevice(self, dxl_id):
+        with self.lock:
+            self.devices = [device for device in self.devices if device.getId() != dxl_id]
+
+    def getDevice(self, dxl_id):
+        for device in self.devices:
+            if device.getId() == dxl_id:
+                return device
+        return None
+
+    def setBaudRate(self, baudrate):
+        self.baudrate = baudrate
+        self.byte_time_ns = int(10 * 1000000000 / baudrate)
+
+    def clear(self):
+        with self.lock:
+            self.instruction_buffer = bytearray()
+            self.segments = []
+
+    def write(self, data, now_ns):
+        # instruction bytes sent by the host at now_ns, returns the time the last byte is on the wire
+        with self.lock:
+            end_ns = max(now_ns, self.line_free_ns) + len(data) * self.byte_time_ns
+            self.line_free_ns = end_ns
+
+            self.instruction_buffer += data
+            while True:
+                instruction = self.takeInstruction()
+                if instruction is None:
+                    break
+                self.instruction_count += 1
+                self.dispatch(instruction, end_ns)
+
+            return end_ns
+
+    def getByteReadyNs(self, segment, index):
+        return segment[0] + (index + 1) * self.byte_time_ns + self.usb_latency_ns
+
+    def available(self, now_ns):
+        with self.lock:
+            count = 0
+            for segment in self.segments:
+                ready = (now_ns - segment[0] - self.usb_latency_ns) // self.byte_time_ns
+                count += max(0, min(len(segment[1]), ready) - segment[2])
+            return count
+
+    def getReadyNs(self, length):
+        # time at which length more bytes can be read, or the last pending byte; None when nothing is pending
+        with self.lock:
+            for segment in self.segments:
+                pending = len(segment[1]) - segment[2]
+                if length <= pending:
+                    return self.getByteReadyNs(segment, segment[2] + length - 1)
+                length -= pending
+            if not self.segments:
+                return None
+            last = self.segments[-1]
+            return self.getByteReadyNs(last, len(last[1]) - 1)
+
+    def read(self, length, now_ns):
+        with self.lock:
+            data = bytearray()
+            while self.segments and len(data) < length:
+                segment = self.segments[0]
+                ready = min(len(segment[1]), (now_ns - segment[0] - self.usb_latency_ns) // self.byte_time_ns)
+                count = min(ready - segment[2], length - len(data))
+                if count <= 0:
+                    break
+
+                data += segment[1][segment[2]: segment[2] + count]
+                segment[2] += count
+                if segment[2] == len(segment[1]):
+                    self.segments.pop(0)
+            return data
+
+    def takeInstruction(self):
+        # (id, instruction, parameters) of the next complete instruction packet, corrupt packets are dropped
+        buffer = self.instruction_buffer
+        if self.is_protocol1:
+            while True:
+                idx = buffer.find(b'\xFF\xFF')
+                if idx == -1:
+                    del buffer[0: max(0, len(buffer) - 1)]
+                    return None
+                del buffer[0: idx]
+                if len(buffer) < 4:
+                    return None
+                packet_length = buffer[3] + 4
+                if len(buffer) < packet_length:
+                    return None
+
+                packet = buffer[0: packet_length]
+                if (~sum(packet[2: -1])) & 0xFF == packet[-1]:
+                    del buffer[0: packet_length]
+                    return packet[2], packet[4], packet[5: -1]
+                del buffer[0: 2]
+
+        while True:
+            idx = buffer.find(b'\xFF\xFF\xFD\x00')
+            if idx == -1:
+                del buffer[0: max(0, len(buffer) - 3)]
+                return None
+            del buffer[0: idx]
+            if len(buffer) < 7:
+                return None
+            packet_length = DXL_MAKEWORD(buffer[5], buffer[6]) + 7
+            if len(buffer) < packet_length:
+                return None
+
+            packet = buffer[0: packet_length]
+            crc = DXL_MAKEWORD(packet[-2], packet[-1])
+            if self.ph.updateCRC(0, packet, packet_length - 2) == crc:
+                del buffer[0: packet_length]
+                packet = self.ph.removeStuffing(packet)
+                return packet[4], packet[7], packet[8: -2]
+            del buffer[0: 4]
+
+    def makeStatusPacket(self, device, error, params):
+        dxl_id = device.getId()
+        if self.is_protocol1:
+            packet = bytearray([0xFF, 0xFF, dxl_id, len(params) + 2, error])
+            packet += params
+            packet.append((~sum(packet[2:])) & 0xFF)
+            return packet
+
+        length = len(params) + 4
+        packet = bytearray([0xFF, 0xFF, 0xFD, 0x00, dxl_id, DXL_LOBYTE(length), DXL_HIBYTE(length), INST_STATUS,
+                            error])
+        packet += params
+        packet += b'\x00\x00'
+        packet = self.ph.addStuffing(packet)
+        crc = self.ph.updateCRC(0, packet, len(packet) - 2)
+        packet[-2] = DXL_LOBYTE(crc)
+        packet[-1] = DXL_HIBYTE(crc)
+        return packet
+
+    def getAddress(self, params, idx):
+        if self.is_protocol1:
+            return params[idx]
+        return DXL_MAKEWORD(params[idx], params[idx + 1])
+
+    def dispatch(self, instruction, end_ns):
+        dxl_id, inst, params = instruction
+        word = 1 if self.is_protocol1 else 2  # width of address and length parameters
+        answers = []  # [(device, status packet, earliest start)]
+
+        if inst == INST_PING:
+            if dxl_id == BROADCAST_ID:
+                if not self.is_protocol1:
+                    # answers come in ID order, one answer slot per ID
+                    for device in sorted(self.devices, key=lambda device: device.getId()):
+                        model_number = device.getModelNumber()
+                        params = bytearray([DXL_LOBYTE(model_number), DXL_HIBYTE(model_number),
+                                            device.getFirmwareVersion()])
+                        slot_ns = int(device.getId() * PING_SLOT_TIME * 1000000)
+                        answers.append((device, self.makeStatusPacket(device, 0, params), end_ns + slot_ns))
+            else:
+                device = self.getDevice(dxl_id)
+                if device is not None:
+                    if self.is_protocol1:
+                        params = bytearray()
+                    else:
+                        model_number = device.getModelNumber()
+                        params = bytearray([DXL_LOBYTE(model_number), DXL_HIBYTE(model_number),
+                                            device.getFirmwareVersion()])
+                    answers.append((device, self.makeStatusPacket(device, 0, params), end_ns))
+
+        elif inst == INST_READ:
+            device = self.getDevice(dxl_id)
+            if device is not None and device.getStatusReturnLevel() >= 1:
+                address = self.getAddress(params, 0)
+                length = self.getAddress(params, word)
+                answers.append((device, self.makeReadStatus(device, address, length), end_ns))
+
+        elif inst in (INST_WRITE, INST_REG_WRITE):
+            address = self.getAddress(params, 0)
+            data = params[word:]
+            for device in self.getTargets(dxl_id):
+                if inst == INST_WRITE:
+                    error = 0 if device.write(address, data) else self.getRangeError()
+                else:
+                    device.registered = (address, data)
+                    error = 0
+                if dxl_id != BROADCAST_ID and device.getStatusReturnLevel() >= 2:
+                    answers.append((device, self.makeStatusPacket(device, error, bytearray()), end_ns))
+
+        elif inst == INST_ACTION:
+            for device in self.getTargets(dxl_id):
+                if device.registered is not None:
+                    device.write(*device.registered)
+                    device.registered = None
+                if dxl_id != BROADCAST_ID and device.getStatusReturnLevel() >= 2:
+                    answers.append((device, self.makeStatusPacket(device, 0, bytearray()), end_ns))
+
+        elif inst in (INST_REBOOT, INST_CLEAR, INST_FACTORY_RESET):
+            device = self.getDevice(dxl_id)
+            if device is not None and device.getStatusReturnLevel() >= 2:
+                answers.append((device, self.makeStatusPacket(device, 0, bytearray()), end_ns))
+
+        elif inst == INST_SYNC_READ and not self.is_protocol1:
+            address = self.getAddress(params, 0)
+            length = self.getAddress(params, 2)
+            for target_id in params[4:]:
+                device = self.getDevice(target_id)
+                if device is not None and device.getStatusReturnLevel() >= 1:
+                    answers.append((device, self.makeReadStatus(device, address, length), end_ns))
+
+        elif inst == INST_SYNC_WRITE:
+            address = self.getAddress(params, 0)
+            length = self.getAddress(params, word)
+            idx = 2 * word
+            while idx + 1 + length <= len(params):
+                device = self.getDevice(params[idx])
+                if device is not None:
+                    device.write(address, params[idx + 1: idx + 1 + length])
+                idx += 1 + length
+
+        elif inst == INST_BULK_READ:
+            if self.is_protocol1:
+                entries = [(params[idx + 1], params[idx + 2], params[idx]) for idx in range(1, len(params) - 2, 3)]
+            else:
+                entries = [(params[idx], DXL_MAKEWORD(params[idx + 1], params[idx + 2]),
+                            DXL_MAKEWORD(params[idx + 3], params[idx + 4])) for idx in range(0, len(params) - 4, 5)]
+            for target_id, address, length in entries:
+                device = self.getDevice(target_id)
+                if device is not None and device.getStatusReturnLevel() >= 1:
+                    answers.append((device, self.makeReadStatus(device, address, length), end_ns))
+
+        elif inst == INST_BULK_WRITE and not self.is_protocol1:
+            idx = 0
+            while idx + 5 <= len(params):
+                address = DXL_MAKEWORD(params[idx + 1], params[idx + 2])
+                length = DXL_MAKEWORD(params[idx + 3], params[idx + 4])
+                device = self.getDevice(params[idx])
+                if device is not None:
+                    device.write(address, params[idx + 5: idx + 5 + length])
+                idx += 5 + length
+
+        # status packets go one after the other, each after the return delay time of its device
+        start_ns = max(end_ns, self.line_free_ns)
+        for device, packet, earliest_ns in answers:
+            start_ns = max(start_ns, earliest_ns) + device.getReturnDelayNs()
+            self.segments.append([start_ns, packet, 0])
+            start_ns += len(packet) * self.byte_time_ns
+            self.status_count += 1
+        self.line_free_ns = max(self.line_free_ns, start_ns)
+
+    def getTargets(self, dxl_id):
+        if dxl_id == BROADCAST_ID:
+            return list(self.devices)
+        device = self.getDevice(dxl_id)
+        return [device] if device is not None else []
+
+    def getRangeError(self):
+        return PROTOCOL1_RANGE_ERROR if self.is_protocol1 else PROTOCOL2_ACCESS_ERROR
+
+    def makeReadStatus(self, device, address, length):
+        data = device.read(address, length)
+        if data is None:
+            return self.makeStatusPacket(device, self.getRangeError(), bytearray())
+        return self.makeStatusPacket(device, 0, data)
+
+
+class VirtualPortHandler(PortHandler):
+    # PortHandler on a VirtualBus, the port and the bus must run at the same baud rate to talk
+    def __init__(self, bus, port_name='virtual', clock=None):
+        PortHandler.__init__(self, port_name, clock if clock is not None else bus.clock)
+        self.bus = bus
+        # a manually driven clock is moved forward by the port instead of waiting
+        self.is_simulated_time = hasattr(self.clock, 'setTimeNs')
+
+    def setupPort(self, cflag_baud):
+        self.is_open = True
+        self.bus.clear()
+        if self.status_parser is not None:
+            self.status_parser.clear()
+
+        self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        pass
+
+    def getBytesAvailable(self):
+        return self.bus.available(self.clock.getTimeNs())
+
+    def writePort(self, packet):
+        now_ns = self.clock.getTimeNs()
+        self.last_write_ns = now_ns
+
+        if self.baudrate == self.bus.baudrate:
+            end_ns = self.bus.write(bytearray(packet), now_ns)
+        else:
+            end_ns = now_ns + len(packet) * self.bus.byte_time_ns  # the devices see noise
+
+        if self.is_simulated_time:
+            # the next packet can not start before this one is sent
+            self.clock.setTimeNs(max(self.clock.getTimeNs(), end_ns))
+        return len(packet)
+
+    def waitData(self, length):
+        now_ns = self.clock.getTimeNs()
+        # simulated time costs nothing: skip to the whole read instead of polling byte by byte
+        ready_ns = self.bus.getReadyNs(length if self.is_blocking_read or self.is_simulated_time else 1)
+
+        # past the deadline so that isPacketTimeout() fires
+        wake_ns = self.packet_deadline_ns + 1
+        if ready_ns is not None:
+            wake_ns = min(wake_ns, ready_ns)
+        if wake_ns <= now_ns:
+            return
+
+        if self.is_simulated_time:
+            self.clock.setTimeNs(wake_ns)
+        elif self.is_blocking_read:
+            time.sleep((wake_ns - now_ns) / 1000000000.0)
+
+    def readPort(self, length):
+        if length > 0 and (self.is_blocking_read or self.is_simulated_time) and \
+                self.bus.available(self.clock.getTimeNs()) < length:
+            self.waitData(length)
+
+        data = self.bus.read(length, self.clock.getTimeNs())
+        if data:
+            self.last_read_ns = self.clock.getTimeNs()
+
+        if (sys.version_info > (3, 0)):
+            return bytes(data)
+        else:
+            return data
+
+
+class VirtualBusServer(threading.Thread):
+    # Serves a VirtualBus (on a MonotonicClock) on a pty pair: open getPortName() with a PortHandler.
+    # Linux only, the baud rate of the pty is not checked.
+    def __init__(self, bus):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.bus = bus
+        self.master_fd, self.slave_fd = os.openpty()
+        self.port_name = os.ttyname(self.slave_fd)
+        self.is_running = True
+
+    def getPortName(self):
+        return self.port_name
+
+    def run(self):
+        while self.is_running:
+            now_ns = self.bus.clock.getTimeNs()
+            ready_ns = self.bus.getReadyNs(1)
+            timeout = 0.05 if ready_ns is None else max(0.0, (ready_ns - now_ns) / 1000000000.0)
+
+            readable, _, _ = select.select([self.master_fd], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self.master_fd, 4096)
+                except OSError:
+                    break
+                self.bus.write(bytearray(data), self.bus.clock.getTimeNs())
+
+            data = self.bus.read(4096, self.bus.clock.getTimeNs())
+            if data:
+                os.write(self.master_fd, bytes(data))
+
+    def stop(self):
+        self.is_running = False
+        self.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***********************     Multi-Port Bus Group Benchmark      ***********************
+#  Runs one ping per bus and cycle on several pseudo terminal (pty) buses, each
+#  answered after a simulated response delay, first sequentially from one thread
+#  (as in multi_port.py) and then through BusGroup, and reports the cycle time,
+#  the latency per bus and the cycle jitter.
+#  No DYNAMIXEL is required. Linux / macOS only.
+#  How to use :
+#    - python bus_group_benchmark.py [--buses B] [--cycles C] [--delay-ms D]
+# *******************************************************************************
+
+import argparse
+import os
+import sys
+import time
+
+from dynamixel_sdk import *
+from read_mode_benchmark import DXL_ID, PtyResponder
+
+
+def openBuses(bus_count, delay):
+    buses = []
+    for _ in range(bus_count):
+        master_fd, slave_fd = os.openpty()
+        responder = PtyResponder(master_fd, delay)
+        responder.start()
+
+        port = PortHandler(os.ttyname(slave_fd))
+        if not port.openPort():
+            raise RuntimeError("Failed to open %s" % port.getPortName())
+        port.setBlockingRead(True)
+        buses.append((port, PacketHandler(2.0), responder, master_fd, slave_fd))
+    return buses
+
+
+def closeBuses(buses):
+    for port, _, responder, master_fd, slave_fd in buses:
+        port.closePort()
+        responder.is_running = False
+        responder.join()
+        os.close(master_fd)
+        os.close(slave_fd)
+
+
+def runSequential(buses, cycles):
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for port, ph, _, _, _ in buses:
+            _, result, _ = ph.ping(port, DXL_ID)
+            if result != COMM_SUCCESS:
+                failures += 1
+    return (time.perf_counter() - start) / cycles, failures
+
+
+def runBusGroup(buses, cycles):
+    bus_group = BusGroup()
+    for index, (port, ph, _, _, _) in enumerate(buses):
+        name = 'bus%d' % index
+        bus_group.addBus(name, port, ph)
+        bus_group.addTransaction(name, lambda port=port, ph=ph: ph.ping(port, DXL_ID)[1])
+
+    failures = 0
+    latency_ns = dict((name, 0) for name in bus_group.worker_dict)
+    start = time.perf_counter()
+    for _ in range(cycles):
+        snapshot = bus_group.runCycle()
+        if not snapshot.isSuccess():
+            failures += 1
+        for name in snapshot.latency_ns:
+            latency_ns[name] += snapshot.latency_ns[name]
+    elapsed = time.perf_counter() - start
+    bus_group.stop()
+
+    return elapsed / cycles, failures, latency_ns, bus_group.getCycleStats()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--buses', type=int, default=2)
+    arg_parser.add_argument('--cycles', type=int, default=300)
+    arg_parser.add_argument('--delay-ms', type=float, default=2.0)
+    args = arg_parser.parse_args()
+
+    buses = openBuses(args.buses, args.delay_ms / 1000.0)
+
+    sequential, sequential_failures = runSequential(buses, args.cycles)
+    parallel, parallel_failures, latency_ns, stats = runBusGroup(buses, args.cycles)
+
+    closeBuses(buses)
+
+    print("%-12s %16s %10s" % ("mode", "cycle [us]", "failures"))
+    print("%-12s %16.1f %10d" % ("sequential", sequential * 1e6, sequential_failures))
+    print("%-12s %16.1f %10d" % ("bus group", parallel * 1e6, parallel_failures))
+    for name in sorted(latency_ns):
+        print("  %s latency: %.1f us" % (name, latency_ns[name] / 1e3 / args.cycles))
+    print("  cycle period: mean %.1f us, min %.1f us, max %.1f us, jitter %.1f us" % (
+        stats['period_mean_ns'] / 1e3, stats['period_min_ns'] / 1e3, stats['period_max_ns'] / 1e3,
+        stats['jitter_ns'] / 1e3))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
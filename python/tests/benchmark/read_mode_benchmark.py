@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***********************     Read Mode CPU Benchmark      ***********************
+#  Runs Protocol 2.0 ping transactions against a responder on a pseudo terminal
+#  (pty) pair and reports, for the polling and the blocking read mode of
+#  PortHandler, the wall time and the CPU time spent per transaction.
+#  No DYNAMIXEL is required. Linux / macOS only.
+#  How to use :
+#    - python read_mode_benchmark.py [--count N] [--delay-ms D]
+#    - D is the simulated response delay (return delay time + USB latency).
+# *******************************************************************************
+
+import argparse
+import os
+import select
+import sys
+import threading
+import time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.crc import updateCRC
+
+DXL_ID = 1
+MODEL_NUMBER = 1020
+FIRMWARE_VERSION = 45
+
+
+def makePingStatus(dxl_id):
+    packet = bytearray([0xFF, 0xFF, 0xFD, 0x00, dxl_id, 7, 0, 0x55, 0,
+                        DXL_LOBYTE(MODEL_NUMBER), DXL_HIBYTE(MODEL_NUMBER), FIRMWARE_VERSION])
+    crc = updateCRC(0, packet, len(packet))
+    packet.append(DXL_LOBYTE(crc))
+    packet.append(DXL_HIBYTE(crc))
+    return bytes(packet)
+
+
+class PtyResponder(threading.Thread):
+    # Answers every ping instruction written to the slave side of the pty after `delay` seconds.
+    def __init__(self, master_fd, delay):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.master_fd = master_fd
+        self.delay = delay
+        self.is_running = True
+        self.status = makePingStatus(DXL_ID)
+
+    def run(self):
+        pending = bytearray()
+        while self.is_running:
+            ready, _, _ = select.select([self.master_fd], [], [], 0.1)
+            if not ready:
+                continue
+
+            pending += os.read(self.master_fd, 1024)
+            while len(pending) >= 10:  # ping instruction packet length
+                idx = pending.find(b'\xFF\xFF\xFD\x00')
+                if idx == -1:
+                    del pending[:]
+                    break
+                del pending[:idx]
+                if len(pending) < 10:
+                    break
+
+                del pending[:10]
+                time.sleep(self.delay)
+                os.write(self.master_fd, self.status)
+
+
+def run(port_name, blocking, count):
+    port = PortHandler(port_name)
+    ph = PacketHandler(2.0)
+    if not port.openPort():
+        raise RuntimeError("Failed to open %s" % port_name)
+    port.setBlockingRead(blocking)
+
+    failures = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    for _ in range(count):
+        _, result, _ = ph.ping(port, DXL_ID)
+        if result != COMM_SUCCESS:
+            failures += 1
+    cpu = time.thread_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    port.closePort()
+    return wall / count, cpu / count, failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=500)
+    arg_parser.add_argument('--delay-ms', type=float, default=1.0)
+    args = arg_parser.parse_args()
+
+    master_fd, slave_fd = os.openpty()
+    responder = PtyResponder(master_fd, args.delay_ms / 1000.0)
+    responder.start()
+
+    print("%-10s %16s %16s %10s %10s" % ("mode", "wall/txn [us]", "cpu/txn [us]", "cpu load", "failures"))
+    for name, blocking in (("polling", False), ("blocking", True)):
+        wall, cpu, failures = run(os.ttyname(slave_fd), blocking, args.count)
+        print("%-10s %16.1f %16.1f %9.0f%% %10d" % (name, wall * 1e6, cpu * 1e6, 100.0 * cpu / wall, failures))
+
+    responder.is_running = False
+    responder.join()
+    os.close(master_fd)
+    os.close(slave_fd)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
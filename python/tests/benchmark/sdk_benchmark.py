@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***********************     SDK Benchmark Suite      ***********************
+#  Measures the CPU cost of the SDK, with no DYNAMIXEL required:
+#    - packet build + CRC (txPacket to a port that drops the bytes), CRC16 alone
+#    - status packet parsing (rxPacket from a port holding one status packet)
+#    - readTxRx / writeTxRx per call
+#    - GroupSyncRead / GroupBulkRead / GroupSyncWrite cycles vs servo count and data length
+#  The transactions run against a VirtualBus on a FakeClock, so the servos answer
+#  at once in wall time and the result only depends on the host. Every case reports
+#  ops/s, p50 / p99 latency, the peak memory allocated per operation (tracemalloc)
+#  and, for bus transactions, the time the packets would take on the wire.
+#  How to use :
+#    - python sdk_benchmark.py [--quick] [--filter TEXT] [--json FILE] [--compare FILE]
+#    - FILE of --json can be given to --compare in a run of another commit.
+# *******************************************************************************
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from dynamixel_sdk import *
+from dynamixel_sdk import crc
+from dynamixel_sdk.clock import FakeClock
+
+RESULT_VERSION = 1
+
+BAUDRATE = 4000000
+ADDR_GOAL_POSITION = 116
+ADDR_PRESENT_POSITION = 132
+SERVO_COUNTS = [1, 4, 12, 24]
+DATA_LENGTHS = [4, 16]
+
+ALLOC_SAMPLES = 20
+
+if hasattr(time, 'perf_counter_ns'):
+    perfCounterNs = time.perf_counter_ns
+else:
+    def perfCounterNs():
+        return int(time.perf_counter() * 1000000000)
+
+
+class LoopbackPort(PortHandler):
+    # drops written bytes, readPort() returns rx_data
+    def __init__(self):
+        PortHandler.__init__(self, 'loopback', FakeClock())
+        self.is_open = True
+        self.tx_time_per_byte = (1000.0 / BAUDRATE) * 10.0
+        self.rx_data = b''
+
+    def clearPort(self):
+        pass
+
+    def writePort(self, packet):
+        return len(packet)
+
+    def readPort(self, length):
+        data = self.rx_data[0: length]
+        self.rx_data = self.rx_data[length:]
+        return data
+
+
+def makeVirtualBus(servo_count):
+    clock = FakeClock()
+    bus = VirtualBus(2.0, BAUDRATE, clock)
+    for dxl_id in range(1, servo_count + 1):
+        device = VirtualDevice(dxl_id, 1020)
+        device.setValue('return_delay_time', 0)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.setBaudRate(BAUDRATE)
+    return port, clock
+
+
+def percentile(sorted_list, fraction):
+    return sorted_list[min(len(sorted_list) - 1, int(fraction * len(sorted_list)))]
+
+
+def measure(func, iterations, warmup):
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    is_gc_enabled = gc.isenabled()
+    gc.disable()  # no collection in the timed loop
+    try:
+        for _ in range(iterations):
+            start = perfCounterNs()
+            func()
+            samples.append(perfCounterNs() - start)
+    finally:
+        if is_gc_enabled:
+            gc.enable()
+
+    alloc_list = []
+    for _ in range(ALLOC_SAMPLES):
+        tracemalloc.start()
+        func()
+        alloc_list.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'ops_per_s': len(samples) * 1000000000.0 / sum(samples),
+        'p50_us': percentile(samples, 0.50) / 1000.0,
+        'p99_us': percentile(samples, 0.99) / 1000.0,
+        'alloc_bytes': sorted(alloc_list)[len(alloc_list) // 2],
+    }
+
+
+def makePacketCases():
+    ph = PacketHandler(2.0)
+    port = LoopbackPort()
+    cases = []
+
+    def buildRead():
+        ph.txPacket(port, ph.makeReadPacket(1, ADDR_PRESENT_POSITION, 4))
+        port.releasePort()
+    cases.append(('packet_build.read', {}, buildRead, None))
+
+    param = bytearray()
+    for dxl_id in range(1, 25):
+        param += bytearray([dxl_id, 0xFF, 0xFF, 0xFD, 0x00])  # a header in every parameter: byte stuffing
+
+    def buildSyncWrite():
+        ph.txPacket(port, ph.makeSyncWritePacket(ADDR_GOAL_POSITION, 4, param, len(param))[0])
+        port.releasePort()
+    cases.append(('packet_build.sync_write_stuffed', {'servos': 24}, buildSyncWrite, None))
+
+    for size in (14, 128):
+        data = bytearray(range(size))
+        cases.append(('crc16', {'bytes': size}, lambda data=data: crc.updateCRC(0, data, len(data)), None))
+
+    # status packet of a 4 byte read, fed back for every parse
+    status = bytearray([0xFF, 0xFF, 0xFD, 0x00, 1, 8, 0, INST_STATUS, 0, 0x00, 0x08, 0x00, 0x00, 0, 0])
+    checksum = crc.updateCRC(0, status, len(status) - 2)
+    status[-2] = DXL_LOBYTE(checksum)
+    status[-1] = DXL_HIBYTE(checksum)
+    status = bytes(status)
+
+    def parseStatus():
+        port.rx_data = status
+        port.setPacketTimeout(len(status))
+        ph.rxPacket(port)
+    cases.append(('rx_parse.read_status', {'bytes': len(status)}, parseStatus, None))
+    return cases
+
+
+def makeTransactionCases():
+    ph = PacketHandler(2.0)
+    cases = []
+
+    port, clock = makeVirtualBus(1)
+    cases.append(('read_tx_rx', {'length': 4},
+                  lambda port=port: ph.readTxRx(port, 1, ADDR_PRESENT_POSITION, 4), clock))
+    port, clock = makeVirtualBus(1)
+    cases.append(('write_tx_rx', {'length': 4},
+                  lambda port=port: ph.writeTxRx(port, 1, ADDR_GOAL_POSITION, 4, [0, 8, 0, 0]), clock))
+
+    for servo_count in SERVO_COUNTS:
+        for length in DATA_LENGTHS:
+            params = {'servos': servo_count, 'length': length}
+
+            port, clock = makeVirtualBus(servo_count)
+            group = GroupSyncRead(port, ph, ADDR_PRESENT_POSITION, length)
+            for dxl_id in range(1, servo_count + 1):
+                group.addParam(dxl_id)
+            cases.append(('group_sync_read', params, group.txRxPacket, clock))
+
+            port, clock = makeVirtualBus(servo_count)
+            group = GroupBulkRead(port, ph)
+            for dxl_id in range(1, servo_count + 1):
+                group.addParam(dxl_id, ADDR_PRESENT_POSITION, length)
+            cases.append(('group_bulk_read', params, group.txRxPacket, clock))
+
+            port, clock = makeVirtualBus(servo_count)
+            group = GroupSyncWrite(port, ph, ADDR_GOAL_POSITION, length)
+            for dxl_id in range(1, servo_count + 1):
+                group.addParam(dxl_id, bytearray(length))
+            cases.append(('group_sync_write', params, group.txPacket, clock))
+    return cases
+
+
+def getCaseKey(name, params):
+    return name + ''.join('/%s=%s' % (key, params[key]) for key in sorted(params))
+
+
+def getGitCommit():
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        return output.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compareResults(results, base_path):
+    with open(base_path) as base_file:
+        base = json.load(base_file)
+    base_dict = dict((result['key'], result) for result in base['results'])
+
+    print("")
+    print("compared with %s (commit %s)" % (base_path, base.get('git_commit')))
+    print("%-52s %12s %12s" % ("case", "ops/s ratio", "p50 ratio"))
+    for result in results:
+        base_result = base_dict.get(result['key'])
+        if base_result is None:
+            continue
+        print("%-52s %12.2f %12.2f" % (result['key'], result['ops_per_s'] / base_result['ops_per_s'],
+                                       result['p50_us'] / base_result['p50_us']))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--quick', action='store_true', help="fewer iterations, for a smoke run")
+    arg_parser.add_argument('--filter', default=None, help="only the cases whose key contains this text")
+    arg_parser.add_argument('--json', default=None, help="write the results to this file")
+    arg_parser.add_argument('--compare', default=None, help="results file of an earlier run")
+    args = arg_parser.parse_args()
+
+    iterations, warmup = (200, 20) if args.quick else (3000, 300)
+
+    results = []
+    print("%-52s %12s %10s %10s %10s %10s" % ("case", "ops/s", "p50 us", "p99 us", "alloc B", "bus us"))
+    for name, params, func, clock in makePacketCases() + makeTransactionCases():
+        key = getCaseKey(name, params)
+        if args.filter is not None and args.filter not in key:
+            continue
+
+        result = {'key': key, 'name': name, 'params': params}
+        start_ns = clock.getTimeNs() if clock is not None else 0
+        result.update(measure(func, iterations, warmup))
+        if clock is not None:
+            # simulated wire time per operation, the same on every host
+            result['bus_us'] = (clock.getTimeNs() - start_ns) / 1000.0 / (iterations + warmup + ALLOC_SAMPLES)
+
+        results.append(result)
+        print("%-52s %12.0f %10.1f %10.1f %10d %10s" % (
+            key, result['ops_per_s'], result['p50_us'], result['p99_us'], result['alloc_bytes'],
+            '%.1f' % result['bus_us'] if 'bus_us' in result else '-'))
+
+    if args.json is not None:
+        data = {
+            'version': RESULT_VERSION,
+            'git_commit': getGitCommit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'iterations': iterations,
+            'results': results,
+        }
+        with open(args.json, 'w') as json_file:
+            json.dump(data, json_file, indent=1, sort_keys=True)
+
+    if args.compare is not None:
+        compareResults(results, args.compare)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
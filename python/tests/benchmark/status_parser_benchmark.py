@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***********************     Status Packet Parser Fuzz / Throughput Benchmark      ***********************
+#  Feeds a noisy Protocol 2.0 byte stream (garbage, false headers, truncated and
+#  corrupted frames between valid status packets) to Protocol2StatusParser in
+#  random sized chunks and to the original list based rxPacket() loop, checks
+#  that both extract the same valid frames and reports throughput.
+#  No DYNAMIXEL is required.
+#  How to use :
+#    - python status_parser_benchmark.py [--frames N] [--seed S] [--capture FILE]
+#    - python status_parser_benchmark.py --traffic-log LOG
+#    - FILE is a raw byte capture of the bus (rx direction only), LOG a log of
+#      RecordingPortHandler (its received bytes are used).
+# *******************************************************************************
+
+import argparse
+import random
+import sys
+import time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.crc import updateCRC
+from dynamixel_sdk.protocol2_packet_handler import Protocol2StatusParser
+
+
+def makeStatusPacket(dxl_id, error, params):
+    body = bytearray([0x55, error])
+    for value in params:
+        body.append(value)
+        if body[-3:] == b'\xFF\xFF\xFD':
+            body.append(0xFD)
+
+    packet = bytearray([0xFF, 0xFF, 0xFD, 0x00, dxl_id, DXL_LOBYTE(len(body) + 2), DXL_HIBYTE(len(body) + 2)])
+    packet += body
+    crc = updateCRC(0, packet, len(packet))
+    packet.append(DXL_LOBYTE(crc))
+    packet.append(DXL_HIBYTE(crc))
+    return packet
+
+
+def makeNoisyStream(frame_count, seed):
+    rnd = random.Random(seed)
+    stream = bytearray()
+    frames = []
+
+    for _ in range(frame_count):
+        # garbage, sometimes with a false header in it
+        garbage = bytearray(rnd.randrange(256) for _ in range(rnd.randrange(0, 24)))
+        if rnd.random() < 0.3:
+            garbage[rnd.randrange(len(garbage) + 1):0] = b'\xFF\xFF\xFD'
+        stream += garbage
+
+        params = bytearray(rnd.randrange(256) for _ in range(rnd.randrange(0, 48)))
+        if rnd.random() < 0.1:
+            params[0:0] = b'\xFF\xFF\xFD'  # exercise byte stuffing
+        packet = makeStatusPacket(rnd.randrange(0, 0xFD), rnd.randrange(0, 0x80), params)
+
+        fate = rnd.random()
+        if fate < 0.05:
+            stream += packet[0: rnd.randrange(3, len(packet))]  # truncated
+        elif fate < 0.10:
+            packet[rnd.randrange(7, len(packet))] ^= 0x5A  # corrupted
+            stream += packet
+        else:
+            stream += packet
+            frames.append(bytes(packet))
+
+    return stream, frames
+
+
+class StreamPort(object):
+    # Port stub returning the stream in random sized chunks, then nothing.
+    def __init__(self, stream, seed):
+        self.stream = stream
+        self.pos = 0
+        self.rnd = random.Random(seed)
+        self.is_using = False
+        self.status_parser = None
+
+    def readPort(self, length):
+        length = min(length, self.rnd.randrange(1, 65))
+        data = bytes(self.stream[self.pos: self.pos + length])
+        self.pos += len(data)
+        return data
+
+    def isPacketTimeout(self):
+        return self.pos >= len(self.stream)
+
+    def isExhausted(self):
+        return self.pos >= len(self.stream)
+
+
+def legacyRxPacket(port):
+    # Protocol2PacketHandler.rxPacket before the streaming parser (lists, rescans from index 0)
+    rxpacket = []
+
+    result = COMM_TX_FAIL
+    rx_length = 0
+    wait_length = 11
+
+    while True:
+        rxpacket.extend(port.readPort(wait_length - rx_length))
+        rx_length = len(rxpacket)
+        if rx_length >= wait_length:
+            for idx in range(0, (rx_length - 3)):
+                if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF) and (rxpacket[idx + 2] == 0xFD) and (
+                        rxpacket[idx + 3] != 0xFD):
+                    break
+
+            if idx == 0:
+                if (rxpacket[3] != 0x00) or (rxpacket[4] > 0xFC) or (
+                        DXL_MAKEWORD(rxpacket[5], rxpacket[6]) > 1024) or (rxpacket[7] != 0x55):
+                    del rxpacket[0]
+                    rx_length -= 1
+                    continue
+
+                if wait_length != (DXL_MAKEWORD(rxpacket[5], rxpacket[6]) + 7):
+                    wait_length = DXL_MAKEWORD(rxpacket[5], rxpacket[6]) + 7
+                    continue
+
+                if rx_length < wait_length:
+                    if port.isPacketTimeout():
+                        result = COMM_RX_CORRUPT
+                        break
+                    else:
+                        continue
+
+                crc = DXL_MAKEWORD(rxpacket[wait_length - 2], rxpacket[wait_length - 1])
+                if updateCRC(0, rxpacket, wait_length - 2) == crc:
+                    result = COMM_SUCCESS
+                else:
+                    result = COMM_RX_CORRUPT
+                break
+
+            else:
+                del rxpacket[0: idx]
+                rx_length -= idx
+
+        else:
+            if port.isPacketTimeout():
+                result = COMM_RX_TIMEOUT if rx_length == 0 else COMM_RX_CORRUPT
+                break
+
+    return rxpacket, result
+
+
+def runLegacy(stream, seed):
+    port = StreamPort(stream, seed)
+    frames = []
+    while not port.isExhausted():
+        rxpacket, result = legacyRxPacket(port)
+        if result == COMM_SUCCESS:
+            frames.append(bytes(bytearray(rxpacket)))
+    return frames
+
+
+def runParser(stream, seed):
+    port = StreamPort(stream, seed)
+    parser = Protocol2StatusParser()
+    frames = []
+    while not port.isExhausted():
+        parser.feed(port.readPort(len(stream)))
+        while True:
+            packet, result = parser.getPacket()
+            if result == COMM_RX_WAITING:
+                break
+            if result == COMM_SUCCESS:
+                frames.append(bytes(packet))
+    return frames, parser
+
+
+def measure(func, stream, seed):
+    start = time.perf_counter()
+    output = func(stream, seed)
+    return output, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--frames', type=int, default=20000)
+    arg_parser.add_argument('--seed', type=int, default=1)
+    arg_parser.add_argument('--capture', default=None)
+    arg_parser.add_argument('--traffic-log', default=None)
+    args = arg_parser.parse_args()
+
+    if args.traffic_log:
+        reader = TrafficLogReader(args.traffic_log)
+        stream = reader.getReadStream()
+        reader.close()
+        expected = None
+    elif args.capture:
+        with open(args.capture, 'rb') as f:
+            stream = bytearray(f.read())
+        expected = None
+    else:
+        stream, expected = makeNoisyStream(args.frames, args.seed)
+
+    legacy_frames, legacy_time = measure(runLegacy, stream, args.seed)
+    (parser_frames, parser), parser_time = measure(runParser, stream, args.seed)
+
+    print("stream: %d bytes" % len(stream))
+    print("%-10s %10s %12s %12s" % ("parser", "frames", "MB/s", "frames/s"))
+    print("%-10s %10d %12.2f %12.0f" % ("legacy", len(legacy_frames), len(stream) / legacy_time / 1e6,
+                                        len(legacy_frames) / legacy_time))
+    print("%-10s %10d %12.2f %12.0f" % ("streaming", len(parser_frames), len(stream) / parser_time / 1e6,
+                                        len(parser_frames) / parser_time))
+    print("streaming: %d corrupt frames, %d discarded bytes" % (parser.corrupt_count, parser.discarded_bytes))
+
+    # every frame the legacy loop accepted must be found by the streaming parser
+    missing = set(legacy_frames) - set(parser_frames)
+    if missing:
+        print("FAIL: %d frames found by the legacy loop are missing" % len(missing))
+        return 1
+    if expected is not None and set(expected) - set(parser_frames):
+        print("FAIL: %d valid frames were not recovered" % len(set(expected) - set(parser_frames)))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
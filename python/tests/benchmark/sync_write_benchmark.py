@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***********************     Sync Write Cycle Benchmark      ***********************
+#  Streams a new goal position to every ID through GroupSyncWrite, once with
+#  changeParam() + a packet rebuilt every cycle (the former behaviour) and once
+#  with setValue() into the preencoded packet, plus goal position and profile
+#  velocity through GroupFieldSyncWrite, and reports cycles per second.
+#  The packets are written to a null port, no DYNAMIXEL is required.
+#  How to use :
+#    - python sync_write_benchmark.py [--ids N] [--cycles C]
+# *******************************************************************************
+
+import argparse
+import sys
+import time
+
+from dynamixel_sdk import *
+
+ADDR_PROFILE_VELOCITY = 112
+ADDR_GOAL_POSITION = 116
+LEN_GOAL_POSITION = 4
+
+FIELDS = [('profile_velocity', 0, 4, False), ('goal_position', 4, 4, True)]
+
+
+class NullPort(object):
+    def __init__(self):
+        self.is_using = False
+
+    def acquirePort(self):
+        self.is_using = True
+        return True
+
+    def clearPort(self):
+        pass
+
+    def writePort(self, packet):
+        return len(packet)
+
+
+def runRebuild(group, ids, cycles):
+    for cycle in range(cycles):
+        for dxl_id in ids:
+            value = cycle + dxl_id
+            group.changeParam(dxl_id, [DXL_LOBYTE(DXL_LOWORD(value)), DXL_HIBYTE(DXL_LOWORD(value)),
+                                       DXL_LOBYTE(DXL_HIWORD(value)), DXL_HIBYTE(DXL_HIWORD(value))])
+        group.is_param_changed = True
+        group.txPacket()
+
+
+def runPreencoded(group, ids, cycles):
+    for cycle in range(cycles):
+        for dxl_id in ids:
+            group.setValue(dxl_id, cycle + dxl_id)
+        group.txPacket()
+
+
+def runHandPacked(group, ids, cycles):
+    # both fields with the byte helpers of the examples
+    for cycle in range(cycles):
+        for dxl_id in ids:
+            velocity = 100
+            position = cycle + dxl_id
+            group.changeParam(dxl_id, [DXL_LOBYTE(DXL_LOWORD(velocity)), DXL_HIBYTE(DXL_LOWORD(velocity)),
+                                       DXL_LOBYTE(DXL_HIWORD(velocity)), DXL_HIBYTE(DXL_HIWORD(velocity)),
+                                       DXL_LOBYTE(DXL_LOWORD(position)), DXL_HIBYTE(DXL_LOWORD(position)),
+                                       DXL_LOBYTE(DXL_HIWORD(position)), DXL_HIBYTE(DXL_HIWORD(position))])
+        group.txPacket()
+
+
+def runFields(group, ids, cycles):
+    velocities = [100] * len(ids)
+    for cycle in range(cycles):
+        group.setArrays({'profile_velocity': velocities, 'goal_position': [cycle + dxl_id for dxl_id in ids]})
+        group.txPacket()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--ids', type=int, default=30)
+    arg_parser.add_argument('--cycles', type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    ids = list(range(1, args.ids + 1))
+
+    print("%-12s %14s" % ("mode", "cycles/s"))
+    for name, func in (("rebuild", runRebuild), ("preencoded", runPreencoded)):
+        group = GroupSyncWrite(NullPort(), PacketHandler(2.0), ADDR_GOAL_POSITION, LEN_GOAL_POSITION)
+        for dxl_id in ids:
+            group.addParam(dxl_id, [0] * LEN_GOAL_POSITION)
+
+        start = time.perf_counter()
+        func(group, ids, args.cycles)
+        elapsed = time.perf_counter() - start
+        print("%-12s %14.0f" % (name, args.cycles / elapsed))
+
+    print("two fields:")
+    hand_group = GroupSyncWrite(NullPort(), PacketHandler(2.0), ADDR_PROFILE_VELOCITY, 8)
+    field_group = GroupFieldSyncWrite(NullPort(), PacketHandler(2.0), ADDR_PROFILE_VELOCITY, FIELDS)
+    for dxl_id in ids:
+        hand_group.addParam(dxl_id, [0] * 8)
+        field_group.addParam(dxl_id, [0, 0])
+
+    for name, func, group in (("hand packed", runHandPacked, hand_group), ("fields", runFields, field_group)):
+        start = time.perf_counter()
+        func(group, ids, args.cycles)
+        elapsed = time.perf_counter() - start
+        print("%-12s %14.0f" % (name, args.cycles / elapsed))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# asyncio transport waiting for the port, on a VirtualBus in real time
+
+import asyncio
+import threading
+import time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.async_port_handler import AsyncPortHandler, AsyncPacketHandler
+
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort():
+    bus = VirtualBus(2.0, 1000000)
+    for dxl_id in (1, 2):
+        device = VirtualDevice(dxl_id, 1020)
+        device.setValue('return_delay_time', 0)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port
+
+
+def test_wait_for_port_does_not_block_loop():
+    port = makePort()
+    port.setLockTimeout(2000)
+    ph = AsyncPacketHandler(PacketHandler(2.0))
+
+    # another thread holds the port for 50 ms
+    is_locked = threading.Event()
+
+    def hold():
+        port.lockPort()
+        is_locked.set()
+        time.sleep(0.05)
+        port.unlockPort()
+    thread = threading.Thread(target=hold)
+    thread.start()
+    is_locked.wait()
+
+    ticks = []
+
+    async def ticker(done):
+        while not done.is_set():
+            ticks.append(None)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        done = asyncio.Event()
+        task = asyncio.ensure_future(ticker(done))
+        result = await ph.read4ByteTxRx(AsyncPortHandler(port), 1, ADDR_PRESENT_POSITION)
+        done.set()
+        await task
+        return result
+
+    _, result, _ = asyncio.run(main())
+    thread.join()
+
+    assert result == COMM_SUCCESS
+    assert len(ticks) >= 10
+    assert port.port_lock.owner is None
+
+
+def test_coroutines_take_turns():
+    port = makePort()
+    port.setLockTimeout(1000)
+    ph = AsyncPacketHandler(PacketHandler(2.0))
+    async_port = AsyncPortHandler(port)
+
+    async def main():
+        return await asyncio.gather(*[ph.read4ByteTxRx(async_port, dxl_id, ADDR_PRESENT_POSITION)
+                                      for dxl_id in (1, 2, 1, 2)])
+
+    assert [result for _, result, _ in asyncio.run(main())] == [COMM_SUCCESS] * 4
+    assert port.port_lock.owner is None
+    assert not port.is_busy
+
+
+def test_busy_without_lock_timeout():
+    port = makePort()
+    ph = AsyncPacketHandler(PacketHandler(2.0))
+
+    assert port.lockPort()
+
+    def read():
+        return asyncio.run(ph.read4ByteTxRx(AsyncPortHandler(port), 1, ADDR_PRESENT_POSITION))[1]
+    result = []
+    thread = threading.Thread(target=lambda: result.append(read()))
+    thread.start()
+    thread.join(5.0)
+
+    assert result == [COMM_PORT_BUSY]
+    assert port.port_lock.owner is threading.current_thread()
+    port.unlockPort()
+
+
+def test_sync_read_matches_packet_handler():
+    port = makePort()
+    port.bus.getDevice(1).setValue('present_position', 100)
+    port.bus.getDevice(2).setValue('present_position', 200)
+    ph = PacketHandler(2.0)
+    group = GroupSyncRead(port, ph, ADDR_PRESENT_POSITION, 4)
+    for dxl_id in (1, 2, 3):
+        group.addParam(dxl_id)
+
+    result = asyncio.run(AsyncPacketHandler(ph).syncReadTxRx(AsyncPortHandler(port), group))
+
+    assert result == COMM_RX_TIMEOUT
+    assert [group.getData(dxl_id, ADDR_PRESENT_POSITION, 4) for dxl_id in (1, 2)] == [100, 200]
+    assert group.getFailedIds() == [3]
+    assert group.txRxPacket() == result
+    assert [group.getData(dxl_id, ADDR_PRESENT_POSITION, 4) for dxl_id in (1, 2)] == [100, 200]
+    assert not port.is_busy
+
+
+def test_read_mode_of_port_is_kept():
+    # a port shared with a BusGroup reads in blocking mode, the coroutines read without blocking
+    port = makePort()
+    port.setBlockingRead(True)
+    async_port = AsyncPortHandler(port)
+    ph = AsyncPacketHandler(PacketHandler(2.0))
+    modes = []
+
+    class ModePort(AsyncPortHandler):
+        async def readPort(self, length):
+            modes.append(self.port.getBlockingRead())
+            return await AsyncPortHandler.readPort(self, length)
+
+    async def main():
+        return await asyncio.gather(ph.read4ByteTxRx(ModePort(port), 1, ADDR_PRESENT_POSITION),
+                                    ph.read4ByteTxRx(async_port, 2, ADDR_PRESENT_POSITION))
+
+    port.setLockTimeout(1000)
+    assert [result for _, result, _ in asyncio.run(main())] == [COMM_SUCCESS] * 2
+    assert modes and not any(modes)
+    assert port.getBlockingRead()
+    assert port.port_lock.owner is None
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# BusGroup over VirtualBus ports in real time
+
+from dynamixel_sdk import *
+
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort():
+    bus = VirtualBus(2.0, 1000000)
+    bus.addDevice(VirtualDevice(1, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port
+
+
+def test_cycle_on_blocking_ports():
+    bus_group = BusGroup()
+    ports = [makePort() for _ in range(3)]
+    ph = PacketHandler(2.0)
+    for index, port in enumerate(ports):
+        name = 'bus%d' % index
+        assert bus_group.addBus(name, port, ph)
+        bus_group.addTransaction(name, lambda port=port: ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1])
+
+    # the workers sleep in their reads instead of polling
+    assert all(port.getBlockingRead() for port in ports)
+
+    try:
+        for _ in range(5):
+            snapshot = bus_group.runCycle()
+            assert snapshot.isSuccess()
+    finally:
+        bus_group.stop()
+
+    assert bus_group.cycle_count == 5
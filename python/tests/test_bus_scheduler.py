@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# BusScheduler on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ADDR_PRESENT_CURRENT = 126
+
+
+def makePort():
+    clock = FakeClock()
+    bus = VirtualBus(2.0, 1000000, clock)
+    for dxl_id in (1, 2):
+        bus.addDevice(VirtualDevice(dxl_id, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, clock
+
+
+def test_transaction_length_of_subclasses():
+    port, _ = makePort()
+    ph = PacketHandler(2.0)
+
+    group = GroupSyncRead(port, ph, ADDR_PRESENT_CURRENT, 10)
+    field_group = GroupFieldSyncRead(port, ph, ADDR_PRESENT_CURRENT,
+                                     [('present_current', 0, 2, True), ('present_position', 6, 4, True)])
+
+    class UserGroup(GroupSyncRead):
+        pass
+    user_group = UserGroup(port, ph, ADDR_PRESENT_CURRENT, 10)
+
+    for dxl_id in (1, 2):
+        group.addParam(dxl_id)
+        field_group.addParam(dxl_id)
+        user_group.addParam(dxl_id)
+
+    assert getTransactionLength(field_group) == getTransactionLength(group) == (16, 42)
+    assert getTransactionLength(user_group) == (16, 42)
+
+    class OtherGroup(object):
+        def __init__(self):
+            self.ph = ph
+            self.data_dict = {}
+    with pytest.raises(ValueError):
+        getTransactionLength(OtherGroup())
+
+
+def test_missed_one_shot_job_is_dropped():
+    port, clock = makePort()
+    scheduler = BusScheduler(port, 1.0)
+    runs = []
+
+    assert scheduler.addOneShotJob('reboot', lambda: runs.append(None) or COMM_SUCCESS, deadline=0.5)
+    assert not scheduler.addOneShotJob('reboot', lambda: COMM_SUCCESS)
+
+    clock.setTimeNs(clock.getTimeNs() + 1000000)
+    assert scheduler.runCycle() == []
+    assert scheduler.getJob('reboot') is None
+    assert scheduler.getMissedDeadlines() == 1
+    assert runs == []
+
+    assert scheduler.addOneShotJob('reboot', lambda: runs.append(None) or COMM_SUCCESS)
+    assert scheduler.runCycle() == [('reboot', COMM_SUCCESS)]
+    assert scheduler.getJob('reboot') is None
+    assert len(runs) == 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Protocol 2.0 byte stuffing, and packets carrying FF FF FD on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ADDR_DATA = 150  # free bytes of the virtual control table
+PATTERN = b'\xFF\xFF\xFD\x00'  # one stuffing byte each
+
+
+def makePort():
+    bus = VirtualBus(2.0, 1000000, FakeClock())
+    bus.addDevice(VirtualDevice(1, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def makePacket(ph, params):
+    # instruction packet of ID 1 with room for the CRC
+    length = len(params) + 3
+    return bytearray([0xFF, 0xFF, 0xFD, 0x00, 0x01, DXL_LOBYTE(length), DXL_HIBYTE(length), INST_WRITE]) + \
+        bytearray(params) + b'\x00\x00'
+
+
+@pytest.mark.parametrize('params, stuffed_params', [
+    (b'\x00\x01\x02', b'\x00\x01\x02'),
+    (b'\xFF\xFF\xFD', b'\xFF\xFF\xFD\xFD'),
+    (b'\x00\xFF\xFF\xFD\xFD\xFF\xFF\xFD', b'\x00\xFF\xFF\xFD\xFD\xFD\xFF\xFF\xFD\xFD'),
+    (b'\xFF\xFF\xFF\xFD\x00', b'\xFF\xFF\xFF\xFD\xFD\x00'),
+])
+def test_stuffing_round_trip(params, stuffed_params):
+    ph = PacketHandler(2.0)
+    packet = makePacket(ph, params)
+
+    stuffed = ph.addStuffing(bytearray(packet))
+    assert stuffed == makePacket(ph, stuffed_params)
+    assert ph.removeStuffing(bytearray(stuffed)) == packet
+
+
+def test_write_and_read_data_with_header():
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    data = bytearray(b'\x01' + PATTERN + b'\xFF\xFF\xFD\xFD' + b'\xFF\xFF\xFD')
+
+    assert ph.writeTxRx(port, 1, ADDR_DATA, len(data), data) == (COMM_SUCCESS, 0)
+    assert bus.getDevice(1).read(ADDR_DATA, len(data)) == data
+
+    data_read, result, error = ph.readTxRx(port, 1, ADDR_DATA, len(data))
+    assert (result, error) == (COMM_SUCCESS, 0)
+    assert bytearray(data_read) == data
+
+
+def test_stuffed_packet_at_max_length():
+    # 12 bytes of write packet + data + one stuffing byte per pattern: exactly TXPACKET_MAX_LEN
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    pattern_count = 180
+    data = bytearray(PATTERN * pattern_count) + bytearray(range(TXPACKET_MAX_LEN - 12 - 5 * pattern_count))
+    assert 12 + len(data) + pattern_count == TXPACKET_MAX_LEN
+
+    assert ph.writeTxRx(port, 1, ADDR_DATA, len(data), data) == (COMM_SUCCESS, 0)
+    assert bus.getDevice(1).read(ADDR_DATA, len(data)) == data
+
+    # the status packet is stuffed the same way: 11 bytes + data + stuffing
+    data_read, result, error = ph.readTxRx(port, 1, ADDR_DATA, len(data))
+    assert (result, error) == (COMM_SUCCESS, 0)
+    assert bytearray(data_read) == data
+
+    # one more byte does not fit once stuffed
+    longer = data + b'\x5A'
+    assert ph.writeTxRx(port, 1, ADDR_DATA, len(longer), longer) == (COMM_TX_ERROR, 0)
+    assert bus.getDevice(1).read(ADDR_DATA + len(data), 1) == b'\x00'
+    assert not port.is_busy
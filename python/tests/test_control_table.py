@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# FieldCodec round trips of signed, scaled and sign and magnitude fields, and decodeArrays() on a VirtualBus
+
+import struct
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+X_MODEL = 1020  # XM430-W350
+AX_MODEL = 12  # AX-12A
+RAW_VALUES = [-1000, -1, 0, 1, 1000]
+MAGNITUDES = [0, 1, 512, 1023]
+
+
+def test_signed_scaled_round_trip():
+    table = getControlTable(X_MODEL)
+    codec = table.makeCodec(['present_position', 'present_current', 'present_velocity'])
+    current, velocity, position = (table.getField(name) for name in codec.names)
+    assert (codec.start_address, codec.data_length) == (126, 10)
+
+    for raw in RAW_VALUES:
+        values = (raw * current.scale, -raw * velocity.scale, raw * 4 * position.scale)
+        data = codec.encode(values)
+        assert data == struct.pack('<hii', raw, -raw, raw * 4)
+        assert codec.decode(data) == pytest.approx(values)
+        assert codec.decodeRaw(data) == (raw, -raw, raw * 4)
+
+    # values between two steps round to the nearest one
+    assert codec.decodeRaw(codec.encode([2.6 * current.scale, -0.4 * velocity.scale, 0])) == (3, 0, 0)
+
+
+def test_gap_between_fields_is_skipped():
+    table = getControlTable(X_MODEL)
+    codec = table.makeCodec(['present_position', 'present_current'])
+    assert codec.data_length == 10
+
+    data = bytearray(codec.encode({'present_current': -2.69, 'present_position': 0}))
+    data[2: 6] = b'\xFF\xFF\xFF\xFF'  # present velocity, not a field of the codec
+    assert codec.decodeDict(data) == pytest.approx({'present_current': -2.69, 'present_position': 0})
+    assert codec.decodeDict(b'\x00' + data, offset=1) == pytest.approx(codec.decodeDict(data))
+
+
+def test_sign_magnitude_round_trip():
+    table = getControlTable(AX_MODEL)
+    codec = table.makeCodec(['present_position', 'present_speed', 'present_load'])
+    speed, load = table.getField('present_speed'), table.getField('present_load')
+
+    for magnitude in MAGNITUDES:
+        for sign in (1, -1):
+            values = (512 * table.getField('present_position').scale,
+                      sign * magnitude * speed.scale,
+                      -sign * magnitude * load.scale)
+            data = codec.encode(values)
+            assert codec.decode(data) == pytest.approx(values)
+
+            raw_speed = codec.decodeRaw(data)[1]
+            assert raw_speed == (magnitude | SIGN_MAGNITUDE_BIT if sign < 0 and magnitude else magnitude)
+
+
+def test_decode_arrays_matches_decode():
+    pytest.importorskip('numpy')
+
+    bus = VirtualBus(1.0, 1000000, FakeClock())
+    id_list = [1, 2, 3]
+    for dxl_id in id_list:
+        device = VirtualDevice(dxl_id, AX_MODEL)
+        device.setValue('present_position', 100 * dxl_id)
+        device.setValue('present_speed', 200 * dxl_id | (SIGN_MAGNITUDE_BIT if dxl_id == 2 else 0))
+        device.setValue('present_load', 10 * dxl_id | (SIGN_MAGNITUDE_BIT if dxl_id != 2 else 0))
+        bus.addDevice(device)
+    port = VirtualPortHandler(bus)
+    port.openPort()
+
+    ph = PacketHandler(1.0)
+    codec = getControlTable(AX_MODEL).makeCodec(['present_position', 'present_speed', 'present_load'])
+    group = GroupBulkRead(port, ph)
+    for dxl_id in id_list:
+        assert group.addParam(dxl_id, codec.start_address, codec.data_length)
+    assert group.txRxPacket() == COMM_SUCCESS
+
+    arrays = codec.decodeArrays(group)
+    for row, dxl_id in enumerate(id_list):
+        data = group.data_dict[dxl_id][0]
+        assert tuple(arrays[name][row] for name in codec.names) == pytest.approx(codec.decode(data))
+
+    assert list(arrays['present_speed']) == pytest.approx([22.2, -44.4, 66.6])
+    assert list(arrays['present_load']) == pytest.approx([-1.0, 2.0, -3.0])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# CRC-16 implementations of dynamixel_sdk.crc against a bitwise reference
+
+import random
+
+import pytest
+
+from dynamixel_sdk import crc
+
+LENGTHS = [0, 1, 2, 3, 7, 8, 9, 13, 14, 64, 255, 1023, 1024]
+
+
+def updateCRCBitwise(crc_accum, data, size):
+    # polynomial 0x8005, MSB first, no reflection: what the table of the original updateCRC() encodes
+    for byte in data[0: size]:
+        crc_accum ^= byte << 8
+        for _ in range(8):
+            crc_accum = ((crc_accum << 1) ^ 0x8005) if crc_accum & 0x8000 else (crc_accum << 1)
+            crc_accum &= 0xFFFF
+    return crc_accum
+
+
+def native(crc_accum, data, size):
+    if not crc.isNativeCRCAvailable():
+        pytest.skip("_crc extension is not built")
+    return crc._updateCRCNative(crc_accum, bytearray(data), size)
+
+
+IMPLEMENTATIONS = [
+    ('bytewise', lambda crc_accum, data, size: crc._updateCRCBytewise(crc_accum, list(data), 0, size)),
+    ('slicing', lambda crc_accum, data, size: crc._updateCRCSlicing(crc_accum, bytes(data), size)),
+    ('python_list', lambda crc_accum, data, size: crc.updateCRCPython(crc_accum, list(data), size)),
+    ('python_bytearray', lambda crc_accum, data, size: crc.updateCRCPython(crc_accum, bytearray(data), size)),
+    ('python_memoryview', lambda crc_accum, data, size: crc.updateCRCPython(crc_accum, memoryview(bytearray(data)),
+                                                                           size)),
+    ('update_list', lambda crc_accum, data, size: crc.updateCRC(crc_accum, list(data), size)),
+    ('update_bytearray', lambda crc_accum, data, size: crc.updateCRC(crc_accum, bytearray(data), size)),
+    ('native', native),
+]
+
+
+def test_table_matches_polynomial():
+    for b in range(256):
+        assert crc.CRC_TABLE[b] == updateCRCBitwise(0, [b], 1)
+        assert crc.CRC_TABLE_1[b] == updateCRCBitwise(0, [b, 0], 2)
+
+
+@pytest.mark.parametrize('name, update_crc', IMPLEMENTATIONS, ids=[name for name, _ in IMPLEMENTATIONS])
+@pytest.mark.parametrize('length', LENGTHS)
+def test_implementation_matches_reference(name, update_crc, length):
+    rand = random.Random(length)
+    for _ in range(4):
+        crc_accum = rand.randrange(0x10000)
+        # a few bytes past the size: only data_blk_size bytes count
+        data = bytearray(rand.randrange(256) for _ in range(length + 3))
+        assert update_crc(crc_accum, data, length) == updateCRCBitwise(crc_accum, data, length)
+
+
+def test_chained_updates():
+    data = bytearray(random.Random(1).randrange(256) for _ in range(301))
+    crc_accum = crc.updateCRC(0, data[0: 150], 150)
+    crc_accum = crc.updateCRC(crc_accum, data[150:], 151)
+    assert crc_accum == updateCRCBitwise(0, data, len(data))
+
+
+def test_ping_packet_crc():
+    # ping instruction to ID 1 from the Protocol 2.0 e-Manual: FF FF FD 00 01 03 00 01 19 4E
+    packet = bytearray([0xFF, 0xFF, 0xFD, 0x00, 0x01, 0x03, 0x00, 0x01])
+    for name, update_crc in IMPLEMENTATIONS[0: -1]:
+        assert update_crc(0, packet, len(packet)) == 0x4E19
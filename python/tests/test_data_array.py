@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# NumPy access to group read results, on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+np = pytest.importorskip('numpy')
+
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort(id_list):
+    clock = FakeClock()
+    bus = VirtualBus(2.0, 1000000, clock)
+    for dxl_id in id_list:
+        device = VirtualDevice(dxl_id, 1020)
+        device.setValue('present_position', dxl_id * 100)
+        device.setValue('present_velocity', -dxl_id)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port
+
+
+def test_sync_read_arrays():
+    port = makePort([1, 2, 3])
+    group = GroupSyncRead(port, PacketHandler(2.0), ADDR_PRESENT_VELOCITY, 8)
+    for dxl_id in (1, 2, 4, 3):
+        group.addParam(dxl_id)
+
+    assert group.txRxPacket() == COMM_RX_TIMEOUT
+    # nothing is copied until an array is asked for
+    assert group.data_buffer is None
+
+    arrays = group.getFieldArrays({'velocity': (ADDR_PRESENT_VELOCITY, 'i4'), 'position': (ADDR_PRESENT_POSITION, 'u4')})
+    assert group.getIdList() == [1, 2, 4, 3]
+    assert arrays['position'].tolist() == [100, 200, 0, 300]
+    assert arrays['velocity'].tolist() == [-1, -2, 0, -3]
+    assert group.getAvailableMask().tolist() == [True, True, False, True]
+    assert group.getByteArray().shape == (4, 8)
+
+
+def test_short_payload_keeps_rows():
+    port = makePort([])
+    group = GroupSyncRead(port, PacketHandler(2.0), ADDR_PRESENT_POSITION, 4)
+    for dxl_id in (1, 2, 3):
+        group.addParam(dxl_id)
+
+    group.setStatus({1: [bytearray([1, 1, 1, 1]), COMM_SUCCESS, 0],
+                     2: [bytearray([2, 2, 2, 2]), COMM_SUCCESS, 0],
+                     3: [bytearray([3, 3]), COMM_SUCCESS, 0]}, COMM_SUCCESS)
+
+    assert group.getByteArray().tolist() == [[1, 1, 1, 1], [2, 2, 2, 2], [3, 3, 0, 0]]
+    assert len(group.data_buffer) == 12
+
+
+def test_bulk_read_arrays():
+    port = makePort([1, 2])
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    group.addParam(2, ADDR_PRESENT_VELOCITY, 8)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.data_buffer is None
+
+    arrays = group.getFieldArrays({'position': (ADDR_PRESENT_POSITION, 'u4')})
+    assert group.getIdList() == [1, 2]
+    assert arrays['position'].tolist() == [100, 200]
+    assert group.getByteArray().shape == (2, 8)
+
+
+def test_sync_read_arrays_follow_param_changes():
+    port = makePort([1, 2, 3, 5])
+    group = GroupSyncRead(port, PacketHandler(2.0), ADDR_PRESENT_POSITION, 4)
+    for dxl_id in (1, 2, 3):
+        group.addParam(dxl_id)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    fields = {'position': (ADDR_PRESENT_POSITION, 'u4')}
+    assert group.getFieldArrays(fields)['position'].tolist() == [100, 200, 300]
+
+    group.removeParam(2)
+    assert group.getIdList() == [1, 3]
+    assert group.getFieldArrays(fields)['position'].tolist() == [100, 300]
+
+    # an added ID has no data until the next read
+    group.addParam(5)
+    assert group.getIdList() == [1, 3, 5]
+    assert group.getFieldArrays(fields)['position'].tolist() == [100, 300, 0]
+    assert group.getData(5, ADDR_PRESENT_POSITION, 4) == 0
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getFieldArrays(fields)['position'].tolist() == [100, 300, 500]
+
+    group.clearParam()
+    assert group.getIdList() == []
+    assert group.getByteArray().shape == (0, 4)
+
+
+def test_bulk_read_arrays_follow_param_changes():
+    port = makePort([1, 2])
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    group.addParam(2, ADDR_PRESENT_POSITION, 4)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getFieldArrays({'position': (ADDR_PRESENT_POSITION, 'u4')})['position'].tolist() == [100, 200]
+    fields = {'position': (ADDR_PRESENT_POSITION, 'u4'), 'velocity': (ADDR_PRESENT_VELOCITY, 'i4')}
+
+    # a new field changes the ranges of ID 1: its old data is gone until the next read
+    group.addParam(1, ADDR_PRESENT_VELOCITY, 4)
+    assert not group.isAvailable(1, ADDR_PRESENT_POSITION, 4)
+    assert group.getData(1, ADDR_PRESENT_POSITION, 4) == 0
+    assert group.getData(2, ADDR_PRESENT_POSITION, 4) == 200
+    arrays = group.getFieldArrays(fields)
+    assert arrays['position'].tolist() == [0, 200]
+    assert arrays['velocity'].tolist() == [0, 0]
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    arrays = group.getFieldArrays(fields)
+    assert arrays['position'].tolist() == [100, 200]
+    assert arrays['velocity'].tolist() == [-1, 0]
+
+    group.removeParam(1)
+    assert group.getIdList() == [2]
+    assert group.getFieldArrays({'position': (ADDR_PRESENT_POSITION, 'u4')})['position'].tolist() == [200]
+
+    group.clearParam()
+    assert group.getIdList() == []
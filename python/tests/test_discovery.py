@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# discover() on a VirtualBus in simulated time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ADDR_PRESENT_POSITION = 132
+ID_LIST = [1, 2, 3, 5, 40]
+
+
+def makePort(protocol_version=2.0):
+    clock = FakeClock()
+    bus = VirtualBus(protocol_version, 1000000, clock)
+    for dxl_id in ID_LIST:
+        device = VirtualDevice(dxl_id, 1020 if protocol_version == 2.0 else 12)
+        device.setValue('return_delay_time', 0)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, clock
+
+
+def getScanLimitNs(port, max_id):
+    # ping answers up to the slot of max_id, the packet timeout margin and one slot of slack
+    return int((getPingSlotTime(port) * (max_id + 1) + 20.0) * 1000000)
+
+
+def test_discover_all():
+    port, clock = makePort()
+    data_list, result = discover(port, PacketHandler(2.0))
+
+    assert result == COMM_SUCCESS
+    assert sorted(data_list) == ID_LIST
+    assert data_list[1] == [1020, 45]
+    assert clock.getTimeNs() >= int(getPingSlotTime(port) * MAX_ID * 1000000)
+
+
+def test_discover_expected_ids_bounds_wait():
+    port, clock = makePort()
+    data_list, result = discover(port, PacketHandler(2.0), expected_ids=[1, 3])
+
+    assert result == COMM_SUCCESS
+    assert sorted(data_list) == [1, 2, 3]
+    assert clock.getTimeNs() <= getScanLimitNs(port, 3)
+
+
+def test_discover_max_id_bounds_wait():
+    port, clock = makePort()
+    data_list, result = discover(port, PacketHandler(2.0), max_id=5)
+
+    assert result == COMM_SUCCESS
+    assert sorted(data_list) == [1, 2, 3, 5]
+    assert clock.getTimeNs() <= getScanLimitNs(port, 5)
+
+
+def test_next_transaction_after_discover():
+    # the answers of the scanned slots must not reach the next transaction
+    port, _ = makePort()
+    ph = PacketHandler(2.0)
+    port.bus.removeDevice(40)
+    port.bus.getDevice(5).setValue('present_position', 1234)
+
+    data_list, _ = discover(port, ph, expected_ids=[1, 5])
+    assert sorted(data_list) == [1, 2, 3, 5]
+
+    position, result, error = ph.read4ByteTxRx(port, 5, ADDR_PRESENT_POSITION)
+    assert (position, result, error) == (1234, COMM_SUCCESS, 0)
+    assert port.getBytesAvailable() == 0
+
+
+def test_discover_protocol1():
+    port, _ = makePort(1.0)
+    data_list, result = discover(port, PacketHandler(1.0), expected_ids=[2, 5])
+
+    assert result == COMM_SUCCESS
+    assert sorted(data_list) == [2, 5]
+    assert data_list[2][0] == 12
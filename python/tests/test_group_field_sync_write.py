@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# GroupFieldSyncWrite typed fields on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ID_LIST = [1, 2, 3]
+ADDR_PROFILE_VELOCITY = 112
+
+# X series profile velocity + goal position
+FIELDS = [('goal_position', 4, 4, True), ('profile_velocity', 0, 4, False)]
+
+
+def makePort():
+    bus = VirtualBus(2.0, 1000000, FakeClock())
+    for dxl_id in ID_LIST:
+        bus.addDevice(VirtualDevice(dxl_id, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def getValues(bus, dxl_id):
+    device = bus.getDevice(dxl_id)
+    return (device.getValue('profile_velocity'), device.getValue('goal_position'))
+
+
+def makeGroup(port):
+    group = GroupFieldSyncWrite(port, PacketHandler(2.0), ADDR_PROFILE_VELOCITY, FIELDS)
+    for dxl_id in ID_LIST:
+        assert group.addParam(dxl_id, {'profile_velocity': 0, 'goal_position': 0})
+    return group
+
+
+def test_layout_must_cover_range():
+    with pytest.raises(ValueError):
+        GroupFieldSyncWrite(None, PacketHandler(2.0), 112, [('profile_velocity', 0, 4, False),
+                                                            ('goal_position', 6, 4, True)])
+    with pytest.raises(ValueError):
+        GroupFieldSyncWrite(None, PacketHandler(2.0), 112, [('goal_position', 0, 3, True)])
+
+
+def test_param_dict_and_sequence():
+    port, bus = makePort()
+    group = GroupFieldSyncWrite(port, PacketHandler(2.0), ADDR_PROFILE_VELOCITY, FIELDS)
+    assert group.field_names == ['profile_velocity', 'goal_position'] and group.data_length == 8
+
+    assert group.addParam(1, {'goal_position': -1000, 'profile_velocity': 50})
+    assert group.addParam(2, (60, 2000))
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in (1, 2)] == [(50, -1000), (60, 2000)]
+
+    assert group.changeParam(1, (70, -4000))
+    assert group.txPacket() == COMM_SUCCESS
+    assert getValues(bus, 1) == (70, -4000)
+
+
+def test_set_values_of_all_and_some_ids():
+    port, bus = makePort()
+    group = makeGroup(port)
+
+    assert group.setValues(dict((dxl_id, (10 * dxl_id, -100 * dxl_id)) for dxl_id in ID_LIST))
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in ID_LIST] == [(10, -100), (20, -200), (30, -300)]
+
+    assert group.setValues({2: {'profile_velocity': 5, 'goal_position': 4095}})
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in ID_LIST] == [(10, -100), (5, 4095), (30, -300)]
+
+    assert not group.setValues({4: (0, 0)})
+
+
+def test_set_arrays():
+    port, bus = makePort()
+    group = makeGroup(port)
+    id_list = group.getIdList()
+    assert id_list == ID_LIST
+
+    assert group.setArrays({'profile_velocity': [1, 2, 3], 'goal_position': [-1, -2, -3]})
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in id_list] == [(1, -1), (2, -2), (3, -3)]
+
+    assert not group.setArrays({'profile_velocity': [1, 2], 'goal_position': [1, 2]})
+
+    np = pytest.importorskip('numpy')
+    assert group.setArrays({'profile_velocity': np.array([7, 8, 9], dtype=np.uint32),
+                            'goal_position': np.array([100, -200, 300], dtype=np.int32)})
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in id_list] == [(7, 100), (8, -200), (9, 300)]
+
+
+def test_values_in_packet_survive_rebuild():
+    port, bus = makePort()
+    group = makeGroup(port)
+    assert group.setValues({1: (11, 111), 2: (22, 222), 3: (33, 333)})
+    assert group.txPacket() == COMM_SUCCESS
+
+    bus.addDevice(VirtualDevice(4, 1020))
+    group.removeParam(2)
+    assert group.addParam(4, (44, 444))
+    assert group.getIdList() == [1, 3, 4]
+    for dxl_id in ID_LIST:
+        bus.getDevice(dxl_id).setValue('goal_position', 0)
+
+    assert group.txPacket() == COMM_SUCCESS
+    assert [getValues(bus, dxl_id) for dxl_id in (1, 2, 3, 4)] == [(11, 111), (22, 0), (33, 333), (44, 444)]
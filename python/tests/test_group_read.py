@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# GroupSyncRead / GroupBulkRead results on a VirtualBus in simulated time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ADDR_TORQUE_ENABLE = 64
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+
+# AX-12, protocol 1.0
+ADDR_AX_TORQUE_ENABLE = 24
+ADDR_AX_PRESENT_POSITION = 36
+
+
+def makePort(protocol_version, id_list):
+    clock = FakeClock()
+    bus = VirtualBus(protocol_version, 1000000, clock)
+    for dxl_id in id_list:
+        device = VirtualDevice(dxl_id, 1020 if protocol_version == 2.0 else 12)
+        device.setValue('present_position', dxl_id * 100)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def test_sync_read_results_per_id():
+    # ID 2 is missing, ID 4 does not answer reads: the IDs after them are still received
+    port, bus = makePort(2.0, [1, 3, 4, 5])
+    bus.getDevice(4).setValue('status_return_level', 0)
+    group = GroupSyncRead(port, PacketHandler(2.0), ADDR_PRESENT_POSITION, 4)
+    for dxl_id in (1, 2, 3, 4, 5):
+        assert group.addParam(dxl_id)
+
+    assert group.txRxPacket() == COMM_RX_TIMEOUT
+    assert group.getFailedIds() == [2, 4]
+    for dxl_id in (1, 3, 5):
+        assert group.getResult(dxl_id) == COMM_SUCCESS
+        assert group.isAvailable(dxl_id, ADDR_PRESENT_POSITION, 4)
+        assert group.getData(dxl_id, ADDR_PRESENT_POSITION, 4) == dxl_id * 100
+    assert group.getResult(2) == COMM_RX_TIMEOUT
+    assert not group.isAvailable(2, ADDR_PRESENT_POSITION, 4)
+    assert group.getData(4, ADDR_PRESENT_POSITION, 4) == 0
+
+    # one instruction for the whole train
+    assert bus.instruction_count == 1
+    assert not port.is_busy
+
+
+def test_sync_read_all_answer():
+    port, _ = makePort(2.0, [1, 2, 3])
+    group = GroupSyncRead(port, PacketHandler(2.0), ADDR_PRESENT_VELOCITY, 8)
+    for dxl_id in (3, 1, 2):
+        group.addParam(dxl_id)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getFailedIds() == []
+    assert [group.getData(dxl_id, ADDR_PRESENT_POSITION, 4) for dxl_id in (1, 2, 3)] == [100, 200, 300]
+
+
+def test_bulk_read_rounds():
+    port, bus = makePort(2.0, [1, 2])
+    ph = PacketHandler(2.0)
+    bus.getDevice(1).setValue('torque_enable', 1)
+    group = GroupBulkRead(port, ph)
+
+    # the two fields of ID 1 are too far apart for one range
+    group.merge_gap = 16
+    assert group.addParam(1, ADDR_TORQUE_ENABLE, 1)
+    assert group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    assert group.addParam(2, ADDR_PRESENT_POSITION, 4)
+    assert not group.addParam(2, ADDR_PRESENT_POSITION, 4)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getSpanList(1) == [(ADDR_TORQUE_ENABLE, 1), (ADDR_PRESENT_POSITION, 4)]
+    assert bus.instruction_count == 2
+    assert group.getData(1, ADDR_TORQUE_ENABLE, 1) == 1
+    assert group.getData(1, ADDR_PRESENT_POSITION, 4) == 100
+    assert group.getData(2, ADDR_PRESENT_POSITION, 4) == 200
+    assert not group.isAvailable(2, ADDR_TORQUE_ENABLE, 1)
+
+    # the port is held over the rounds and free afterwards
+    assert port.port_lock.owner is None
+    assert port.port_lock.depth == 0
+
+
+def test_bulk_read_merges_close_fields():
+    port, bus = makePort(2.0, [1])
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_PRESENT_VELOCITY, 4)
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getSpanList(1) == [(ADDR_PRESENT_VELOCITY, 8)]
+    assert bus.instruction_count == 1
+    assert group.getData(1, ADDR_PRESENT_POSITION, 4) == 100
+
+
+def test_bulk_read_merge_gap_follows_round_cost():
+    # a round costs the USB latency timer and the return delay: at 1 Mbps far more than the 67 bytes
+    # between torque enable and present position, at 57600 bps with a 1 ms latency timer less
+    port, bus = makePort(2.0, [1, 2])
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_TORQUE_ENABLE, 1)
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    group.addParam(2, ADDR_PRESENT_POSITION, 4)
+
+    assert group.getMergeGap() == 26 + int(16.5 / port.tx_time_per_byte)
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getSpanList(1) == [(ADDR_TORQUE_ENABLE, 72)]
+    assert group.round_list == [[1, 2]]
+    assert bus.instruction_count == 1
+    assert group.getData(1, ADDR_PRESENT_POSITION, 4) == 100
+
+    port, bus = makePort(2.0, [1, 2])
+    bus.setBaudRate(57600)
+    port.setBaudRate(57600)
+    port.setLatencyTimer(1)
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_TORQUE_ENABLE, 1)
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    group.addParam(2, ADDR_PRESENT_POSITION, 4)
+
+    assert group.getMergeGap() == 26 + int(1.5 / port.tx_time_per_byte)
+    assert group.getSpanList(1) == [(ADDR_TORQUE_ENABLE, 1), (ADDR_PRESENT_POSITION, 4)]
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.round_list == [[1, 2], [1]]
+    assert bus.instruction_count == 2
+    assert group.getData(1, ADDR_PRESENT_POSITION, 4) == 100
+
+
+def test_bulk_read_failed_round():
+    port, bus = makePort(2.0, [1, 2])
+    group = GroupBulkRead(port, PacketHandler(2.0))
+    group.addParam(1, ADDR_TORQUE_ENABLE, 1)
+    group.addParam(1, ADDR_PRESENT_POSITION, 4)
+    group.addParam(3, ADDR_PRESENT_POSITION, 4)
+
+    assert group.txRxPacket() == COMM_RX_TIMEOUT
+    assert group.getResult(1) == COMM_SUCCESS
+    assert group.getResult(3) == COMM_RX_TIMEOUT
+    assert not port.is_busy
+    assert port.port_lock.owner is None
+
+
+def test_bulk_read_protocol1():
+    port, bus = makePort(1.0, [1, 2])
+    bus.getDevice(2).setValue('torque_enable', 1)
+    group = GroupBulkRead(port, PacketHandler(1.0))
+    group.addParam(1, ADDR_AX_PRESENT_POSITION, 2)
+    group.addParam(2, ADDR_AX_TORQUE_ENABLE, 1)
+    group.addParam(2, ADDR_AX_PRESENT_POSITION, 2)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert group.getData(1, ADDR_AX_PRESENT_POSITION, 2) == 100
+    assert group.getData(2, ADDR_AX_TORQUE_ENABLE, 1) == 1
+    assert group.getData(2, ADDR_AX_PRESENT_POSITION, 2) == 200
+
+
+def test_bulk_read_protocol1_span_fits_status_packet():
+    # fields close enough to merge over more bytes than a protocol 1.0 status packet holds
+    port, bus = makePort(1.0, [1])
+    device = bus.getDevice(1)
+    group = GroupBulkRead(port, PacketHandler(1.0))
+    for address in range(0, 251, 10):
+        device.write(address, bytearray([address, 0]))
+        group.addParam(1, address, 2)
+
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert all(length <= 248 for _, length in group.getSpanList(1))
+    assert len(group.getSpanList(1)) == 2
+    assert [group.getData(1, address, 2) for address in range(0, 251, 10)] == list(range(0, 251, 10))
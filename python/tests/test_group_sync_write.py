@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# GroupSyncWrite packet laid out once and edited in place by setValue() / changeParam(), on a VirtualBus
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ID_LIST = [1, 2, 3]
+
+# (protocol version, model number, goal position address, width)
+PROTOCOLS = [(1.0, 12, 30, 2), (2.0, 1020, 116, 4)]
+
+
+def makePort(protocol_version, model_number):
+    bus = VirtualBus(protocol_version, 1000000, FakeClock())
+    for dxl_id in ID_LIST:
+        bus.addDevice(VirtualDevice(dxl_id, model_number))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def makeGroup(port, ph, address, width, value_dict):
+    group = GroupSyncWrite(port, ph, address, width)
+    for dxl_id in sorted(value_dict):
+        group.addParam(dxl_id, bytearray((value_dict[dxl_id] >> (8 * i)) & 0xFF for i in range(width)))
+    return group
+
+
+def getGoals(bus):
+    return [bus.getDevice(dxl_id).getValue('goal_position') for dxl_id in ID_LIST]
+
+
+@pytest.mark.parametrize('protocol_version, model_number, address, width', PROTOCOLS)
+def test_set_value_edits_packet_in_place(protocol_version, model_number, address, width):
+    port, bus = makePort(protocol_version, model_number)
+    ph = PacketHandler(protocol_version)
+    group = makeGroup(port, ph, address, width, {1: 100, 2: 200, 3: 300})
+
+    assert group.txPacket() == COMM_SUCCESS
+    assert getGoals(bus) == [100, 200, 300]
+    packet = group.txpacket
+
+    for cycle in range(3):
+        for dxl_id in ID_LIST:
+            assert group.setValue(dxl_id, 500 + 10 * cycle + dxl_id)
+        assert group.txPacket() == COMM_SUCCESS
+        assert getGoals(bus) == [500 + 10 * cycle + dxl_id for dxl_id in ID_LIST]
+
+    # no rebuild, and the same bytes as a group built from scratch
+    assert group.txpacket is packet and not group.is_param_changed
+    fresh = makeGroup(port, ph, address, width, dict((dxl_id, 520 + dxl_id) for dxl_id in ID_LIST))
+    assert fresh.txPacket() == COMM_SUCCESS  # header and CRC are filled in on transmit
+    assert group.txpacket == fresh.txpacket
+
+    assert group.changeParam(2, bytearray(width))
+    assert group.txPacket() == COMM_SUCCESS
+    assert getGoals(bus) == [521, 0, 523]
+    assert group.txpacket is packet
+
+
+def test_set_value_masks_negative_value():
+    port, bus = makePort(2.0, 1020)
+    group = makeGroup(port, PacketHandler(2.0), 116, 4, {1: 0, 2: 0})
+    assert group.txPacket() == COMM_SUCCESS
+
+    assert group.setValue(1, -1000)
+    assert group.setValue(2, 0x1FFFFFFFF)
+    assert group.txPacket() == COMM_SUCCESS
+    assert bus.getDevice(1).getValue('goal_position') == -1000
+    assert bus.getDevice(2).getValue('goal_position') == -1
+
+
+def test_set_value_with_stuffing_keeps_layout():
+    # FF FF FD in the data is stuffed on the wire, the stored packet stays unstuffed
+    port, bus = makePort(2.0, 1020)
+    group = makeGroup(port, PacketHandler(2.0), 116, 4, {1: 0, 2: 0, 3: 0})
+    assert group.txPacket() == COMM_SUCCESS
+    length = len(group.txpacket)
+
+    for _ in range(2):
+        assert group.setValue(2, 0x00FDFFFF)
+        assert group.txPacket() == COMM_SUCCESS
+        assert len(group.txpacket) == length
+        assert getGoals(bus) == [0, 0x00FDFFFF, 0]
+
+    assert group.setValue(2, 7)
+    assert group.txPacket() == COMM_SUCCESS
+    assert getGoals(bus) == [0, 7, 0]
+
+
+def test_param_change_rebuilds_packet():
+    port, bus = makePort(2.0, 1020)
+    group = makeGroup(port, PacketHandler(2.0), 116, 4, {1: 10, 2: 20})
+    assert group.txPacket() == COMM_SUCCESS
+    packet = group.txpacket
+
+    assert not group.setValue(3, 30)
+    assert group.addParam(3, bytearray(4))
+    assert group.setValue(3, 30)
+    group.removeParam(1)
+    assert group.setValue(2, 25)
+    assert group.txPacket() == COMM_SUCCESS
+
+    assert group.txpacket is not packet and not group.is_param_changed
+    assert getGoals(bus) == [10, 25, 30]
+
+    group.clearParam()
+    assert group.txPacket() == COMM_NOT_AVAILABLE
+
+
+def test_set_value_of_odd_width():
+    # 3 bytes have no struct format
+    port, bus = makePort(2.0, 1020)
+    group = GroupSyncWrite(port, PacketHandler(2.0), 116, 3)
+    for dxl_id in ID_LIST:
+        group.addParam(dxl_id, bytearray(3))
+    assert group.txPacket() == COMM_SUCCESS
+
+    assert group.setValue(2, 0x12345678)
+    assert group.txPacket() == COMM_SUCCESS
+    assert getGoals(bus) == [0, 0x345678, 0]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# IndirectAddressMap programming and typed sync groups on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ID_LIST = [1, 2]
+ADDR_INDIRECT_ADDRESS = 168
+ADDR_INDIRECT_DATA = 224
+INDIRECT_COUNT = 28
+
+
+class IndirectDevice(VirtualDevice):
+    # X series servo resolving the indirect data of block 0 through its indirect address table
+    def getTarget(self, address):
+        index = address - ADDR_INDIRECT_DATA
+        if index < 0 or index >= INDIRECT_COUNT:
+            return address
+        entry = ADDR_INDIRECT_ADDRESS + 2 * index
+        return DXL_MAKEWORD(self.memory[entry], self.memory[entry + 1])
+
+    def read(self, address, length):
+        if VirtualDevice.read(self, address, length) is None:
+            return None
+        return bytearray(self.memory[self.getTarget(address + i)] for i in range(length))
+
+    def write(self, address, data):
+        if address + len(data) > MEMORY_SIZE:
+            return False
+
+        # runs of consecutive targets, so that a goal written through the indirect data is still followed
+        runs = []
+        for i in range(len(data)):
+            target = self.getTarget(address + i)
+            if runs and runs[-1][0] + len(runs[-1][1]) == target:
+                runs[-1][1].append(data[i])
+            else:
+                runs.append((target, bytearray([data[i]])))
+
+        for target, run in runs:
+            VirtualDevice.write(self, target, run)
+        return True
+
+
+class RecordingBus(VirtualBus):
+    # keeps the instruction of every packet received
+    def __init__(self, *args):
+        VirtualBus.__init__(self, *args)
+        self.instruction_list = []
+
+    def dispatch(self, instruction, end_ns):
+        self.instruction_list.append(instruction[1])
+        VirtualBus.dispatch(self, instruction, end_ns)
+
+
+def makeMap():
+    bus = RecordingBus(2.0, 1000000, FakeClock())
+    for dxl_id in ID_LIST:
+        bus.addDevice(IndirectDevice(dxl_id, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+
+    # the fields of tests/protocol2_0/indirect_address.py
+    indirect = IndirectAddressMap(port, PacketHandler(2.0), 'X_SERIES')
+    assert indirect.addWriteField('goal_position', 116, 4, True)
+    assert indirect.addWriteField('led_red', 65, 1)
+    assert indirect.addReadField('present_position', 132, 4, True)
+    assert indirect.addReadField('moving', 122, 1)
+    return indirect, bus
+
+
+def test_layout():
+    indirect, bus = makeMap()
+    assert (indirect.getWriteDataAddress(), indirect.getReadDataAddress()) == (224, 229)
+
+    table = indirect.makeTable()
+    assert len(table) == 2 * 10
+    assert [DXL_MAKEWORD(table[i], table[i + 1]) for i in range(0, len(table), 2)] == \
+        [116, 117, 118, 119, 65, 132, 133, 134, 135, 122]
+
+    # names are unique and the block holds 28 bytes
+    assert not indirect.addReadField('moving', 122, 1)
+    assert indirect.addReadField('present_current', 126, 2, True)
+    assert indirect.addReadField('present_velocity', 128, 4, True)
+    assert indirect.addReadField('present_pwm', 124, 2, True)
+    assert indirect.addReadField('velocity_trajectory', 136, 4, True)
+    assert indirect.addReadField('position_trajectory', 140, 4, True)
+    assert (indirect.getWriteLength() + indirect.getReadLength()) == 26
+    assert indirect.addReadField('present_input_voltage', 144, 2)
+    assert not indirect.addReadField('present_temperature', 146, 1)
+
+
+def test_invalid_map():
+    with pytest.raises(ValueError):
+        IndirectAddressMap(None, PacketHandler(1.0))
+    with pytest.raises(ValueError):
+        IndirectAddressMap(None, PacketHandler(2.0), 'X_SERIES', block=2)
+    with pytest.raises(ValueError):
+        IndirectAddressMap(None, PacketHandler(2.0), 'AX_SERIES')
+
+
+def test_program_writes_only_changed_tables():
+    indirect, bus = makeMap()
+
+    assert indirect.program(ID_LIST) == []
+    assert bus.instruction_list == [INST_READ, INST_WRITE, INST_READ, INST_WRITE]
+    for dxl_id in ID_LIST:
+        assert bus.getDevice(dxl_id).read(ADDR_INDIRECT_ADDRESS, 20) == indirect.makeTable()
+
+    # programmed tables are only read back
+    bus.instruction_list = []
+    assert indirect.program(ID_LIST) == []
+    assert bus.instruction_list == [INST_READ, INST_READ]
+
+    # one entry changed on ID 2, ID 5 is not on the bus
+    bus.getDevice(2).memory[ADDR_INDIRECT_ADDRESS] = 0
+    bus.instruction_list = []
+    assert indirect.program(ID_LIST + [5]) == [5]
+    assert bus.instruction_list == [INST_READ, INST_READ, INST_WRITE, INST_READ, INST_WRITE]
+    assert bus.getDevice(2).read(ADDR_INDIRECT_ADDRESS, 20) == indirect.makeTable()
+
+
+def test_sync_groups_through_indirect_data():
+    indirect, bus = makeMap()
+    assert indirect.program(ID_LIST) == []
+
+    group_sync_write = indirect.makeGroupSyncWrite()
+    group_sync_read = indirect.makeGroupSyncRead()
+    assert (group_sync_write.data_length, group_sync_read.data_length) == (5, 5)
+    for dxl_id in ID_LIST:
+        assert group_sync_write.addParam(dxl_id, {'goal_position': -1000 * dxl_id, 'led_red': dxl_id % 2})
+        assert group_sync_read.addParam(dxl_id)
+    bus.getDevice(2).setValue('moving', 1)
+
+    assert group_sync_write.txPacket() == COMM_SUCCESS
+    for dxl_id in ID_LIST:
+        device = bus.getDevice(dxl_id)
+        assert (device.getValue('goal_position'), device.getValue('led')) == (-1000 * dxl_id, dxl_id % 2)
+
+    bus.instruction_list = []
+    assert group_sync_read.txRxPacket() == COMM_SUCCESS
+    assert bus.instruction_list == [INST_SYNC_READ]
+    assert group_sync_read.getFields(1) == {'present_position': -1000, 'moving': 0}
+    assert group_sync_read.getFields(2) == {'present_position': -2000, 'moving': 1}
+    assert group_sync_read.getField(2, 'present_position') == -2000
+
+    pytest.importorskip('numpy')
+    arrays = group_sync_read.getFieldArrays()
+    assert list(arrays['present_position']) == [-1000, -2000]
+    assert list(arrays['moving']) == [0, 1]
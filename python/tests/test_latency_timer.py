@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# PortHandler.calibrateLatencyTimer() on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+USB_LATENCY = 4.0  # [ms] of the virtual USB adapter
+
+
+def makePort(protocol_version):
+    bus = VirtualBus(protocol_version, 1000000, FakeClock(), usb_latency=USB_LATENCY)
+    device = VirtualDevice(1, 1020 if protocol_version == 2.0 else 12)
+    device.setValue('return_delay_time', 0)
+    bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+@pytest.mark.parametrize('protocol_version, status_length', [(1.0, 6), (2.0, 14)])
+def test_calibrate_measures_one_round_trip(protocol_version, status_length):
+    port, bus = makePort(protocol_version)
+    ph = PacketHandler(protocol_version)
+
+    latency_timer, max_rtt, result = port.calibrateLatencyTimer(ph, 1, sample_count=5)
+
+    assert result == COMM_SUCCESS
+    assert bus.instruction_count == 5
+    # ping packet and status packet on the wire plus the USB latency
+    wire_time = (len(ph.makePingPacket(1)) + status_length) * port.tx_time_per_byte
+    assert max_rtt == pytest.approx(USB_LATENCY + wire_time, abs=0.05)
+    assert latency_timer == port.getLatencyTimer() == 3
+
+    # the packet timeout set from it covers a ping
+    assert ph.ping(port, 1)[1] == COMM_SUCCESS
+
+
+def test_calibrate_without_answer_keeps_latency_timer():
+    port, bus = makePort(2.0)
+    port.setLatencyTimer(16)
+
+    latency_timer, max_rtt, result = port.calibrateLatencyTimer(PacketHandler(2.0), 7, sample_count=3)
+
+    assert (latency_timer, max_rtt, result) == (16, 0.0, COMM_RX_TIMEOUT)
+    assert port.calibrateLatencyTimer(PacketHandler(2.0), BROADCAST_ID)[2] == COMM_NOT_AVAILABLE
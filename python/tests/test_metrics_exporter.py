@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Histogram buckets of the Prometheus exporter
+
+from dynamixel_sdk.metrics_exporter import MetricsExporter, LATENCY_BUCKETS
+from dynamixel_sdk.transaction_monitor import LatencyHistogram
+
+
+def getBucketCounts(values_ns):
+    histogram = LatencyHistogram()
+    for value_ns in values_ns:
+        histogram.add(value_ns)
+    series = MetricsExporter().renderHistogram([], histogram)
+    return dict((dict(labels)['le'], count) for suffix, labels, count in series if suffix == '_bucket')
+
+
+def test_sample_at_bound_is_in_bucket():
+    counts = getBucketCounts([32000])
+    assert counts['3.2e-05'] == 1
+
+
+def test_sample_above_bound_is_not_in_bucket():
+    counts = getBucketCounts([32001, 39000, 63999])
+    assert counts['3.2e-05'] == 0
+    assert counts['6.4e-05'] == 3
+
+
+def test_buckets_count_samples_le_bound():
+    values_ns = [0, 500, 1000, 31999, 32000, 32001, 64000, 64001, 1000000, 5000000]
+    counts = getBucketCounts(values_ns)
+    for bound_us in LATENCY_BUCKETS:
+        expected = len([value_ns for value_ns in values_ns if value_ns <= bound_us * 1000])
+        assert counts['%g' % (bound_us / 1000000.0)] == expected
+    assert counts['+Inf'] == len(values_ns)
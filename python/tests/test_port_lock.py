@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Transaction lock of PortHandler between threads, on a VirtualBus in real time
+
+import threading
+import time
+
+import pytest
+
+from dynamixel_sdk import *
+
+ADDR_LED = 65
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort():
+    bus = VirtualBus(2.0, 1000000)
+    device = VirtualDevice(1, 1020)
+    device.setValue('return_delay_time', 0)
+    bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port
+
+
+def runInThread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join(5.0)
+    assert not thread.is_alive()
+    return result[0]
+
+
+@pytest.mark.parametrize('call', [
+    lambda ph, port: ph.write1ByteTxOnly(port, 1, ADDR_LED, 1),
+    lambda ph, port: ph.regWriteTxOnly(port, 1, ADDR_LED, 1, [1]),
+    lambda ph, port: ph.broadcastPing(port)[1],
+    lambda ph, port: ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1],
+])
+def test_busy_call_keeps_transaction_of_owner(call):
+    ph = PacketHandler(2.0)
+    port = makePort()
+
+    assert ph.readTx(port, 1, ADDR_PRESENT_POSITION, 4) == COMM_SUCCESS
+    owner = threading.current_thread()
+
+    assert runInThread(lambda: call(ph, port)) == COMM_PORT_BUSY
+    assert port.port_lock.owner is owner
+    assert port.is_busy
+
+    # a third thread still finds the port taken
+    assert runInThread(lambda: ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1]) == COMM_PORT_BUSY
+
+    data, result, error = ph.readRx(port, 1, 4)
+    assert result == COMM_SUCCESS
+    assert port.port_lock.owner is None
+    assert not port.is_busy
+
+
+def runInThreadRaising(func):
+    # the exception raised by func in another thread, None when it returns
+    return runInThread(lambda: catchException(func))
+
+
+def catchException(func):
+    try:
+        func()
+    except Exception as exc:
+        return exc
+    return None
+
+
+def test_release_from_other_thread_is_ignored():
+    ph = PacketHandler(2.0)
+    port = makePort()
+
+    assert ph.readTx(port, 1, ADDR_PRESENT_POSITION, 4) == COMM_SUCCESS
+
+    def release():
+        port.releasePort()
+        port.port_lock.release()
+    runInThread(release)
+
+    assert port.port_lock.owner is threading.current_thread()
+    assert port.is_busy
+    assert ph.readRx(port, 1, 4)[1] == COMM_SUCCESS
+
+
+def test_is_using_from_other_thread_raises():
+    ph = PacketHandler(2.0)
+    port = makePort()
+
+    assert ph.readTx(port, 1, ADDR_PRESENT_POSITION, 4) == COMM_SUCCESS
+
+    def setIsUsing(is_using):
+        port.is_using = is_using
+    assert isinstance(runInThreadRaising(lambda: setIsUsing(False)), RuntimeError)
+    assert isinstance(runInThreadRaising(lambda: setIsUsing(True)), RuntimeError)
+    assert port.port_lock.owner is threading.current_thread()
+
+    # the owner may set it again while its transaction runs
+    port.is_using = True
+    assert ph.readRx(port, 1, 4)[1] == COMM_SUCCESS
+    assert not port.is_using
+
+    # nothing to end once released, and the port is free for another thread
+    def useAndRelease():
+        setIsUsing(False)
+        setIsUsing(True)
+        assert port.port_lock.isOwner()
+        setIsUsing(False)
+    assert runInThreadRaising(useAndRelease) is None
+    assert port.port_lock.owner is None
+    assert not port.is_using
+
+
+def test_rx_on_other_thread_than_tx_raises():
+    ph = PacketHandler(2.0)
+    port = makePort()
+
+    assert ph.readTx(port, 1, ADDR_PRESENT_POSITION, 4) == COMM_SUCCESS
+    assert isinstance(runInThreadRaising(lambda: ph.readRx(port, 1, 4)), RuntimeError)
+
+    # the transaction is still the one of this thread
+    assert port.is_busy
+    port.is_using = False
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1] == COMM_SUCCESS
+
+
+def test_lock_timeout_waits_for_owner():
+    ph = PacketHandler(2.0)
+    port = makePort()
+    port.setLockTimeout(2000)
+
+    assert port.lockPort()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1]))
+    thread.start()
+    while port.getLockStats()['waiting'] == 0:
+        time.sleep(0.001)
+
+    assert ph.write4ByteTxRx(port, 1, 116, 1000)[0] == COMM_SUCCESS
+    port.unlockPort()
+    thread.join(5.0)
+
+    assert result == [COMM_SUCCESS]
+    assert port.getLockStats()['contention_count'] == 1
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Incremental status packet parsers, fed by hand and on a VirtualBus in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+from dynamixel_sdk.protocol1_packet_handler import Protocol1StatusParser
+from dynamixel_sdk.protocol2_packet_handler import Protocol2StatusParser
+
+ADDR_PRESENT_POSITION = 132
+
+
+def makeBus(protocol_version):
+    clock = FakeClock()
+    bus = VirtualBus(protocol_version, 1000000, clock)
+    device = VirtualDevice(1, 1020 if protocol_version == 2.0 else 12)
+    bus.addDevice(device)
+    return bus, device
+
+
+@pytest.mark.parametrize('protocol_version, parser_class', [(1.0, Protocol1StatusParser),
+                                                             (2.0, Protocol2StatusParser)])
+def test_packet_in_pieces_after_noise(protocol_version, parser_class):
+    bus, device = makeBus(protocol_version)
+    packet = bytes(bus.makeStatusPacket(device, 0, bytearray([1, 2, 3, 4])))
+    parser = parser_class()
+
+    parser.feed(b'\x00\xFF\x13')
+    assert parser.getPacket() == (None, COMM_RX_WAITING)
+
+    for idx in range(len(packet)):
+        parser.feed(packet[idx: idx + 1])
+        rxpacket, result = parser.getPacket()
+        if idx < len(packet) - 1:
+            assert result == COMM_RX_WAITING
+            assert parser.getWaitLength() > 0
+
+    assert result == COMM_SUCCESS
+    assert bytes(rxpacket) == packet
+    assert parser.discarded_bytes == 3
+    assert parser.available() == 0
+
+
+@pytest.mark.parametrize('protocol_version, parser_class', [(1.0, Protocol1StatusParser),
+                                                             (2.0, Protocol2StatusParser)])
+def test_corrupt_packet_then_resync(protocol_version, parser_class):
+    bus, device = makeBus(protocol_version)
+    packet = bus.makeStatusPacket(device, 0, bytearray([5, 6]))
+    corrupt = bytearray(packet)
+    corrupt[-1] ^= 0xFF
+    parser = parser_class()
+
+    parser.feed(bytes(corrupt) + bytes(packet))
+    assert parser.getPacket()[1] == COMM_RX_CORRUPT
+    rxpacket, result = parser.getPacket()
+    assert result == COMM_SUCCESS
+    assert bytes(rxpacket) == bytes(packet)
+    assert parser.corrupt_count == 1
+
+
+def test_ring_buffer_wraps():
+    bus, device = makeBus(2.0)
+    packet = bytes(bus.makeStatusPacket(device, 0, bytearray(range(10))))
+    parser = Protocol2StatusParser(64)
+
+    for _ in range(20):
+        parser.feed(packet)
+        rxpacket, result = parser.getPacket()
+        assert result == COMM_SUCCESS
+        assert bytes(rxpacket) == packet
+
+
+@pytest.mark.parametrize('protocol_version', [1.0, 2.0])
+def test_stale_bytes_do_not_answer_next_transaction(protocol_version):
+    bus, device = makeBus(protocol_version)
+    ph = PacketHandler(protocol_version)
+    port = VirtualPortHandler(bus)
+    port.openPort()
+
+    address = ADDR_PRESENT_POSITION if protocol_version == 2.0 else 36
+    device.write(address, bytearray([0x34, 0x12]))
+
+    # a complete status packet of ID 1 left over from an earlier transaction
+    ph.getStatusParser(port).feed(bytes(bus.makeStatusPacket(device, 0, bytearray([0xFF, 0xFF]))))
+
+    assert ph.read2ByteTxRx(port, 1, address) == (0x1234, COMM_SUCCESS, 0)
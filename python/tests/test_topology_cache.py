@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# TopologyCache.warmStart() hit, stale and miss on a VirtualBus in simulated time
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+from dynamixel_sdk.topology_cache import TopologyCache
+
+ID_LIST = [1, 2, 3]
+
+
+class RecordingBus(VirtualBus):
+    # keeps the instruction of every packet received
+    def __init__(self, *args):
+        VirtualBus.__init__(self, *args)
+        self.instruction_list = []
+
+    def dispatch(self, instruction, end_ns):
+        self.instruction_list.append(instruction[1])
+        VirtualBus.dispatch(self, instruction, end_ns)
+
+
+def makePort():
+    bus = RecordingBus(2.0, 1000000, FakeClock())
+    for dxl_id in ID_LIST:
+        bus.addDevice(VirtualDevice(dxl_id, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def makeCache(tmpdir, port, ph):
+    # a cache file written by a first run
+    path = str(tmpdir.join('dxl_topology.json'))
+    servos, is_cached = TopologyCache(path).warmStart(port, ph)
+    assert (sorted(servos), is_cached) == (ID_LIST, False)
+    return path
+
+
+def test_miss_scans_and_saves(tmpdir):
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    path = str(tmpdir.join('dxl_topology.json'))
+
+    servos, is_cached = TopologyCache(path).warmStart(port, ph)
+
+    assert not is_cached
+    assert bus.instruction_list[0] == INST_PING
+    assert servos[2] == {'model_number': 1020, 'firmware_version': 45,
+                         'return_delay_time': 250, 'status_return_level': 2}
+    assert TopologyCache(path).getServos('virtual') == servos
+
+
+def test_hit_is_one_sync_read(tmpdir):
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    path = makeCache(tmpdir, port, ph)
+    bus.instruction_list = []
+
+    servos, is_cached = TopologyCache(path).warmStart(port, ph)
+
+    assert (sorted(servos), is_cached) == (ID_LIST, True)
+    assert bus.instruction_list == [INST_SYNC_READ]
+
+
+def test_stale_cache_scans_again(tmpdir):
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    path = makeCache(tmpdir, port, ph)
+
+    bus.removeDevice(2)
+    bus.addDevice(VirtualDevice(4, 1020))
+    bus.instruction_list = []
+
+    cache = TopologyCache(path)
+    servos, is_cached = cache.warmStart(port, ph)
+
+    assert (sorted(servos), is_cached) == ([1, 3, 4], False)
+    assert bus.instruction_list[0: 2] == [INST_SYNC_READ, INST_PING]
+    assert sorted(TopologyCache(path).getServos('virtual')) == [1, 3, 4]
+
+    # another model at a cached ID is stale as well
+    bus.removeDevice(4)
+    bus.addDevice(VirtualDevice(4, 1060))
+    assert cache.warmStart(port, ph)[0][4]['model_number'] == 1060
+
+
+def test_status_return_level_0_falls_back_to_ping(tmpdir):
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    path = makeCache(tmpdir, port, ph)
+
+    # set after the scan: the cache still holds level 2, the sync read gets no answer
+    bus.getDevice(2).setValue('status_return_level', 0)
+    bus.instruction_list = []
+
+    cache = TopologyCache(path)
+    assert cache.warmStart(port, ph)[1]
+    assert bus.instruction_list == [INST_SYNC_READ, INST_PING, INST_PING, INST_PING]
+
+    # cached level 0: no sync read at all
+    cache.getServos('virtual')[2]['status_return_level'] = 0
+    bus.instruction_list = []
+    assert cache.warmStart(port, ph)[1]
+    assert bus.instruction_list == [INST_PING, INST_PING, INST_PING]
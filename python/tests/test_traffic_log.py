@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# RecordingPortHandler on a VirtualBusServer pty and ReplayPortHandler of its log
+
+import os
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.protocol2_packet_handler import Protocol2StatusParser
+
+ID_LIST = [1, 2, 3]
+ADDR_GOAL_POSITION = 116
+ADDR_PRESENT_POSITION = 132
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'openpty'), reason="VirtualBusServer needs a pty")
+
+
+def runProgram(port):
+    # the same calls on the robot and offline
+    ph = PacketHandler(2.0)
+    results = [ph.ping(port, 1), ph.write4ByteTxRx(port, 2, ADDR_GOAL_POSITION, 1234)]
+
+    group_sync_read = GroupSyncRead(port, ph, ADDR_PRESENT_POSITION, 4)
+    for dxl_id in ID_LIST:
+        group_sync_read.addParam(dxl_id)
+    results.append(group_sync_read.txRxPacket())
+    results.append([group_sync_read.getData(dxl_id, ADDR_PRESENT_POSITION, 4) for dxl_id in ID_LIST])
+    return results
+
+
+EXPECTED_RESULTS = [(1020, COMM_SUCCESS, 0), (COMM_SUCCESS, 0), COMM_SUCCESS, [100, 1234, 300]]
+
+
+@pytest.fixture(scope='module')
+def log_path(tmpdir_factory):
+    bus = VirtualBus(2.0, 1000000)
+    for dxl_id in ID_LIST:
+        device = VirtualDevice(dxl_id, 1020)
+        device.setValue('present_position', 100 * dxl_id)
+        bus.addDevice(device)
+
+    server = VirtualBusServer(bus)
+    server.start()
+    path = str(tmpdir_factory.mktemp('traffic').join('robot.dxltraffic'))
+    try:
+        port = RecordingPortHandler(server.getPortName(), path)
+        assert port.openPort()
+        assert runProgram(port) == EXPECTED_RESULTS
+        port.closePort()
+        port.stopRecording()
+    finally:
+        server.stop()
+    return path
+
+
+def test_log_holds_the_wire_traffic(log_path):
+    reader = TrafficLogReader(log_path)
+    try:
+        records = list(reader.getRecords())
+        stream = reader.getReadStream()
+    finally:
+        reader.close()
+
+    assert records[0][1] == RECORD_BAUDRATE and bytes(records[0][2]) == b'\x40\x42\x0F\x00'
+    writes = [bytes(data) for _, kind, data in records if kind == RECORD_WRITE]
+    assert [data[7] for data in writes] == [INST_PING, INST_WRITE, INST_SYNC_READ]
+
+    # ping, write and 3 sync read status packets in the received bytes
+    parser = Protocol2StatusParser()
+    parser.feed(stream)
+    packets = []
+    packet, result = parser.getPacket()
+    while result == COMM_SUCCESS:
+        packets.append(packet)
+        packet, result = parser.getPacket()
+    assert [packet[4] for packet in packets] == [1, 2, 1, 2, 3]
+
+    times = [time_ns for time_ns, _, _ in records]
+    assert times == sorted(times)
+
+
+def test_replay_gives_recorded_results(log_path):
+    port = ReplayPortHandler(log_path)
+    assert port.getBaudRate() == 1000000
+    assert port.openPort()
+
+    assert runProgram(port) == EXPECTED_RESULTS
+    assert port.mismatch_count == 0
+    assert port.isFinished()
+
+    # the last status byte comes with its recorded delay to the sync read
+    write_ns, _, read_list = port.transactions[-1]
+    assert port.last_read_ns - port.last_write_ns == read_list[-1][0] - write_ns
+
+
+def test_replay_counts_other_instructions(log_path):
+    port = ReplayPortHandler(log_path)
+    assert port.openPort()
+    ph = PacketHandler(2.0)
+
+    # another ID: the recorded answer of ID 1 is dropped by the packet handler
+    assert ph.ping(port, 4)[1] != COMM_SUCCESS
+    assert port.mismatch_count == 1
+    assert ph.write4ByteTxRx(port, 2, ADDR_GOAL_POSITION, 1234) == (COMM_SUCCESS, 0)
+    assert port.mismatch_count == 1
+
+
+def test_cut_and_foreign_logs(log_path, tmpdir):
+    with open(log_path, 'rb') as log_file:
+        data = log_file.read()
+
+    # a record cut by a crash ends the log
+    cut_path = str(tmpdir.join('cut.dxltraffic'))
+    with open(cut_path, 'wb') as log_file:
+        log_file.write(data[0: -3])
+    reader = TrafficLogReader(log_path)
+    record_count = len(list(reader.getRecords()))
+    reader.close()
+    reader = TrafficLogReader(cut_path)
+    assert len(list(reader.getRecords())) == record_count - 1
+    reader.close()
+
+    foreign_path = str(tmpdir.join('foreign.bin'))
+    with open(foreign_path, 'wb') as log_file:
+        log_file.write(b'NOTALOG!' + data[8:])
+    with pytest.raises(ValueError):
+        TrafficLogReader(foreign_path)
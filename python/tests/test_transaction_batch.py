@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# TransactionBatch span merging and instruction choice on a VirtualBus in simulated time
+
+import threading
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+from dynamixel_sdk.transaction_batch import BatchRequest, mergeSpans, makeRounds
+
+ADDR_TORQUE_ENABLE = 64
+ADDR_LED = 65
+ADDR_GOAL_POSITION = 116
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+
+
+class RecordingBus(VirtualBus):
+    # keeps the instruction of every packet received
+    def __init__(self, *args):
+        VirtualBus.__init__(self, *args)
+        self.instruction_list = []
+
+    def dispatch(self, instruction, end_ns):
+        self.instruction_list.append(instruction[1])
+        VirtualBus.dispatch(self, instruction, end_ns)
+
+
+def makePort(id_list=(1, 2, 3)):
+    bus = RecordingBus(2.0, 1000000, FakeClock())
+    for dxl_id in id_list:
+        device = VirtualDevice(dxl_id, 1020)
+        device.setValue('present_position', dxl_id * 100)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    return port, bus
+
+
+def getSpanRanges(span_dict):
+    return dict((dxl_id, [(span[0], span[1]) for span in span_dict[dxl_id]]) for dxl_id in span_dict)
+
+
+def test_merge_adjacent_and_overlapping_spans():
+    requests = [BatchRequest(1, ADDR_PRESENT_POSITION, 4),
+                BatchRequest(1, ADDR_PRESENT_VELOCITY, 4),
+                BatchRequest(1, 130, 4),
+                BatchRequest(2, ADDR_PRESENT_POSITION, 4)]
+    assert getSpanRanges(mergeSpans(requests)) == {1: [(128, 136)], 2: [(132, 136)]}
+
+
+def test_gapped_spans_are_not_merged():
+    requests = [BatchRequest(1, ADDR_PRESENT_POSITION, 4), BatchRequest(1, ADDR_TORQUE_ENABLE, 1)]
+    assert getSpanRanges(mergeSpans(requests)) == {1: [(64, 65), (132, 136)]}
+
+
+def test_adjacent_spans_split_at_max_span_length():
+    requests = [BatchRequest(1, address, 4) for address in range(0, 16, 4)]
+    assert getSpanRanges(mergeSpans(requests, 8)) == {1: [(0, 8), (8, 16)]}
+
+    # overlapping requests share a span whatever its length
+    requests = [BatchRequest(1, 0, 6), BatchRequest(1, 4, 6)]
+    assert getSpanRanges(mergeSpans(requests, 8)) == {1: [(0, 10)]}
+
+
+def test_rounds_put_shared_ranges_together():
+    requests = [BatchRequest(1, ADDR_TORQUE_ENABLE, 1),
+                BatchRequest(1, ADDR_PRESENT_POSITION, 4),
+                BatchRequest(2, ADDR_PRESENT_POSITION, 4),
+                BatchRequest(3, ADDR_PRESENT_POSITION, 4)]
+    rounds = makeRounds(mergeSpans(requests))
+
+    assert [dict((dxl_id, tuple(span[0: 2])) for dxl_id, span in spans.items()) for spans in rounds] == [
+        {1: (132, 136), 2: (132, 136), 3: (132, 136)},
+        {1: (64, 65)},
+    ]
+
+
+def test_read_rounds_mix_sync_and_bulk_read():
+    port, bus = makePort()
+    batch = TransactionBatch(port, PacketHandler(2.0))
+
+    positions = dict((dxl_id, batch.addRead(dxl_id, ADDR_PRESENT_POSITION, 4)) for dxl_id in (1, 2, 3))
+    torque = [batch.addRead(dxl_id, ADDR_TORQUE_ENABLE, 1) for dxl_id in (1, 2)]
+    velocity = batch.addRead(3, ADDR_PRESENT_VELOCITY, 4)
+
+    assert batch.flush() == COMM_SUCCESS
+    # ID 3 reads 128..136 with the others at 64 in one bulk read, IDs 1 and 2 read 132..136 in a sync read
+    assert bus.instruction_list == [INST_BULK_READ, INST_SYNC_READ]
+    assert batch.getStats() == {'requests': 6, 'instructions': 2}
+
+    for dxl_id, request in positions.items():
+        assert (request.result, request.getValue()) == (COMM_SUCCESS, dxl_id * 100)
+    assert [(request.result, request.getValue()) for request in torque] == [(COMM_SUCCESS, 0), (COMM_SUCCESS, 0)]
+    assert (velocity.result, velocity.getValue()) == (COMM_SUCCESS, 0)
+
+
+def test_write_rounds_mix_sync_and_bulk_write():
+    port, bus = makePort()
+    batch = TransactionBatch(port, PacketHandler(2.0))
+
+    for dxl_id in (1, 2, 3):
+        batch.addWrite4Byte(dxl_id, ADDR_GOAL_POSITION, 1000 + dxl_id)
+    batch.addWrite1Byte(1, ADDR_LED, 1)
+    batch.addWrite1Byte(2, ADDR_TORQUE_ENABLE, 1)
+    led = batch.addWrite1Byte(3, ADDR_LED, 1)
+    batch.addWrite1Byte(3, ADDR_TORQUE_ENABLE, 1)
+
+    assert batch.flush() == COMM_SUCCESS
+    # the shared goal position goes out as a sync write, LED 1 / torque 2 / torque + LED 3 (one span) as a bulk write
+    assert bus.instruction_list == [INST_SYNC_WRITE, INST_BULK_WRITE]
+    assert (led.result, led.error) == (COMM_SUCCESS, 0)
+
+    for dxl_id in (1, 2, 3):
+        assert bus.getDevice(dxl_id).getValue('goal_position') == 1000 + dxl_id
+    assert [bus.getDevice(dxl_id).getValue('led') for dxl_id in (1, 2, 3)] == [1, 0, 1]
+    assert [bus.getDevice(dxl_id).getValue('torque_enable') for dxl_id in (1, 2, 3)] == [0, 1, 1]
+
+
+def test_lone_id_uses_plain_instructions():
+    port, bus = makePort()
+    batch = TransactionBatch(port, PacketHandler(2.0))
+
+    write = batch.addWrite4Byte(2, ADDR_GOAL_POSITION, 2048)
+    read = batch.addRead(2, ADDR_PRESENT_POSITION, 4)
+
+    assert batch.flush() == COMM_SUCCESS
+    assert bus.instruction_list == [INST_WRITE, INST_READ]
+    assert (write.result, write.error) == (COMM_SUCCESS, 0)
+    # writes go first: the virtual servo is already at the new goal position
+    assert (read.result, read.getValue()) == (COMM_SUCCESS, 2048)
+
+
+def test_port_busy_completes_requests():
+    port, bus = makePort()
+    ph = PacketHandler(2.0)
+    batch = TransactionBatch(port, ph)
+    requests = [batch.addRead(dxl_id, ADDR_PRESENT_POSITION, 4) for dxl_id in (1, 2)]
+
+    # another thread is in the middle of a transaction
+    assert ph.readTx(port, 3, ADDR_PRESENT_POSITION, 4) == COMM_SUCCESS
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(batch.flush()))
+    thread.start()
+    thread.join(5.0)
+
+    assert results == [COMM_PORT_BUSY]
+    for request in requests:
+        assert request.isDone()
+        assert (request.result, request.getValue()) == (COMM_PORT_BUSY, 0)
+
+    assert ph.readRx(port, 3, 4)[1] == COMM_SUCCESS
+    assert batch.getPendingCount() == 0
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# TransactionMonitor phases and ID accounting on a VirtualBus in simulated time
+
+import threading
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ID_LIST = [1, 2, 3]
+ADDR_LED = 65
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort(protocol_version=2.0):
+    bus = VirtualBus(protocol_version, 1000000, FakeClock())
+    for dxl_id in ID_LIST:
+        device = VirtualDevice(dxl_id, 1020 if protocol_version == 2.0 else 12)
+        device.setValue('return_delay_time', 0)
+        bus.addDevice(device)
+
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    monitor = TransactionMonitor()
+    port.setMonitor(monitor)
+    return port, bus, monitor
+
+
+def getCount(monitor, name):
+    stats = monitor.getStats()['instructions']
+    return stats[name]['count'] if name in stats else 0
+
+
+def test_read_phases_add_up():
+    port, bus, monitor = makePort()
+    ph = PacketHandler(2.0)
+
+    start_ns = port.clock.getTimeNs()
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1] == COMM_SUCCESS
+    elapsed_us = (port.clock.getTimeNs() - start_ns) / 1000.0
+
+    stats = monitor.getStats()
+    read = stats['instructions']['read']
+    assert (read['count'], read['results']) == (1, {COMM_SUCCESS: 1})
+    phases = read['phases']
+    for name in PHASE_NAMES:
+        assert phases[name]['count'] == 1
+    assert phases['total']['max_us'] == pytest.approx(elapsed_us)
+    assert phases['tx']['max_us'] + phases['wait']['max_us'] + phases['receive']['max_us'] == \
+        pytest.approx(phases['total']['max_us'])
+    # 14 byte instruction at 10 us per byte
+    assert phases['tx']['max_us'] == pytest.approx(140.0)
+
+    assert stats['ids'][1]['results'] == {COMM_SUCCESS: 1}
+    assert stats['ids'][1]['latency']['max_us'] == pytest.approx(elapsed_us)
+    assert (stats['tx_bytes'], stats['rx_bytes']) == (14, 15)
+
+
+def test_locked_port_ends_transactions_at_unlock():
+    port, bus, monitor = makePort()
+    ph = PacketHandler(2.0)
+
+    assert port.lockPort()
+    assert port.lockPort()
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1] == COMM_SUCCESS
+    # the second transaction ends the first one
+    assert ph.write1ByteTxRx(port, 2, ADDR_LED, 1)[0] == COMM_SUCCESS
+    assert (getCount(monitor, 'read'), getCount(monitor, 'write')) == (1, 0)
+
+    port.unlockPort()
+    assert getCount(monitor, 'write') == 0
+    port.unlockPort()
+    assert getCount(monitor, 'write') == 1
+    assert monitor.current is None
+
+    stats = monitor.getStats()['ids']
+    assert (stats[1]['results'], stats[2]['results']) == ({COMM_SUCCESS: 1}, {COMM_SUCCESS: 1})
+
+
+@pytest.mark.parametrize('protocol_version', [1.0, 2.0])
+def test_bulk_read_is_one_transaction(protocol_version):
+    port, bus, monitor = makePort(protocol_version)
+    address = ADDR_PRESENT_POSITION if protocol_version == 2.0 else 36
+    group = GroupBulkRead(port, PacketHandler(protocol_version))
+    for dxl_id in ID_LIST:
+        assert group.addParam(dxl_id, address, 2)
+
+    start_ns = port.clock.getTimeNs()
+    assert group.txRxPacket() == COMM_SUCCESS
+
+    stats = monitor.getStats()
+    bulk_read = stats['instructions']['bulk_read']
+    assert (bulk_read['count'], bulk_read['results']) == (1, {COMM_SUCCESS: 1})
+    assert bulk_read['phases']['total']['max_us'] == pytest.approx((port.clock.getTimeNs() - start_ns) / 1000.0)
+    assert bulk_read['foreign_frames'] == 0
+
+    # every ID answered after the one before
+    latencies = [stats['ids'][dxl_id]['latency']['max_us'] for dxl_id in ID_LIST]
+    assert latencies == sorted(latencies) and latencies[0] < latencies[-1]
+    for dxl_id in ID_LIST:
+        assert stats['ids'][dxl_id]['results'] == {COMM_SUCCESS: 1}
+    assert not port.is_busy and port.port_lock.owner is None
+
+
+def test_missing_ids_are_counted():
+    port, bus, monitor = makePort()
+    ph = PacketHandler(2.0)
+
+    assert ph.read4ByteTxRx(port, 9, ADDR_PRESENT_POSITION)[1] == COMM_RX_TIMEOUT
+    stats = monitor.getStats()
+    assert stats['instructions']['read']['results'] == {COMM_RX_TIMEOUT: 1}
+    assert stats['ids'][9]['results'] == {COMM_RX_TIMEOUT: 1}
+    assert stats['instructions']['read']['phases']['receive']['count'] == 0
+
+    # a sync read missing ID 9 fails as a whole, the IDs that answered are counted
+    group = GroupSyncRead(port, ph, ADDR_PRESENT_POSITION, 4)
+    for dxl_id in ID_LIST + [9]:
+        group.addParam(dxl_id)
+    assert group.txRxPacket() == COMM_RX_TIMEOUT
+
+    stats = monitor.getStats()
+    assert stats['instructions']['sync_read']['results'] == {COMM_RX_TIMEOUT: 1}
+    for dxl_id in ID_LIST:
+        assert stats['ids'][dxl_id]['results'] == {COMM_SUCCESS: 1}
+    assert stats['ids'][9]['results'] == {COMM_RX_TIMEOUT: 1}
+
+
+def test_busy_port_adds_no_transaction():
+    port, bus, monitor = makePort()
+    ph = PacketHandler(2.0)
+
+    assert port.lockPort()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1]))
+    thread.start()
+    thread.join(5.0)
+    port.unlockPort()
+
+    assert result == [COMM_PORT_BUSY]
+    assert monitor.getStats()['instructions'] == {}
+    assert monitor.current is None
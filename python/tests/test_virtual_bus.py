@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+# Simulated servos of VirtualBus, in simulated time
+
+import pytest
+
+from dynamixel_sdk import *
+from dynamixel_sdk.clock import FakeClock
+
+ADDR_LED = 65
+ADDR_GOAL_POSITION = 116
+ADDR_PRESENT_POSITION = 132
+
+
+def makePort(id_list, baudrate=1000000):
+    clock = FakeClock()
+    bus = VirtualBus(2.0, baudrate, clock)
+    for dxl_id in id_list:
+        bus.addDevice(VirtualDevice(dxl_id, 1020))
+
+    port = VirtualPortHandler(bus)
+    port.setBaudRate(baudrate)
+    return port, bus, clock
+
+
+@pytest.mark.parametrize('protocol_version, model_number', [(1.0, 12), (2.0, 1020)])
+def test_ping(protocol_version, model_number):
+    clock = FakeClock()
+    bus = VirtualBus(protocol_version, 1000000, clock)
+    bus.addDevice(VirtualDevice(3, model_number))
+    port = VirtualPortHandler(bus)
+    port.openPort()
+    ph = PacketHandler(protocol_version)
+
+    assert ph.ping(port, 3) == (model_number, COMM_SUCCESS, 0)
+    assert ph.ping(port, 4)[1] == COMM_RX_TIMEOUT
+
+
+def test_goal_position_is_reached():
+    port, _, _ = makePort([1])
+    ph = PacketHandler(2.0)
+
+    assert ph.write4ByteTxRx(port, 1, ADDR_GOAL_POSITION, 2048) == (COMM_SUCCESS, 0)
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION) == (2048, COMM_SUCCESS, 0)
+
+
+def test_status_return_level():
+    port, bus, _ = makePort([1])
+    ph = PacketHandler(2.0)
+
+    bus.getDevice(1).setValue('status_return_level', 1)
+    assert ph.write1ByteTxRx(port, 1, ADDR_LED, 1)[0] == COMM_RX_TIMEOUT
+    assert ph.read1ByteTxRx(port, 1, ADDR_LED) == (1, COMM_SUCCESS, 0)
+
+    bus.getDevice(1).setValue('status_return_level', 0)
+    assert ph.read1ByteTxRx(port, 1, ADDR_LED)[1] == COMM_RX_TIMEOUT
+    assert ph.ping(port, 1)[1] == COMM_SUCCESS
+
+
+def test_reg_write_waits_for_action():
+    port, bus, _ = makePort([1, 2])
+    ph = PacketHandler(2.0)
+
+    for dxl_id in (1, 2):
+        assert ph.regWriteTxRx(port, dxl_id, ADDR_GOAL_POSITION, 4, [0, 4, 0, 0]) == (COMM_SUCCESS, 0)
+    assert bus.getDevice(1).getValue('goal_position') == 0
+
+    assert ph.action(port, BROADCAST_ID) == COMM_SUCCESS
+    assert [bus.getDevice(dxl_id).getValue('present_position') for dxl_id in (1, 2)] == [1024, 1024]
+
+
+def test_wire_time_and_return_delay():
+    port, bus, clock = makePort([1], baudrate=57600)
+    ph = PacketHandler(2.0)
+    bus.getDevice(1).setValue('return_delay_time', 0)
+
+    start_ns = clock.getTimeNs()
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1] == COMM_SUCCESS
+    # 14 byte instruction + 15 byte status packet, 10 bits each
+    wire_ns = (14 + 15) * bus.byte_time_ns
+    assert clock.getTimeNs() - start_ns == pytest.approx(wire_ns, abs=bus.byte_time_ns)
+
+    bus.getDevice(1).setValue('return_delay_time', 250)
+    start_ns = clock.getTimeNs()
+    assert ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)[1] == COMM_SUCCESS
+    assert clock.getTimeNs() - start_ns == pytest.approx(wire_ns + 500000, abs=bus.byte_time_ns)
+
+
+def test_baudrate_mismatch():
+    port, _, _ = makePort([1])
+    port.setBaudRate(57600)
+
+    assert PacketHandler(2.0).ping(port, 1)[1] == COMM_RX_TIMEOUT
+
+
+def test_sync_write():
+    port, bus, _ = makePort([1, 2, 3])
+    group = GroupSyncWrite(port, PacketHandler(2.0), ADDR_GOAL_POSITION, 4)
+    for dxl_id in (1, 2, 3):
+        group.addParam(dxl_id, bytearray([dxl_id, 1, 0, 0]))
+
+    assert group.txPacket() == COMM_SUCCESS
+    assert [bus.getDevice(dxl_id).getValue('goal_position') for dxl_id in (1, 2, 3)] == [257, 258, 259]
+    assert bus.status_count == 0